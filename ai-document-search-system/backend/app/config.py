@@ -5,6 +5,7 @@ Loads environment variables using pydantic-settings
 
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -23,10 +24,54 @@ class Settings(BaseSettings):
     upload_dir: Path = Path("./data/uploads")
     extracted_dir: Path = Path("./data/extracted")
     metadata_file: Path = Path("./data/metadata.json")
+    index_dir: Path = Path("./data/index")
+    jobs_file: Path = Path("./data/jobs.json")  # Ingestion job journal (recovered on restart)
+
+    # Upload Settings
+    max_upload_size: int = 200 * 1024 * 1024  # Bytes; larger uploads are rejected (413) while streaming
+    duplicate_uploads: Literal["return_existing", "reuse_extraction", "keep"] = "return_existing"  # Byte-identical re-uploads
+    pdf_extraction_workers: int = 4  # Processes extracting the pages of large PDFs (capped at the CPU count)
+    pdf_parallel_min_pages: int = 64  # Smaller PDFs are extracted in the request process
+    ingestion_workers: int = 2  # Threads extracting and indexing uploads in the background
+    ingestion_queue_size: int = 64  # Uploads waiting for a worker before new ones get 503
+    max_bulk_files: int = 500  # Files (zip members included) accepted by one /documents/bulk call
+    max_bulk_upload_size: int = 2 * 1024 * 1024 * 1024  # Bytes of one /documents/bulk call, after unzipping
 
     # Search Settings
     max_search_results: int = 10
+    max_batch_queries: int = 1000  # Queries accepted by one /search/batch call
     tfidf_max_features: int = 1000
+    tfidf_vectorizer: Literal["vocabulary", "hashing"] = "vocabulary"  # TF-IDF term -> column mapping
+    tfidf_hash_features: int = 2 ** 20  # Hashed columns in "hashing" mode (fixed IDF table size)
+    index_compaction_threshold: float = 0.25  # Changed-row ratio that triggers a background refit
+    search_engine: Literal["tfidf", "bm25"] = "tfidf"  # Document ranking for /search
+    bm25_k1: float = 1.5  # BM25 term frequency saturation
+    bm25_b: float = 0.75  # BM25 document length normalization
+    query_cache_size: int = 512      # Cached search/passage results (0 disables the cache)
+    query_cache_ttl: float = 300.0   # Seconds before a cached result expires (0 = never)
+    document_cache_size: int = 32    # Decoded document texts kept in memory (LRU)
+    semantic_search: bool = False    # Fuse LSA (latent semantic) ranking into /search results
+    semantic_components: int = 128   # LSA dimensions
+    semantic_lsh_tables: int = 8     # LSH hash tables for approximate nearest neighbours
+    semantic_lsh_bits: int = 12      # Hyperplanes per LSH table
+    semantic_weight: float = 0.3     # Share of the semantic score in the fused score
+    # Engines fused by /search (empty = search_engine, plus "semantic" if semantic_search)
+    retrieval_engines: List[Literal["tfidf", "bm25", "semantic"]] = []
+    fusion_strategy: Literal["weighted", "rrf"] = "weighted"  # How engine rankings are merged
+    rrf_k: int = 60                  # Reciprocal rank fusion constant: 1 / (rrf_k + rank)
+    retrieval_workers: int = 4       # Threads running the engines of one query in parallel
+
+    # Near-Duplicate Settings (MinHash + LSH)
+    minhash_permutations: int = 128  # MinHash signature length
+    minhash_shingle_size: int = 5    # Words per shingle
+    lsh_bands: int = 16              # LSH bands of minhash_permutations / lsh_bands rows each
+    near_duplicate_threshold: float = 0.8  # Estimated Jaccard similarity of near-duplicates
+    collapse_near_duplicates: bool = False  # Fold near-duplicates into one /search result
+
+    # RAG Settings
+    passage_chunk_size: int = 200  # Words per passage in the passage index
+    passage_overlap: int = 40      # Words shared by consecutive passages
+    qa_max_passages: int = 8       # Passages sent to the LLM per question
 
     # LLM Settings
     default_model: str = "llama-3.1-8b-instant"  # Updated from decommissioned llama3-8b-8192
@@ -9,6 +9,7 @@ from pathlib import Path
 
 from app.config import settings
 from app.routers import documents, search, ai
+from app.services.pdf_service import shutdown_extraction_pool
 from app.services.search_service import search_service
 
 
@@ -42,13 +43,22 @@ async def startup_event():
     """Run on application startup"""
     create_directories()
 
-    # Load existing documents into search index
+    # Load persisted search index, refit from extracted texts only if missing/stale
     try:
-        search_service.load_documents()
+        if search_service.load_index():
+            print("[OK] Search index restored from disk")
+        else:
+            search_service.load_documents()
+            search_service.save_index()
         print(f"[OK] Search index loaded with {len(search_service.doc_ids)} documents")
     except Exception as e:
         print(f"[WARNING] Failed to load search index: {str(e)}")
 
+    # Start the ingestion workers, resuming uploads left unfinished by the last run
+    recovered = documents.ingestion_queue.start()
+    if recovered:
+        print(f"[OK] Resumed {recovered} unfinished ingestion jobs")
+
     print(f"[START] {settings.app_name} v{settings.app_version} started")
     print(f"[INFO] Upload directory: {settings.upload_dir}")
     print(f"[INFO] Extracted text directory: {settings.extracted_dir}")
@@ -57,6 +67,16 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
+    # Finish running ingestion jobs; queued ones are resumed on the next start
+    documents.ingestion_queue.stop()
+
+    # Persist incremental index changes so the next start doesn't refit
+    try:
+        search_service.save_index()
+    except Exception as e:
+        print(f"[WARNING] Failed to save search index: {str(e)}")
+
+    shutdown_extraction_pool()
     print(f"[STOP] {settings.app_name} shutting down")
 
 
@@ -3,7 +3,7 @@ Pydantic Schemas for Request/Response models
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -13,8 +13,45 @@ class DocumentUploadResponse(BaseModel):
     """Response after successful document upload"""
     doc_id: str
     filename: str
-    status: str = "success"
+    status: str = "queued"  # "duplicate" if an identical upload was returned instead
     uploaded_at: datetime
+    duplicate_of: Optional[str] = Field(None, description="Earlier upload with the same content")
+    job_id: Optional[str] = Field(None, description="Ingestion job to poll at GET /jobs/{job_id}")
+
+
+class BulkUploadResult(BaseModel):
+    """Outcome of one file of a bulk upload"""
+    filename: str  # Zip members as "archive.zip/member.pdf"
+    status: str  # "queued", "duplicate" or "failed" ("done" or "failed" in JobStatus.results)
+    doc_id: Optional[str] = None
+    duplicate_of: Optional[str] = Field(None, description="Earlier upload with the same content")
+    job_id: Optional[str] = Field(None, description="Ingestion job to poll at GET /jobs/{job_id}")
+    error: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    """Progress of a background ingestion job"""
+    job_id: str
+    doc_id: Optional[str] = None  # Single uploads
+    filename: Optional[str] = None
+    status: str  # "queued", "processing", "done" or "failed"
+    stage: str   # "queued", "extracting", "storing", "indexing" or "done"
+    progress: float = Field(..., ge=0.0, le=1.0, description="Share of the stages completed")
+    error: Optional[str] = None
+    results: Optional[List[BulkUploadResult]] = Field(
+        None, description="Bulk uploads: outcome of every file once the job is done"
+    )
+    created_at: datetime
+    updated_at: datetime
+
+
+class BulkUploadResponse(BaseModel):
+    """Per-file report of a bulk upload"""
+    results: List[BulkUploadResult]
+    total: int
+    queued: int
+    duplicates: int
+    failed: int
 
 
 class DocumentInfo(BaseModel):
@@ -32,12 +69,57 @@ class DocumentListResponse(BaseModel):
     total: int
 
 
+class DocumentPage(BaseModel):
+    """Extracted text of one page"""
+    page: int = Field(..., description="Page number (1-based)")
+    text: str
+
+
+class DocumentPagesResponse(BaseModel):
+    """Pages read from a document"""
+    doc_id: str
+    page_count: int
+    pages: List[DocumentPage]
+
+
+class NearDuplicate(BaseModel):
+    """Document with nearly the same content"""
+    doc_id: str
+    filename: str
+    similarity: float = Field(..., description="Estimated Jaccard similarity of the word shingles")
+
+
+class NearDuplicatesResponse(BaseModel):
+    """Near-duplicates of a document"""
+    doc_id: str
+    threshold: float
+    near_duplicates: List[NearDuplicate]
+
+
 # ============ Search Models ============
 
 class SearchRequest(BaseModel):
     """Request for keyword-based search"""
-    query: str = Field(..., min_length=1, description="Search query")
+    query: str = Field(
+        ..., min_length=1,
+        description=(
+            'Search query; supports "quoted phrases", a NEAR/k b, AND/OR/NOT with '
+            'parentheses and filename:/uploaded: filters (e.g. uploaded:>=2024-05)'
+        )
+    )
     top_k: int = Field(default=5, ge=1, le=20, description="Number of results to return")
+    doc_ids: Optional[List[str]] = Field(
+        default=None, description="Only search these documents (optional)"
+    )
+    collapse_duplicates: Optional[bool] = Field(
+        default=None, description="Show one result per group of near-duplicates (default: server setting)"
+    )
+
+
+class Highlight(BaseModel):
+    """Character range of a query term inside a snippet"""
+    start: int
+    end: int
 
 
 class SearchResult(BaseModel):
@@ -46,6 +128,9 @@ class SearchResult(BaseModel):
     filename: str
     score: float
     snippet: str  # Text excerpt from document
+    page: Optional[int] = Field(None, description="Page of the snippet (PDFs)")
+    highlights: List[Highlight] = Field(default_factory=list, description="Query term offsets in the snippet")
+    duplicates: List[str] = Field(default_factory=list, description="Near-duplicates folded into this result")
 
 
 class SearchResponse(BaseModel):
@@ -53,6 +138,33 @@ class SearchResponse(BaseModel):
     query: str
     results: List[SearchResult]
     total_found: int
+    timings_ms: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Milliseconds per retrieval stage (parse, filter, engines, fusion, snippets, total)"
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Request for running many searches in one call"""
+    queries: List[SearchRequest] = Field(..., min_length=1, description="Search requests to run")
+
+
+class BatchSearchResponse(BaseModel):
+    """Response for batch search (one SearchResponse per query, in order)"""
+    results: List[SearchResponse]
+    total_queries: int
+
+
+class Suggestion(BaseModel):
+    """Completion of the word being typed"""
+    term: str
+    doc_freq: int = Field(..., description="Number of documents containing the term")
+
+
+class SuggestResponse(BaseModel):
+    """Response for search-as-you-type suggestions"""
+    prefix: str
+    suggestions: List[Suggestion]
 
 
 # ============ AI Models ============
@@ -24,6 +24,7 @@ from app.models.schemas import (
     Source
 )
 from app.services.llm_service import llm_service
+from app.services.pdf_service import load_extracted_text
 from app.services.search_service import search_service
 
 router = APIRouter()
@@ -49,6 +50,35 @@ def _load_metadata() -> dict:
         return json.load(f)
 
 
+def _merge_passages(passages: List[dict]) -> List[dict]:
+    """
+    Merge passages of one document whose [start, end) ranges overlap
+
+    Passages are overlapping word windows, so neighbouring hits would repeat
+    their shared text in the QA context. Passages are slices of the document
+    text: a merged passage is the first one extended by the part of the next
+    one past its end.
+
+    Args:
+        passages: Passages of one document (start, end, page, text), best first
+
+    Returns:
+        Merged passages in reading order, each with the page where it starts
+        and the best rank (index in passages) of the passages it covers
+    """
+    merged = []
+    for rank, passage in sorted(enumerate(passages), key=lambda item: item[1]['start']):
+        last = merged[-1] if merged else None
+        if last is not None and passage['start'] < last['end']:
+            if passage['end'] > last['end']:
+                last['text'] += passage['text'][last['end'] - passage['start']:]
+                last['end'] = passage['end']
+            last['rank'] = min(last['rank'], rank)
+        else:
+            merged.append({**passage, 'rank': rank})
+    return merged
+
+
 @router.post("/ai/summarize", response_model=SummarizeResponse)
 async def summarize_document(request: SummarizeRequest):
     """
@@ -67,10 +97,10 @@ async def summarize_document(request: SummarizeRequest):
     """
     logger.info(f"Summarize request: doc_id={request.doc_id}, type={request.summary_type}")
 
-    # Read extracted text file (using settings.extracted_dir - Claude's correct approach)
-    text_path = settings.extracted_dir / f"{request.doc_id}.txt"
-
-    if not text_path.exists():
+    # Read extracted text from the document store (mmap + LRU, no repeated file reads)
+    try:
+        text = load_extracted_text(request.doc_id)
+    except FileNotFoundError:
         logger.error(f"Document not found: {request.doc_id}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -78,9 +108,6 @@ async def summarize_document(request: SummarizeRequest):
         )
 
     try:
-        with open(text_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-
         # Empty text check (Claude's edge case handling)
         if not text.strip():
             logger.warning(f"Document {request.doc_id} is empty")
@@ -120,9 +147,9 @@ async def answer_question(request: QARequest):
     Answer question using RAG (Retrieval-Augmented Generation)
 
     Pipeline:
-    1. Use TF-IDF search to find relevant documents (classical method)
-    2. Load text from top-ranked documents
-    3. Build context by combining texts
+    1. Use the TF-IDF passage index to find the most relevant passages (classical method)
+    2. Group the passages by document (in text order, overlapping ones merged)
+    3. Build context from those passages only (not whole documents)
     4. Use LLM to answer based ONLY on context (hallucination prevention)
 
     Args:
@@ -145,13 +172,15 @@ async def answer_question(request: QARequest):
     logger.info(f"QA request: question='{request.question[:50]}...', doc_ids={request.doc_ids}")
 
     try:
-        # Step 1: Search for relevant documents using TF-IDF (classical method, NO AI)
-        search_results = search_service.search(
+        # Step 1: Search for relevant passages using TF-IDF (classical method, NO AI)
+        # doc_ids scopes the search itself, so only those documents are scored
+        passages = search_service.search_passages(
             query=request.question,
-            top_k=5
+            top_k=settings.qa_max_passages,
+            doc_ids=request.doc_ids
         )
 
-        if not search_results:
+        if not passages:
             logger.warning(f"No documents found for question: {request.question[:50]}")
             return QAResponse(
                 question=request.question,
@@ -160,70 +189,44 @@ async def answer_question(request: QARequest):
                 model_used="N/A"
             )
 
-        # Filter by doc_ids if provided (Claude's filtering logic)
-        if request.doc_ids:
-            search_results = [
-                r for r in search_results if r['doc_id'] in request.doc_ids
-            ]
-            logger.debug(f"Filtered to {len(search_results)} documents by doc_ids")
-
-        if not search_results:
-            logger.warning("No documents remained after doc_ids filtering")
-            return QAResponse(
-                question=request.question,
-                answer=NO_ANSWER_TEXT,
-                sources=[],
-                model_used="N/A"
-            )
-
         # Load metadata for filenames
         metadata = _load_metadata()
         meta_map = {doc['doc_id']: doc for doc in metadata.get('documents', [])}
 
-        # Step 2: Load text from top documents and build context
+        # Step 2: Group passages per document, documents in rank order
+        passages_by_doc = {}
+        for passage in passages:
+            passages_by_doc.setdefault(passage['doc_id'], []).append(passage)
+
         context_parts = []
         sources = []
 
-        for result in search_results[:5]:  # Top 5 results
-            doc_id = result['doc_id']
-            text_path = settings.extracted_dir / f"{doc_id}.txt"
+        for doc_id, doc_passages in passages_by_doc.items():
+            # Create source with excerpt from the best passage (Copilot's idea)
+            best_text = doc_passages[0]['text']
+            filename = meta_map.get(doc_id, {}).get('filename', 'Unknown')
+            excerpt = best_text[:200] + "..." if len(best_text) > 200 else best_text
 
-            if not text_path.exists():
-                logger.warning(f"Text file not found for {doc_id}, skipping")
-                continue
+            # Keep passages of one document in reading order, without repeating overlaps
+            doc_passages = _merge_passages(doc_passages)
+            best = min(doc_passages, key=lambda p: p['rank'])
 
-            try:
-                with open(text_path, 'r', encoding='utf-8') as f:
-                    doc_text = f.read()
+            sources.append(Source(
+                doc_id=doc_id,
+                filename=filename,
+                page=best.get('page'),  # Page where the (merged) best passage starts
+                excerpt=excerpt
+            ))
 
-                if doc_text.strip():
-                    context_parts.append(doc_text)
-
-                    # Create source with excerpt (Copilot's idea - shows user where answer came from)
-                    filename = meta_map.get(doc_id, {}).get('filename', 'Unknown')
-                    excerpt = doc_text[:200] + "..." if len(doc_text) > 200 else doc_text
-
-                    sources.append(Source(
-                        doc_id=doc_id,
-                        filename=filename,
-                        excerpt=excerpt
-                    ))
-
-            except Exception as e:
-                logger.warning(f"Failed to load text for {doc_id}: {str(e)}")
-                continue
-
-        if not context_parts:
-            logger.error("Failed to load any document texts")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to load document texts"
-            )
+            context_parts.append("\n\n[...]\n\n".join(p['text'] for p in doc_passages))
 
         # Step 3: Combine context (Claude's approach with clear separators)
         combined_context = "\n\n---DOCUMENT_BOUNDARY---\n\n".join(context_parts)
 
-        logger.debug(f"Built context from {len(context_parts)} documents ({len(combined_context)} chars)")
+        logger.debug(
+            f"Built context from {len(passages)} passages of {len(context_parts)} documents "
+            f"({len(combined_context)} chars)"
+        )
 
         # Step 4: Generate answer using LLM with strict no-hallucination prompt
         answer = llm_service.answer_question(
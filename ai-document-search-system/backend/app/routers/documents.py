@@ -3,22 +3,57 @@
 Handles PDF upload, metadata storage, text extraction
 """
 
+import codecs
+import hashlib
 import json
+import os
+import queue
+import tempfile
+import threading
 import uuid
+import zipfile
 from datetime import datetime
-from pathlib import Path
-from typing import List
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Literal, Optional, Tuple
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse, FileResponse
 
 from app.config import settings
-from app.models.schemas import DocumentUploadResponse, DocumentListResponse, DocumentInfo
-from app.services.pdf_service import extract_text_from_pdf, save_extracted_text, get_pdf_metadata
+from app.models.schemas import (
+    DocumentUploadResponse, BulkUploadResponse, BulkUploadResult, DocumentListResponse, DocumentInfo,
+    DocumentPage, DocumentPagesResponse, JobStatus, NearDuplicate, NearDuplicatesResponse
+)
+from app.services.ingestion_service import IngestionQueue
+from app.services.near_duplicate_index import encode_signature, minhash_signature
+from app.services.pdf_service import (
+    extract_texts_from_pdfs, iter_pdf_pages, save_extracted_text, save_extracted_pages,
+    load_extracted_text, load_extracted_pages, load_page_table, delete_extracted_text, get_pdf_metadata
+)
 from app.services.search_service import search_service
 
 router = APIRouter()
 
+# Document types that can be uploaded (and found inside a bulk zip archive)
+ALLOWED_EXTENSIONS = {'.pdf', '.txt', '.md'}
+
+# Uploads are read, written and hashed in chunks of this size
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# PDFs must start with this signature (within the first PDF_HEADER_WINDOW bytes)
+PDF_MAGIC = b'%PDF-'
+PDF_HEADER_WINDOW = 1024
+
+# Zip archives (bulk uploads) start with a local file header
+ZIP_MAGIC = b'PK\x03\x04'
+
+# Seconds a client is asked to wait when the ingestion queue is full
+QUEUE_FULL_RETRY_AFTER = 5
+
+# Serializes read-modify-write cycles of metadata.json (ingestion workers + routes)
+metadata_lock = threading.Lock()
+
 
 def load_metadata() -> dict:
     """Load metadata from JSON file"""
@@ -36,80 +71,238 @@ def save_metadata(metadata: dict) -> None:
         json.dump(metadata, f, indent=2, default=str)
 
 
-@router.post("/documents/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_201_CREATED)
-async def upload_document(file: UploadFile = File(...)):
-    """
-    Upload a document (PDF or text) and extract text
+def find_by_hash(metadata: dict, sha256: str) -> Optional[dict]:
+    """Metadata entry of an earlier upload with the same content hash"""
+    doc_id = metadata.get('hashes', {}).get(sha256)
+    if doc_id is None:
+        return None
+    for doc in metadata.get('documents', []):
+        if doc['doc_id'] == doc_id:
+            return doc
+    return None
 
-    Steps:
-    1. Validate file type (.pdf, .txt, .md)
-    2. Save file to uploads/
-    3. Extract text (PDF: PyMuPDF, Text: direct read)
-    4. Save extracted text to extracted/
-    5. Update metadata.json
-    6. Rebuild search index
+
+def forget_hash(metadata: dict, doc: dict) -> None:
+    """Point the hash of a removed document to another copy, or drop it"""
+    sha256 = doc.get('sha256')
+    hashes = metadata.get('hashes', {})
+    if sha256 is None or hashes.get(sha256) != doc['doc_id']:
+        return
+    copies = [d['doc_id'] for d in metadata.get('documents', []) if d.get('sha256') == sha256]
+    if copies:
+        hashes[sha256] = copies[0]
+    else:
+        del hashes[sha256]
+
+
+def check_magic_bytes(first_chunk: bytes, file_ext: str) -> None:
     """
-    # Validate file type
-    ALLOWED_EXTENSIONS = {'.pdf', '.txt', '.md'}
-    file_ext = Path(file.filename).suffix.lower()
+    Check that the start of an upload matches its extension
 
-    if file_ext not in ALLOWED_EXTENSIONS:
+    Raises:
+        HTTPException: 400 for a PDF without the %PDF- header, a zip archive
+            without a local file header or a text file with NUL bytes
+            (binary content)
+    """
+    if file_ext == '.pdf':
+        valid = PDF_MAGIC in first_chunk[:PDF_HEADER_WINDOW]
+    elif file_ext == '.zip':
+        valid = first_chunk.startswith(ZIP_MAGIC)
+    else:
+        valid = b'\x00' not in first_chunk
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Only {', '.join(ALLOWED_EXTENSIONS)} files are supported"
+            detail=f"File content does not match its {file_ext} extension"
         )
 
-    # Generate unique document ID
-    doc_id = str(uuid.uuid4())
 
-    # Save uploaded file with appropriate extension
-    uploaded_file_path = settings.upload_dir / f"{doc_id}{file_ext}"
-    try:
+class TempUpload:
+    """
+    Temp file in upload_dir that an upload is written into, chunk by chunk
+
+    Memory use is one chunk whatever the upload size. The SHA-256, the
+    size limit, the magic bytes and (for text files) UTF-8 validity are
+    checked while the chunks go by; finish() fsyncs the file so it can be
+    renamed into place atomically. On any error the caller calls discard().
+    """
+
+    def __init__(self, file_ext: str, max_size: Optional[int] = None):
+        """
+        Args:
+            file_ext: Lower case extension of the upload (validated by the caller)
+            max_size: Size limit in bytes (default: settings.max_upload_size)
+        """
         settings.upload_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=settings.upload_dir, prefix='.upload-', suffix='.part')
+        self.path = Path(name)
+        self.file_ext = file_ext
+        self.max_size = settings.max_upload_size if max_size is None else max_size
+        self.size = 0
+        self._file = os.fdopen(fd, 'wb')
+        self._sha256 = hashlib.sha256()
+        self._decoder = codecs.getincrementaldecoder('utf-8')() if file_ext in ('.txt', '.md') else None
 
-        with open(uploaded_file_path, 'wb') as f:
-            content = await file.read()
-            f.write(content)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file: {str(e)}"
+    def write(self, chunk: bytes) -> None:
+        """
+        Check and append one chunk
+
+        Raises:
+            HTTPException: 413 above max_size, 400 if the content does not
+                match the extension
+        """
+        if self.size == 0:
+            check_magic_bytes(chunk, self.file_ext)
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds the {self.max_size} byte upload limit"
+            )
+        self._decode(chunk)
+        self._sha256.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> Tuple[Path, str, int]:
+        """
+        Flush and fsync the temp file
+
+        Returns:
+            Tuple of (temp file path, SHA-256 hex digest, size in bytes)
+
+        Raises:
+            HTTPException: 400 if a text file ends in the middle of a UTF-8
+                sequence
+        """
+        self._decode(b'', final=True)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        return self.path, self._sha256.hexdigest(), self.size
+
+    def discard(self) -> None:
+        """Close and remove the temp file"""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+    def _decode(self, chunk: bytes, final: bool = False) -> None:
+        if self._decoder is None:
+            return
+        try:
+            self._decoder.decode(chunk, final=final)
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{self.file_ext} files must be UTF-8 encoded"
+            )
+
+
+async def stream_to_temp_file(file: UploadFile, file_ext: str, max_size: Optional[int] = None) -> Tuple[Path, str, int]:
+    """
+    Stream an upload into a temp file in upload_dir (see TempUpload)
+
+    Args:
+        file: Uploaded file
+        file_ext: Its (validated) lower case extension
+        max_size: Size limit in bytes (default: settings.max_upload_size)
+
+    Returns:
+        Tuple of (temp file path, SHA-256 hex digest, size in bytes)
+
+    Raises:
+        HTTPException: 413 above the size limit, 400 if the content does not
+            match the extension (the temp file is removed)
+    """
+    upload = TempUpload(file_ext, max_size)
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            upload.write(chunk)
+        return upload.finish()
+    except BaseException:
+        upload.discard()
+        raise
+
+
+def ingest_upload(job: dict, set_stage: Callable[[str], None]) -> None:
+    """
+    Extraction, persistence and indexing stages of an upload (runs on an
+    ingestion worker)
+
+    Idempotent: a job interrupted by a restart runs again from the start
+    without adding the document twice.
+
+    PDF pages are streamed into the document store, but the indexing stage
+    is not incremental per page: passages, shingles and the rebuild journal
+    span page boundaries, so the stored text is read back whole once and
+    memory use of the job is O(document).
+
+    Args:
+        job: Ingestion job (doc_id, filename, file_ext, sha256, file_size,
+            uploaded_at, duplicate_of)
+        set_stage: Reports the stage being run
+
+    Raises:
+        Exception: If the text cannot be extracted or stored (the uploaded
+            file is removed)
+    """
+    doc_id = job['doc_id']
+    file_ext = job['file_ext']
+    uploaded_file_path = settings.upload_dir / f"{doc_id}{file_ext}"
+
+    original = None
+    if job.get('duplicate_of'):
+        original = next(
+            (doc for doc in load_metadata().get('documents', []) if doc['doc_id'] == job['duplicate_of']),
+            None
         )
 
     # Extract text based on file type
+    set_stage("extracting")
+    stored = False
     try:
-        if file_ext == '.pdf':
-            # PDF: Use PyMuPDF (classical method, no AI)
-            extracted_data = extract_text_from_pdf(uploaded_file_path)
-            full_text = extracted_data['full_text']
-            page_count = extracted_data['page_count']
-        else:
+        full_text = None
+        if original is not None:
+            # Same bytes as an earlier upload: reuse its extraction (no PyMuPDF)
+            try:
+                full_text = load_extracted_text(original['doc_id'])
+                page_table = load_page_table(original['doc_id'])
+                page_count = original.get('page_count')
+            except FileNotFoundError:
+                original = None  # deleted meanwhile, extract again
+        if full_text is None and file_ext == '.pdf':
+            # PDF: Use PyMuPDF (classical method, no AI); every cleaned page
+            # goes to the document store as soon as it is extracted
+            page_table = save_extracted_pages(doc_id, iter_pdf_pages(uploaded_file_path))
+            page_count = len(page_table[0])
+            stored = True
+        elif full_text is None:
             # Text files (.txt, .md): Direct read
             with open(uploaded_file_path, 'r', encoding='utf-8') as f:
                 full_text = f.read()
-            page_count = None  # Text files don't have pages
+            page_table = page_count = None  # Text files don't have pages
     except Exception as e:
         # Cleanup uploaded file
         uploaded_file_path.unlink(missing_ok=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to extract text from file: {str(e)}"
-        )
+        raise Exception(f"Failed to extract text from file: {str(e)}")
 
     # Save extracted text for search indexing
+    set_stage("storing")
     try:
-        save_extracted_text(doc_id, full_text)
+        if stored:
+            # The indexers need the whole text: decode it once from the mapping
+            full_text = load_extracted_text(doc_id)
+        else:
+            save_extracted_text(doc_id, full_text, page_table)
     except Exception as e:
         # Cleanup files
         uploaded_file_path.unlink(missing_ok=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save extracted text: {str(e)}"
-        )
+        raise Exception(f"Failed to save extracted text: {str(e)}")
 
     # Get file metadata
     try:
-        if file_ext == '.pdf':
+        if original is not None:
+            file_metadata = {'file_size': job['file_size']}
+        elif file_ext == '.pdf':
             file_metadata = get_pdf_metadata(uploaded_file_path)
         else:
             # For text files, calculate file size manually
@@ -119,34 +312,629 @@ async def upload_document(file: UploadFile = File(...)):
     except Exception as e:
         file_metadata = {}
 
-    # Update metadata.json
-    metadata = load_metadata()
-    uploaded_at = datetime.now()
+    # Near-duplicate signature (identical content has the same one)
+    if original is not None and original.get('minhash'):
+        minhash = original['minhash']
+    else:
+        minhash = encode_signature(minhash_signature(full_text))
 
     doc_metadata = {
         "doc_id": doc_id,
-        "filename": file.filename,
-        "uploaded_at": uploaded_at.isoformat(),
+        "filename": job['filename'],
+        "uploaded_at": job['uploaded_at'],
         "page_count": page_count,
-        "file_size": file_metadata.get('file_size', 0)
+        "file_size": file_metadata.get('file_size', 0),
+        "sha256": job['sha256'],
+        "minhash": minhash
     }
 
-    metadata['documents'].append(doc_metadata)
-    save_metadata(metadata)
+    # Update metadata.json (once, even if the job runs again)
+    with metadata_lock:
+        metadata = load_metadata()
+        if not any(doc['doc_id'] == doc_id for doc in metadata['documents']):
+            metadata['documents'].append(doc_metadata)
+            metadata.setdefault('hashes', {}).setdefault(job['sha256'], doc_id)
+            save_metadata(metadata)
 
-    # Rebuild search index to include new document
+    # Add the new document to the search index (incremental, no full rebuild)
+    set_stage("indexing")
     try:
-        search_service.rebuild_index()
+        search_service.add_document(doc_id, full_text, doc_metadata)
     except Exception as e:
         # Non-critical error - document is uploaded but search may not work immediately
-        print(f"Warning: Failed to rebuild search index: {str(e)}")
+        print(f"Warning: Failed to update search index: {str(e)}")
+
+
+def ingest_bulk(job: dict, set_stage: Callable[[str], None]) -> dict:
+    """
+    Extraction, persistence and indexing stages of a bulk upload, as one
+    batch (runs on an ingestion worker)
+
+    Unlike one job per file, metadata.json is written once and the search
+    index receives a single batched update (one snapshot published), so
+    loading n documents costs O(n) instead of O(n^2). PDFs are extracted in
+    parallel by the extraction worker processes.
+
+    Idempotent like ingest_upload(): a job interrupted by a restart runs
+    again without adding its documents twice.
+
+    Args:
+        job: Bulk ingestion job (documents: doc_id, filename, file_ext,
+            sha256, file_size, uploaded_at, duplicate_of of every file)
+        set_stage: Reports the stage being run
+
+    Returns:
+        {results}: one {filename, status, doc_id, duplicate_of, error} per
+        document, in order, with status "done" or "failed"
+    """
+    documents = job['documents']
+    results = {
+        doc['doc_id']: {"filename": doc['filename'], "status": "done",
+                        "doc_id": doc['doc_id'], "duplicate_of": doc['duplicate_of']}
+        for doc in documents
+    }
+
+    def path_of(doc: dict) -> Path:
+        return settings.upload_dir / f"{doc['doc_id']}{doc['file_ext']}"
+
+    def fail(doc: dict, error: str) -> None:
+        """Record a failed file and remove its upload"""
+        path_of(doc).unlink(missing_ok=True)
+        results[doc['doc_id']].update(status="failed", error=error)
+
+    # Reuse the stored extraction of earlier uploads (reuse_extraction)
+    set_stage("extracting")
+    known = {doc['doc_id']: doc for doc in load_metadata().get('documents', [])}
+    texts: Dict[str, Tuple[str, Optional[int], Optional[tuple]]] = {}  # doc_id -> (text, page_count, page_table)
+    minhashes: Dict[str, str] = {}
+    to_extract, copies = [], []
+    for doc in documents:
+        original = known.get(doc['duplicate_of'])
+        if original is not None:
+            try:
+                texts[doc['doc_id']] = (load_extracted_text(original['doc_id']), original.get('page_count'),
+                                        load_page_table(original['doc_id']))
+                if original.get('minhash'):
+                    minhashes[doc['doc_id']] = original['minhash']
+                continue
+            except FileNotFoundError:
+                pass  # deleted meanwhile, extract again
+        elif doc['duplicate_of'] in results:
+            copies.append(doc)
+            continue
+        to_extract.append(doc)
+
+    # Extract the rest: PDFs in parallel (PyMuPDF), text files directly
+    pdfs = [doc for doc in to_extract if doc['file_ext'] == '.pdf']
+    for doc, extracted in zip(pdfs, extract_texts_from_pdfs([path_of(doc) for doc in pdfs])):
+        if isinstance(extracted, Exception):
+            fail(doc, f"Failed to extract text from file: {str(extracted)}")
+        else:
+            texts[doc['doc_id']] = (extracted['full_text'], extracted['page_count'], extracted['page_table'])
+    for doc in to_extract:
+        if doc['file_ext'] != '.pdf':
+            try:
+                with open(path_of(doc), 'r', encoding='utf-8') as f:
+                    texts[doc['doc_id']] = (f.read(), None, None)  # Text files don't have pages
+            except Exception as e:
+                fail(doc, f"Failed to extract text from file: {str(e)}")
+
+    # Copies of an earlier file of the same batch share its extraction
+    for doc in copies:
+        if doc['duplicate_of'] in texts:
+            texts[doc['doc_id']] = texts[doc['duplicate_of']]
+        else:
+            fail(doc, "Failed to extract text from file: an identical file of this upload failed")
+
+    # Save extracted texts and build the metadata entries
+    set_stage("storing")
+    indexed = []
+    for doc in documents:
+        if doc['doc_id'] not in texts:
+            continue
+        full_text, page_count, page_table = texts[doc['doc_id']]
+        try:
+            save_extracted_text(doc['doc_id'], full_text, page_table)
+        except Exception as e:
+            fail(doc, f"Failed to save extracted text: {str(e)}")
+            continue
+
+        minhash = minhashes.get(doc['doc_id']) or encode_signature(minhash_signature(full_text))
+        doc_metadata = {
+            "doc_id": doc['doc_id'],
+            "filename": PurePosixPath(doc['filename']).name,
+            "uploaded_at": doc['uploaded_at'],
+            "page_count": page_count,
+            "file_size": doc['file_size'],
+            "sha256": doc['sha256'],
+            "minhash": minhash
+        }
+        indexed.append((doc['doc_id'], full_text, doc_metadata))
+
+    # One metadata.json write for the whole batch (once, even if the job runs again)
+    if indexed:
+        with metadata_lock:
+            metadata = load_metadata()
+            listed = {doc['doc_id'] for doc in metadata['documents']}
+            hashes = metadata.setdefault('hashes', {})
+            for doc_id, _, doc_metadata in indexed:
+                if doc_id not in listed:
+                    metadata['documents'].append(doc_metadata)
+                    hashes.setdefault(doc_metadata['sha256'], doc_id)
+            save_metadata(metadata)
+
+        # One batched search index update
+        set_stage("indexing")
+        try:
+            search_service.add_document_batch(indexed)
+        except Exception as e:
+            # Non-critical error - documents are uploaded but search may not work immediately
+            print(f"Warning: Failed to update search index: {str(e)}")
+
+    return {"results": [results[doc['doc_id']] for doc in documents]}
+
+
+def ingest_job(job: dict, set_stage: Callable[[str], None]) -> Optional[dict]:
+    """Run an ingestion job: a bulk upload (documents) or a single upload"""
+    if 'documents' in job:
+        return ingest_bulk(job, set_stage)
+    return ingest_upload(job, set_stage)
+
+
+# Uploads are ingested by background workers (started on first use or at startup)
+ingestion_queue = IngestionQueue(ingest_job)
+
+
+def find_pending_upload(sha256: str) -> Optional[dict]:
+    """
+    Oldest document with this content hash that is still being ingested
+
+    Returns:
+        Its job payload (doc_id, filename, uploaded_at, ...) with the
+        job_id of the upload or bulk upload it belongs to, or None
+    """
+    for job in ingestion_queue.pending():
+        for doc in job.get('documents', [job]):
+            if doc.get('sha256') == sha256:
+                return {**doc, "job_id": job['job_id']}
+    return None
+
+
+def queue_full_error() -> HTTPException:
+    """503 telling the client to retry once the ingestion queue drained"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Ingestion queue is full, retry later",
+        headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER)}
+    )
+
+
+def bulk_limit_error(files_left: int, bytes_left: int) -> Optional[str]:
+    """Why one more file does not fit in a bulk upload (None if it does)"""
+    if files_left <= 0:
+        return f"Bulk upload exceeds the {settings.max_bulk_files} file limit"
+    if bytes_left <= 0:
+        return f"Bulk upload exceeds the {settings.max_bulk_upload_size} byte limit"
+    return None
+
+
+def unpack_archive(archive_path: Path, archive_name: str, files_left: int, bytes_left: int) -> List[dict]:
+    """
+    Stream the documents of a zip archive into temp files in upload_dir
+
+    Directories, hidden files and macOS resource forks are skipped. Every
+    other member is checked like a single upload (extension, magic bytes,
+    size, UTF-8) while it is decompressed chunk by chunk, so a zip bomb
+    stops at the size limit. Member names are only used as display names,
+    never as paths.
+
+    Args:
+        archive_path: Zip archive on disk
+        archive_name: Its upload filename
+        files_left: Files the bulk upload may still take
+        bytes_left: Bytes the bulk upload may still take
+
+    Returns:
+        Bulk entries, in archive order: {filename, file_ext, temp_path,
+        sha256, file_size} or {filename, error} for refused members
+
+    Raises:
+        HTTPException: 400 if the file is not a readable zip archive
+    """
+    try:
+        archive = zipfile.ZipFile(archive_path)
+    except zipfile.BadZipFile as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid zip archive: {str(e)}"
+        )
+
+    entries = []
+    with archive:
+        for info in archive.infolist():
+            name = PurePosixPath(info.filename)
+            if info.is_dir() or name.name.startswith('.') or '__MACOSX' in name.parts:
+                continue
+            filename = f"{archive_name}/{info.filename}"
+            file_ext = name.suffix.lower()
+
+            error = bulk_limit_error(files_left, bytes_left)
+            if file_ext not in ALLOWED_EXTENSIONS:
+                error = f"Only {', '.join(ALLOWED_EXTENSIONS)} files are supported"
+            if error is not None:
+                entries.append({"filename": filename, "error": error})
+                continue
+
+            upload = TempUpload(file_ext, min(settings.max_upload_size, bytes_left))
+            try:
+                with archive.open(info) as member:
+                    while chunk := member.read(UPLOAD_CHUNK_SIZE):
+                        upload.write(chunk)
+                temp_path, content_hash, file_size = upload.finish()
+            except HTTPException as e:
+                upload.discard()
+                entries.append({"filename": filename, "error": e.detail})
+                continue
+            except Exception as e:
+                # Corrupt (CRC), encrypted or unsupported compression
+                upload.discard()
+                entries.append({"filename": filename, "error": f"Failed to read archive member: {str(e)}"})
+                continue
+
+            entries.append({
+                "filename": filename,
+                "file_ext": file_ext,
+                "temp_path": temp_path,
+                "sha256": content_hash,
+                "file_size": file_size
+            })
+            files_left -= 1
+            bytes_left -= file_size
+    return entries
+
+
+def queue_bulk(entries: List[dict], on_duplicate: str) -> List[dict]:
+    """
+    Queue the files of a bulk upload as one ingestion job (see ingest_bulk())
+
+    Duplicates are resolved like /documents/upload, also against earlier
+    files of the same bulk upload; every other file is moved into place and
+    becomes a document of the job.
+
+    Args:
+        entries: Bulk entries from the route ({filename, file_ext,
+            temp_path, sha256, file_size} or {filename, error})
+        on_duplicate: Byte-identical files (of earlier uploads or of an
+            earlier file of the batch), as for /documents/upload
+
+    Returns:
+        One result per entry, in order: {filename, status, doc_id,
+        duplicate_of, job_id, error} with status "queued", "duplicate" or
+        "failed"
+    """
+    results = []
+    metadata = load_metadata()
+    documents: List[dict] = []
+    batch_docs: Dict[str, dict] = {}  # sha256 -> first document of the batch
+
+    for entry in entries:
+        if 'error' in entry:
+            results.append({"filename": entry['filename'], "status": "failed", "error": entry['error']})
+            continue
+
+        original_id, job_id = None, None
+        if on_duplicate != "keep":
+            original = find_by_hash(metadata, entry['sha256'])
+            pending = batch_docs.get(entry['sha256'])
+            if original is None and pending is None and on_duplicate == "return_existing":
+                pending = find_pending_upload(entry['sha256'])
+            if original is not None:
+                original_id = original['doc_id']
+            elif pending is not None:
+                original_id, job_id = pending['doc_id'], pending.get('job_id')
+            if original_id is not None and on_duplicate == "return_existing":
+                entry['temp_path'].unlink(missing_ok=True)
+                results.append({"filename": entry['filename'], "status": "duplicate",
+                                "doc_id": original_id, "duplicate_of": original_id, "job_id": job_id})
+                continue
+
+        doc_id = str(uuid.uuid4())
+        path = settings.upload_dir / f"{doc_id}{entry['file_ext']}"
+        try:
+            os.replace(entry['temp_path'], path)
+        except OSError as e:
+            entry['temp_path'].unlink(missing_ok=True)
+            results.append({"filename": entry['filename'], "status": "failed",
+                            "error": f"Failed to save file: {str(e)}"})
+            continue
+
+        doc = {
+            "doc_id": doc_id,
+            "filename": entry['filename'],
+            "file_ext": entry['file_ext'],
+            "sha256": entry['sha256'],
+            "file_size": entry['file_size'],
+            "uploaded_at": datetime.now().isoformat(),
+            # Copies of an earlier file of the batch share its extraction
+            "duplicate_of": original_id
+        }
+        documents.append(doc)
+        batch_docs.setdefault(entry['sha256'], doc)
+        results.append({"filename": entry['filename'], "status": "queued", "doc_id": doc_id,
+                        "duplicate_of": original_id})
+
+    if not documents:
+        return results
+
+    # Results pointing at a document of this batch (queued files and their duplicates)
+    batch_ids = set(doc['doc_id'] for doc in documents)
+    in_batch = [result for result in results if result.get('doc_id') in batch_ids]
+    try:
+        job = ingestion_queue.submit({"documents": documents})
+    except queue.Full:
+        for doc in documents:
+            (settings.upload_dir / f"{doc['doc_id']}{doc['file_ext']}").unlink(missing_ok=True)
+        for result in in_batch:
+            result.update(status="failed", doc_id=None, duplicate_of=None,
+                          error="Ingestion queue is full, retry later")
+        return results
+
+    for result in in_batch:
+        result['job_id'] = job['job_id']
+    return results
+
+
+@router.post("/documents/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_document(
+    response: Response,
+    file: UploadFile = File(...),
+    on_duplicate: Optional[Literal["return_existing", "reuse_extraction", "keep"]] = Query(
+        None, description="What to do with a byte-identical re-upload (default: settings.duplicate_uploads)"
+    )
+):
+    """
+    Upload a document (PDF or text); text extraction and indexing run in
+    the background
+
+    In the request:
+    1. Validate file type (.pdf, .txt, .md)
+    2. Stream the file to a temp file in uploads/ in chunks, checking its
+       size and magic bytes and computing its SHA-256 on the way, then
+       rename it into place
+    3. Queue an ingestion job and answer 202 with its job_id
+
+    On an ingestion worker (progress at GET /jobs/{job_id}):
+    4. Extract text (PDF: PyMuPDF, Text: direct read)
+    5. Save extracted text to the document store (extracted/); PDF pages
+       are streamed into it one at a time as they are extracted
+    6. Update metadata.json (document entry with its MinHash signature +
+       content hash -> doc_id map)
+    7. Add document to search index (incremental)
+
+    When the ingestion queue is full the upload is refused with 503 and a
+    Retry-After header.
+
+    If the same content was uploaded before, on_duplicate decides:
+    - return_existing: nothing is stored, the existing doc_id is returned
+      (200, or 202 with its job_id while that upload is still ingesting)
+    - reuse_extraction: a new document reusing the cached extracted text
+    - keep: a new document, extracted again
+    Duplicates never go through PyMuPDF unless on_duplicate is "keep".
+    """
+    # Validate file type
+    file_ext = Path(file.filename).suffix.lower()
+
+    if file_ext not in ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {', '.join(ALLOWED_EXTENSIONS)} files are supported"
+        )
+
+    # Reject oversized uploads before reading them when the size is known
+    if file.size is not None and file.size > settings.max_upload_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {settings.max_upload_size} byte upload limit"
+        )
+
+    # Backpressure: do not even read the upload if it cannot be queued
+    if ingestion_queue.full():
+        raise queue_full_error()
+
+    # Generate unique document ID
+    doc_id = str(uuid.uuid4())
+
+    # Stream the upload to a temp file, validating and hashing it on the way
+    uploaded_file_path = settings.upload_dir / f"{doc_id}{file_ext}"
+    try:
+        temp_path, content_hash, file_size = await stream_to_temp_file(file, file_ext)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
+
+    # Byte-identical re-upload
+    on_duplicate = on_duplicate or settings.duplicate_uploads
+    original = find_by_hash(load_metadata(), content_hash) if on_duplicate != "keep" else None
+    if original is not None and on_duplicate == "return_existing":
+        temp_path.unlink(missing_ok=True)
+        response.status_code = status.HTTP_200_OK
+        return DocumentUploadResponse(
+            doc_id=original['doc_id'],
+            filename=original['filename'],
+            status="duplicate",
+            uploaded_at=datetime.fromisoformat(original['uploaded_at']),
+            duplicate_of=original['doc_id']
+        )
+
+    pending = find_pending_upload(content_hash) if on_duplicate == "return_existing" else None
+    if pending is not None:
+        temp_path.unlink(missing_ok=True)
+        return DocumentUploadResponse(
+            doc_id=pending['doc_id'],
+            filename=pending['filename'],
+            status="duplicate",
+            uploaded_at=datetime.fromisoformat(pending['uploaded_at']),
+            duplicate_of=pending['doc_id'],
+            job_id=pending['job_id']
+        )
+
+    # Move the upload into place (atomic rename within upload_dir)
+    try:
+        if original is not None:
+            # Keep one copy of the bytes on disk (deleting either document keeps the other)
+            original_path = settings.upload_dir / f"{original['doc_id']}{Path(original['filename']).suffix.lower()}"
+            try:
+                os.link(original_path, uploaded_file_path)
+            except OSError:
+                os.replace(temp_path, uploaded_file_path)
+        else:
+            os.replace(temp_path, uploaded_file_path)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save file: {str(e)}"
+        )
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+    # Hand the slow stages to the ingestion workers
+    uploaded_at = datetime.now()
+    try:
+        job = ingestion_queue.submit({
+            "doc_id": doc_id,
+            "filename": file.filename,
+            "file_ext": file_ext,
+            "sha256": content_hash,
+            "file_size": file_size,
+            "uploaded_at": uploaded_at.isoformat(),
+            "duplicate_of": original['doc_id'] if original is not None else None
+        })
+    except queue.Full:
+        uploaded_file_path.unlink(missing_ok=True)
+        raise queue_full_error()
 
     return DocumentUploadResponse(
         doc_id=doc_id,
         filename=file.filename,
-        status="success",
-        uploaded_at=uploaded_at
+        status="queued",
+        uploaded_at=uploaded_at,
+        duplicate_of=original['doc_id'] if original is not None else None,
+        job_id=job['job_id']
+    )
+
+
+@router.post("/documents/bulk", response_model=BulkUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_upload_documents(
+    files: List[UploadFile] = File(...),
+    on_duplicate: Optional[Literal["return_existing", "reuse_extraction", "keep"]] = Query(
+        None, description="What to do with byte-identical files (default: settings.duplicate_uploads)"
     )
+):
+    """
+    Upload many documents (PDF, text, or zip archives of them) in one
+    request; text extraction and indexing run in the background
+
+    1. Stream every file (and every member of every .zip) to a temp file,
+       with the same checks as /documents/upload; at most
+       settings.max_bulk_files files and settings.max_bulk_upload_size bytes
+       after unzipping
+    2. Queue the files as one ingestion job and answer 202 with its
+       job_id (progress at GET /jobs/{job_id}, as for /documents/upload)
+
+    On an ingestion worker the batch is extracted in parallel, written to
+    metadata.json once and indexed as one update (see ingest_bulk()); the
+    job status then lists the outcome of every file.
+
+    The response is a per-file report; a file that fails does not fail the
+    others. When the queue is full the whole upload is refused with 503.
+    """
+    # Backpressure: do not even read the upload if nothing can be queued
+    if ingestion_queue.full():
+        raise queue_full_error()
+
+    on_duplicate = on_duplicate or settings.duplicate_uploads
+    entries: List[dict] = []
+    files_left, bytes_left = settings.max_bulk_files, settings.max_bulk_upload_size
+
+    try:
+        for file in files:
+            file_ext = Path(file.filename).suffix.lower()
+            if file_ext != '.zip' and file_ext not in ALLOWED_EXTENSIONS:
+                entries.append({
+                    "filename": file.filename,
+                    "error": f"Only {', '.join(ALLOWED_EXTENSIONS)} files and .zip archives are supported"
+                })
+                continue
+
+            try:
+                if file_ext == '.zip':
+                    archive_path, _, _ = await stream_to_temp_file(file, file_ext, settings.max_bulk_upload_size)
+                    try:
+                        staged = await run_in_threadpool(unpack_archive, archive_path, file.filename, files_left, bytes_left)
+                    finally:
+                        archive_path.unlink(missing_ok=True)
+                else:
+                    error = bulk_limit_error(files_left, bytes_left)
+                    if error is not None:
+                        entries.append({"filename": file.filename, "error": error})
+                        continue
+                    temp_path, content_hash, file_size = await stream_to_temp_file(
+                        file, file_ext, min(settings.max_upload_size, bytes_left)
+                    )
+                    staged = [{
+                        "filename": file.filename,
+                        "file_ext": file_ext,
+                        "temp_path": temp_path,
+                        "sha256": content_hash,
+                        "file_size": file_size
+                    }]
+            except HTTPException as e:
+                entries.append({"filename": file.filename, "error": e.detail})
+                continue
+
+            for entry in staged:
+                if 'temp_path' in entry:
+                    files_left -= 1
+                    bytes_left -= entry['file_size']
+            entries.extend(staged)
+
+        results = await run_in_threadpool(queue_bulk, entries, on_duplicate)
+    finally:
+        # Files that were not moved into place (errors, duplicates)
+        for entry in entries:
+            if 'temp_path' in entry:
+                entry['temp_path'].unlink(missing_ok=True)
+
+    counts = {state: sum(1 for result in results if result['status'] == state)
+              for state in ("queued", "duplicate", "failed")}
+    return BulkUploadResponse(
+        results=[BulkUploadResult(**result) for result in results],
+        total=len(results),
+        queued=counts["queued"],
+        duplicates=counts["duplicate"],
+        failed=counts["failed"]
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """
+    Progress of an ingestion job (status, current stage, error)
+
+    status goes queued -> processing -> done or failed; the document is
+    listed and searchable once the job is done.
+    """
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return JobStatus(**job)
 
 
 @router.get("/documents", response_model=DocumentListResponse)
@@ -199,6 +987,93 @@ async def get_document(doc_id: str):
     )
 
 
+@router.get("/documents/{doc_id}/pages", response_model=DocumentPagesResponse)
+async def get_document_pages(
+    doc_id: str,
+    first: int = Query(1, ge=1, description="First page (1-based)"),
+    last: Optional[int] = Query(None, ge=1, description="Last page, inclusive (default: first)")
+):
+    """
+    Extracted text of one page or a page range of a PDF document
+
+    Served from the page table of the document store: only the requested
+    pages are read and decoded, not the whole document.
+    """
+    last = first if last is None else last
+    if last < first:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="last must not be smaller than first"
+        )
+
+    try:
+        page_table = load_page_table(doc_id)
+        if page_table is None:
+            load_extracted_text(doc_id)  # 404 if the document is unknown
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Document {doc_id} has no pages (text document)"
+            )
+        page_count = len(page_table[0])
+        if first > page_count:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Document {doc_id} has {page_count} pages"
+            )
+        texts = load_extracted_pages(doc_id, first - 1, last)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {doc_id} not found"
+        )
+
+    return DocumentPagesResponse(
+        doc_id=doc_id,
+        page_count=page_count,
+        pages=[DocumentPage(page=first + i, text=text) for i, text in enumerate(texts)]
+    )
+
+
+@router.get("/documents/{doc_id}/near-duplicates", response_model=NearDuplicatesResponse)
+async def get_near_duplicates(
+    doc_id: str,
+    threshold: Optional[float] = Query(
+        None, ge=0.0, le=1.0,
+        description="Minimum estimated similarity (default: settings.near_duplicate_threshold)"
+    )
+):
+    """
+    Documents with nearly the same content (revisions, re-exports)
+
+    Looked up in the MinHash/LSH index: only documents sharing an LSH
+    bucket are compared, the similarity is the estimated Jaccard
+    similarity of their word shingles.
+    """
+    metadata = load_metadata()
+    documents = {doc['doc_id']: doc for doc in metadata.get('documents', [])}
+    if doc_id not in documents:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {doc_id} not found"
+        )
+
+    if threshold is None:
+        threshold = settings.near_duplicate_threshold
+    similar = search_service.near_duplicates.near_duplicates(doc_id, threshold)
+    return NearDuplicatesResponse(
+        doc_id=doc_id,
+        threshold=threshold,
+        near_duplicates=[
+            NearDuplicate(
+                doc_id=other,
+                filename=documents.get(other, {}).get('filename', 'Unknown'),
+                similarity=round(similarity, 4)
+            )
+            for other, similarity in similar
+        ]
+    )
+
+
 @router.get("/documents/{doc_id}/download")
 async def download_document(doc_id: str):
     """
@@ -252,41 +1127,41 @@ async def delete_document(doc_id: str):
     """
     Delete a document and its associated files
     """
-    metadata = load_metadata()
-    documents = metadata.get('documents', [])
-
-    # Find and remove document from metadata
-    doc_found = None
-    for i, doc in enumerate(documents):
-        if doc['doc_id'] == doc_id:
-            doc_found = documents.pop(i)
-            break
+    with metadata_lock:
+        metadata = load_metadata()
+        documents = metadata.get('documents', [])
 
-    if not doc_found:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Document with ID {doc_id} not found"
-        )
+        # Find and remove document from metadata
+        doc_found = None
+        for i, doc in enumerate(documents):
+            if doc['doc_id'] == doc_id:
+                doc_found = documents.pop(i)
+                break
 
-    # Determine file extension from original filename
-    file_ext = Path(doc_found['filename']).suffix.lower()
+        if not doc_found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Document with ID {doc_id} not found"
+            )
 
-    # Delete physical files
-    uploaded_file_path = settings.upload_dir / f"{doc_id}{file_ext}"
-    text_path = settings.extracted_dir / f"{doc_id}.txt"
+        # Determine file extension from original filename
+        file_ext = Path(doc_found['filename']).suffix.lower()
 
-    uploaded_file_path.unlink(missing_ok=True)
-    text_path.unlink(missing_ok=True)
+        # Delete physical files
+        uploaded_file_path = settings.upload_dir / f"{doc_id}{file_ext}"
+        uploaded_file_path.unlink(missing_ok=True)
+        delete_extracted_text(doc_id)
 
-    # Save updated metadata
-    metadata['documents'] = documents
-    save_metadata(metadata)
+        # Save updated metadata
+        metadata['documents'] = documents
+        forget_hash(metadata, doc_found)
+        save_metadata(metadata)
 
-    # Rebuild search index
+    # Remove document from search index (tombstone, no full rebuild)
     try:
-        search_service.rebuild_index()
+        search_service.remove_document(doc_id)
     except Exception as e:
-        print(f"Warning: Failed to rebuild search index after deletion: {str(e)}")
+        print(f"Warning: Failed to update search index after deletion: {str(e)}")
 
     return JSONResponse(
         content={
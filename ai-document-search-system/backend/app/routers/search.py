@@ -7,10 +7,13 @@ import json
 from typing import List
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 
 from app.config import settings
-from app.models.schemas import SearchRequest, SearchResponse, SearchResult
+from app.models.schemas import (
+    SearchRequest, SearchResponse, SearchResult, Highlight,
+    BatchSearchRequest, BatchSearchResponse, Suggestion, SuggestResponse
+)
 from app.services.search_service import search_service
 
 router = APIRouter()
@@ -25,6 +28,33 @@ def load_metadata() -> dict:
         return json.load(f)
 
 
+def build_search_response(query: str, results: List[dict], doc_metadata_map: dict) -> SearchResponse:
+    """Enrich raw search results with filenames"""
+    search_results = []
+    for result in results:
+        doc_id = result['doc_id']
+        doc_meta = doc_metadata_map.get(doc_id, {})
+
+        search_results.append(SearchResult(
+            doc_id=doc_id,
+            filename=doc_meta.get('filename', 'Unknown'),
+            score=result['score'],
+            snippet=result['snippet'],
+            page=result.get('page'),
+            highlights=[
+                Highlight(start=start, end=end)
+                for start, end in result.get('highlights', [])
+            ],
+            duplicates=result.get('duplicates', [])
+        ))
+
+    return SearchResponse(
+        query=query,
+        results=search_results,
+        total_found=len(search_results)
+    )
+
+
 @router.post("/search", response_model=SearchResponse)
 async def search_documents(request: SearchRequest):
     """
@@ -48,11 +78,20 @@ async def search_documents(request: SearchRequest):
             detail="Search query cannot be empty"
         )
 
-    # Perform TF-IDF search (classical method)
+    # Perform classical search (TF-IDF / BM25 / LSA, no AI)
+    timings = {}
     try:
         results = search_service.search(
             query=request.query,
-            top_k=request.top_k
+            top_k=request.top_k,
+            doc_ids=request.doc_ids,
+            timings=timings,
+            collapse=request.collapse_duplicates
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid query: {str(e)}"
         )
     except Exception as e:
         raise HTTPException(
@@ -67,26 +106,111 @@ async def search_documents(request: SearchRequest):
     }
 
     # Enrich results with filenames
-    search_results = []
-    for result in results:
-        doc_id = result['doc_id']
-        doc_meta = doc_metadata_map.get(doc_id, {})
+    response = build_search_response(request.query, results, doc_metadata_map)
+    response.timings_ms = {stage: round(ms, 3) for stage, ms in timings.items()}
+    return response
 
-        search_results.append(SearchResult(
-            doc_id=doc_id,
-            filename=doc_meta.get('filename', 'Unknown'),
-            score=result['score'],
-            snippet=result['snippet']
-        ))
 
-    return SearchResponse(
-        query=request.query,
-        results=search_results,
-        total_found=len(search_results)
+@router.post("/search/batch", response_model=BatchSearchResponse)
+async def search_documents_batch(request: BatchSearchRequest):
+    """
+    Run many searches in one call (classical TF-IDF, NO AI)
+
+    All queries are vectorized together and scored with a single sparse
+    matrix product; metadata is loaded once for the whole batch.
+
+    Args:
+        request: BatchSearchRequest with a list of SearchRequests
+
+    Returns:
+        BatchSearchResponse with one SearchResponse per query, in order
+    """
+    if len(request.queries) > settings.max_batch_queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many queries (max {settings.max_batch_queries})"
+        )
+
+    for i, query in enumerate(request.queries):
+        if not query.query.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Search query {i} cannot be empty"
+            )
+
+    try:
+        batch_results = search_service.search_many(
+            queries=[q.query for q in request.queries],
+            top_k=[q.top_k for q in request.queries],
+            doc_ids=[q.doc_ids for q in request.queries],
+            collapse=[q.collapse_duplicates for q in request.queries]
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid query: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch search failed: {str(e)}"
+        )
+
+    metadata = load_metadata()
+    doc_metadata_map = {
+        doc['doc_id']: doc for doc in metadata.get('documents', [])
+    }
+
+    return BatchSearchResponse(
+        results=[
+            build_search_response(q.query, results, doc_metadata_map)
+            for q, results in zip(request.queries, batch_results)
+        ],
+        total_queries=len(request.queries)
+    )
+
+
+@router.get("/search/suggest", response_model=SuggestResponse)
+async def suggest_terms(
+    prefix: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions")
+):
+    """
+    Search-as-you-type term suggestions (NO AI)
+
+    Completes the last word of the prefix from the indexed vocabulary with
+    a binary search over the sorted terms, most frequent terms first.
+    Turkish characters are folded like in the index ("çalış" -> "calis").
+    """
+    return SuggestResponse(
+        prefix=prefix,
+        suggestions=[Suggestion(**item) for item in search_service.suggest(prefix, limit)]
     )
 
 
-@router.post("/search/rebuild-index", status_code=status.HTTP_200_OK)
+@router.get("/search/cache-stats")
+async def get_cache_stats():
+    """
+    Query result cache counters
+
+    Hit/miss/eviction counts and the current index generation, used to
+    size QUERY_CACHE_SIZE / QUERY_CACHE_TTL.
+    """
+    return search_service.cache_stats()
+
+
+@router.get("/search/pipeline-stats")
+async def get_pipeline_stats():
+    """
+    Retrieval pipeline configuration and stage timings
+
+    Active engines, fusion strategy and per-stage call count, mean and max
+    milliseconds over all /search queries since startup.
+    """
+    return search_service.pipeline_stats()
+
+
+@router.post("/search/rebuild-index", status_code=status.HTTP_202_ACCEPTED)
 async def rebuild_search_index():
     """
     Manually trigger search index rebuild
@@ -95,15 +219,16 @@ async def rebuild_search_index():
     - Recovering from index corruption
     - Forcing re-indexing after bulk document changes
     - Testing purposes
+
+    The new index is built in a background thread and swapped in at once;
+    searches keep being served from the current index meanwhile.
     """
-    try:
-        search_service.rebuild_index()
-        return {
-            "status": "success",
-            "message": "Search index rebuilt successfully"
-        }
-    except Exception as e:
+    if not search_service.rebuild_index(wait=False):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to rebuild search index: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A search index rebuild is already running"
         )
+    return {
+        "status": "accepted",
+        "message": "Search index rebuild started"
+    }
@@ -0,0 +1,500 @@
+"""
+[Human-written] Document Text Store
+Extracted texts packed into one append-only file, read through mmap (no AI)
+
+Layout (in settings.extracted_dir):
+- texts-<n>.bin: UTF-8 texts, appended back to back
+- texts.idx: offset table, one JSON record per line. The first line names
+  the current data file, the rest are [doc_id, offset, length] records
+  (length -1 marks a deletion). Later records win. Documents with pages
+  (PDFs) have two more fields, the byte and character offset of every page
+  start within the text, so single pages can be read (and character
+  offsets mapped to page numbers) without decoding the whole document.
+
+Texts are served as zero-copy memoryview slices of the mapping; a small
+LRU keeps the decoded text of hot documents, so resident memory does not
+grow with the corpus and repeated requests do not re-read files.
+"""
+
+import json
+import mmap
+from bisect import bisect_right
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+STORE_FORMAT_VERSION = 1
+INDEX_FILE = "texts.idx"
+
+# Joins the page texts of a document (stripped again when reading a page)
+PAGE_SEPARATOR = "\n\n"
+
+# Byte and character offsets of the page starts of a document
+PageTable = Tuple[List[int], List[int]]
+
+# Rewrite the data file once deleted texts take more space than live ones
+COMPACTION_MIN_DEAD_BYTES = 1 << 20
+
+
+class DocumentStore:
+    """
+    Append-only, memory-mapped store of extracted document texts
+
+    - put() appends the text and then its offset record (fsynced in that
+      order, so a crash never leaves a record pointing at missing bytes)
+    - put_pages() does the same for pages produced one at a time, without
+      holding the lock while they are produced
+    - delete() appends a deletion record; space is reclaimed by compact()
+    - Legacy <doc_id>.txt files from older versions are imported on first read
+    """
+
+    def __init__(self, root: Optional[Path] = None, cache_size: Optional[int] = None):
+        """
+        Args:
+            root: Store directory (default: settings.extracted_dir, resolved on first use)
+            cache_size: Decoded documents kept in the LRU (default: settings.document_cache_size)
+        """
+        self._root = root
+        self.cache_size = settings.document_cache_size if cache_size is None else cache_size
+
+        self._lock = threading.RLock()
+        self._appended = threading.Condition(self._lock)
+        self._appending = False  # a put_pages() is writing past _data_size
+        self._opened = False
+        self._data_name = ""
+        self._offsets: Dict[str, Tuple[int, int]] = {}  # doc_id -> (offset, length)
+        self._pages: Dict[str, PageTable] = {}  # doc_id -> page starts (documents with pages)
+        self._data_size = 0
+        self._dead_bytes = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    @property
+    def root(self) -> Path:
+        return self._root if self._root is not None else settings.extracted_dir
+
+    @property
+    def data_path(self) -> Path:
+        """Path of the current data file"""
+        with self._lock:
+            self._open()
+            return self.root / self._data_name
+
+    # ============ Opening ============
+
+    def _open(self) -> None:
+        """Replay the offset table (once, caller holds the lock)"""
+        if self._opened:
+            return
+
+        self._data_name = "texts-0.bin"
+        index_path = self.root / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, 'r', encoding='utf-8') as f:
+                header = f.readline()
+                try:
+                    header = json.loads(header)
+                    if header.get("version") == STORE_FORMAT_VERSION:
+                        self._data_name = header["data"]
+                        self._replay(f)
+                except (ValueError, KeyError, AttributeError):
+                    # Unreadable table - start over with an empty store
+                    self._offsets = {}
+                    self._pages = {}
+
+        data_path = self.root / self._data_name
+        self._data_size = data_path.stat().st_size if data_path.exists() else 0
+
+        # Drop records written without their data (torn write)
+        for doc_id, (offset, length) in list(self._offsets.items()):
+            if offset + length > self._data_size:
+                del self._offsets[doc_id]
+                self._pages.pop(doc_id, None)
+
+        self._opened = True
+
+    def _replay(self, lines) -> None:
+        """Apply the records of the offset table in order"""
+        for line in lines:
+            try:
+                record = json.loads(line)
+                doc_id, offset, length = record[:3]
+            except ValueError:
+                # Partially written last record
+                continue
+
+            previous = self._offsets.pop(doc_id, None)
+            self._pages.pop(doc_id, None)
+            if previous is not None:
+                self._dead_bytes += previous[1]
+            if length >= 0:
+                self._offsets[doc_id] = (offset, length)
+                if len(record) == 5:
+                    self._pages[doc_id] = (record[3], record[4])
+
+    def _ensure_mapped(self, end: int) -> mmap.mmap:
+        """Map the data file, re-mapping once it grew past the current mapping"""
+        if self._mmap is None or len(self._mmap) < end:
+            with open(self.root / self._data_name, 'rb') as f:
+                # The old mapping may still back slices handed out to readers;
+                # it is released once those are garbage collected
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    # ============ Reads ============
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            self._open()
+            return doc_id in self._offsets
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return len(self._offsets)
+
+    def doc_ids(self) -> List[str]:
+        """IDs of all stored documents"""
+        with self._lock:
+            self._open()
+            return list(self._offsets)
+
+    def get_bytes(self, doc_id: str) -> memoryview:
+        """
+        UTF-8 bytes of a document as a zero-copy slice of the mapping
+
+        Raises:
+            FileNotFoundError: If the document is not stored
+        """
+        with self._lock:
+            offset, length = self._locate(doc_id)
+            if length == 0:
+                return memoryview(b"")
+            return memoryview(self._ensure_mapped(offset + length))[offset:offset + length]
+
+    def get(self, doc_id: str) -> str:
+        """
+        Decoded text of a document (served from the LRU when hot)
+
+        Raises:
+            FileNotFoundError: If the document is not stored
+        """
+        with self._lock:
+            text = self._cache.get(doc_id)
+            if text is not None:
+                self._cache.move_to_end(doc_id)
+                return text
+
+            # Decode straight from the mapped buffer (no intermediate bytes copy)
+            text = str(self.get_bytes(doc_id), 'utf-8')
+            self._remember(doc_id, text)
+            return text
+
+    def page_count(self, doc_id: str) -> Optional[int]:
+        """
+        Number of pages of a document (None if it was stored without pages)
+
+        Raises:
+            FileNotFoundError: If the document is not stored
+        """
+        with self._lock:
+            self._locate(doc_id)
+            pages = self._pages.get(doc_id)
+            return len(pages[0]) if pages is not None else None
+
+    def get_pages(self, doc_id: str, start: int, end: int) -> List[str]:
+        """
+        Texts of pages [start, end) of a document
+
+        Only the bytes of those pages are decoded (sliced from the decoded
+        text instead when it is in the LRU).
+
+        Args:
+            doc_id: Document ID
+            start: First page (0-based)
+            end: Page after the last one (clipped to the page count)
+
+        Returns:
+            List of page texts
+
+        Raises:
+            FileNotFoundError: If the document is not stored
+            ValueError: If the document was stored without pages
+        """
+        with self._lock:
+            self._locate(doc_id)
+            pages = self._pages.get(doc_id)
+            if pages is None:
+                raise ValueError(f"Document {doc_id} has no page table")
+
+            byte_starts, char_starts = pages
+            end = min(end, len(byte_starts))
+            cached = self._cache.get(doc_id)
+            data = self.get_bytes(doc_id) if cached is None else None
+            texts = []
+            for page in range(max(0, start), end):
+                last = page + 1 == len(byte_starts)
+                if cached is not None:
+                    text = cached[char_starts[page]:len(cached) if last else char_starts[page + 1]]
+                else:
+                    text = str(data[byte_starts[page]:len(data) if last else byte_starts[page + 1]], 'utf-8')
+                if not last and text.endswith(PAGE_SEPARATOR):
+                    text = text[:-len(PAGE_SEPARATOR)]
+                texts.append(text)
+            return texts
+
+    def page_at(self, doc_id: str, char_offset: int) -> Optional[int]:
+        """
+        Page (0-based) holding a character offset of the document text
+
+        Returns:
+            Page index, or None if the document is not stored or has no pages
+        """
+        with self._lock:
+            self._open()
+            pages = self._pages.get(doc_id)
+            if pages is None or not pages[1]:
+                return None
+            return max(0, bisect_right(pages[1], char_offset) - 1)
+
+    def page_table(self, doc_id: str) -> Optional[PageTable]:
+        """Page starts of a document (None if it was stored without pages)"""
+        with self._lock:
+            self._open()
+            return self._pages.get(doc_id)
+
+    def _locate(self, doc_id: str) -> Tuple[int, int]:
+        """(offset, length) of a document, importing a legacy file (caller holds the lock)"""
+        self._open()
+        location = self._offsets.get(doc_id)
+        if location is None:
+            self._import_legacy(doc_id)
+            location = self._offsets[doc_id]
+        return location
+
+    def _remember(self, doc_id: str, text: str) -> None:
+        """Put a decoded text into the LRU (caller holds the lock)"""
+        if self.cache_size <= 0:
+            return
+        self._cache[doc_id] = text
+        self._cache.move_to_end(doc_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _import_legacy(self, doc_id: str) -> None:
+        """Move a pre-store <doc_id>.txt file into the store (caller holds the lock)"""
+        legacy_path = self.root / f"{doc_id}.txt"
+        if not legacy_path.exists():
+            raise FileNotFoundError(f"Extracted text not found for document {doc_id}")
+
+        with open(legacy_path, 'r', encoding='utf-8') as f:
+            self.put(doc_id, f.read())
+        legacy_path.unlink(missing_ok=True)
+
+    # ============ Writes ============
+
+    def put(self, doc_id: str, text: str, pages: Optional[PageTable] = None) -> None:
+        """
+        Append (or replace) the text of a document
+
+        Args:
+            doc_id: Document ID
+            text: Extracted text
+            pages: Byte and character offsets of the page starts in the text
+                (see pdf_service.join_pages), None for documents without pages
+        """
+        data = text.encode('utf-8')
+
+        with self._lock:
+            self._open()
+            self._wait_for_appender()
+            self.root.mkdir(parents=True, exist_ok=True)
+
+            offset = self._data_size
+            with open(self.root / self._data_name, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._publish(doc_id, offset, len(data), pages)
+            self._remember(doc_id, text)
+
+    def put_pages(self, doc_id: str, pages: Iterable[str]) -> PageTable:
+        """
+        Append (or replace) the text of a document page by page
+
+        Each page is written as soon as it is produced, so the write holds
+        one page at a time whatever the document size. The stored text and
+        page table are the same as put(doc_id, *pdf_service.join_pages(pages));
+        pages must be stripped (as clean_text() does).
+
+        The lock is not held while pages are produced: reads go on, other
+        writers wait until the document is complete.
+
+        Args:
+            doc_id: Document ID
+            pages: Page texts, in order
+
+        Returns:
+            Byte and character offsets of the page starts in the text
+
+        Raises:
+            Exception: Whatever producing or writing a page raised (the
+                partial text is truncated away, nothing is recorded)
+        """
+        with self._lock:
+            self._open()
+            self._wait_for_appender()
+            self._appending = True
+            self.root.mkdir(parents=True, exist_ok=True)
+            offset = self._data_size
+            data_path = self.root / self._data_name
+
+        separator = PAGE_SEPARATOR.encode('utf-8')
+        byte_starts, char_starts = [], []
+        size = chars = 0
+        owed = 0  # separators to write before the next non-empty page
+        try:
+            with open(data_path, 'ab') as f:
+                try:
+                    for page in pages:
+                        if size:
+                            owed += 1
+                        byte_starts.append(size + owed * len(separator))
+                        char_starts.append(chars + owed * len(PAGE_SEPARATOR))
+                        if page:
+                            data = page.encode('utf-8')
+                            f.write(separator * owed + data)
+                            size += owed * len(separator) + len(data)
+                            chars += owed * len(PAGE_SEPARATOR) + len(page)
+                            owed = 0
+                    f.flush()
+                    os.fsync(f.fileno())
+                except BaseException:
+                    f.flush()
+                    os.ftruncate(f.fileno(), offset)
+                    raise
+
+            # Empty pages at the end start where the text ends
+            page_table = ([min(start, size) for start in byte_starts],
+                          [min(start, chars) for start in char_starts])
+            with self._lock:
+                self._publish(doc_id, offset, size, page_table)
+                self._cache.pop(doc_id, None)
+            return page_table
+        finally:
+            with self._lock:
+                self._appending = False
+                self._appended.notify_all()
+
+    def _wait_for_appender(self) -> None:
+        """Wait until no put_pages() is writing (caller holds the lock)"""
+        while self._appending:
+            self._appended.wait()
+
+    def _publish(self, doc_id: str, offset: int, length: int, pages: Optional[PageTable]) -> None:
+        """Record a text written at offset (caller holds the lock)"""
+        self._data_size = offset + length
+        self._append_records([self._record(doc_id, offset, length, pages)])
+
+        previous = self._offsets.get(doc_id)
+        if previous is not None:
+            self._dead_bytes += previous[1]
+        self._offsets[doc_id] = (offset, length)
+        if pages is not None:
+            self._pages[doc_id] = (list(pages[0]), list(pages[1]))
+        else:
+            self._pages.pop(doc_id, None)
+
+    def delete(self, doc_id: str) -> bool:
+        """
+        Delete the text of a document
+
+        Returns:
+            True if the document was stored, False otherwise
+        """
+        with self._lock:
+            self._open()
+            location = self._offsets.pop(doc_id, None)
+            self._pages.pop(doc_id, None)
+            self._cache.pop(doc_id, None)
+            if location is None:
+                return False
+
+            self._append_records([[doc_id, location[0], -1]])
+            self._dead_bytes += location[1]
+
+            live_bytes = self._data_size - self._dead_bytes
+            if self._dead_bytes > max(live_bytes, COMPACTION_MIN_DEAD_BYTES):
+                self.compact()
+            return True
+
+    @staticmethod
+    def _record(doc_id: str, offset: int, length: int, pages: Optional[PageTable]) -> list:
+        """Offset table record of a document (with its page starts if any)"""
+        if pages is None:
+            return [doc_id, offset, length]
+        return [doc_id, offset, length, list(pages[0]), list(pages[1])]
+
+    def _append_records(self, records: List[list]) -> None:
+        """Append offset records, writing the header first for a new table"""
+        index_path = self.root / INDEX_FILE
+        new_table = not index_path.exists()
+
+        with open(index_path, 'a', encoding='utf-8') as f:
+            if new_table:
+                f.write(json.dumps({"version": STORE_FORMAT_VERSION, "data": self._data_name}) + "\n")
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def compact(self) -> None:
+        """
+        Rewrite live texts into a new data file and drop deleted ones
+
+        The new data file and offset table are fully written before the table
+        is atomically replaced, so readers of the old table never see a
+        half-written store.
+        """
+        with self._lock:
+            self._open()
+            self._wait_for_appender()
+            generation = int(self._data_name.split('-')[1].split('.')[0]) + 1
+            new_name = f"texts-{generation}.bin"
+
+            new_offsets = {}
+            offset = 0
+            with open(self.root / new_name, 'wb') as f:
+                for doc_id in self._offsets:
+                    data = self.get_bytes(doc_id)
+                    f.write(data)
+                    new_offsets[doc_id] = (offset, len(data))
+                    offset += len(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            index_tmp = self.root / (INDEX_FILE + ".tmp")
+            with open(index_tmp, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({"version": STORE_FORMAT_VERSION, "data": new_name}) + "\n")
+                for doc_id, (doc_offset, length) in new_offsets.items():
+                    record = self._record(doc_id, doc_offset, length, self._pages.get(doc_id))
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(index_tmp, self.root / INDEX_FILE)
+
+            old_path = self.root / self._data_name
+            self._data_name = new_name
+            self._offsets = new_offsets
+            self._data_size = offset
+            self._dead_bytes = 0
+            self._mmap = None
+            old_path.unlink(missing_ok=True)
+
+
+# Global document store instance
+document_store = DocumentStore()
@@ -0,0 +1,267 @@
+"""
+[Human-written] Background Ingestion Queue
+In-process job queue for uploads - NO AI, plain threads and a JSON journal
+
+An upload request only streams the file into upload_dir and submits a job;
+worker threads run the slow stages (text extraction, persistence,
+indexing) and the client polls the job status.
+
+- The queue is bounded: submit() fails fast when it is full, so the
+  route can answer 503 instead of accepting unbounded work (backpressure)
+- Unfinished (queued/processing) jobs are written to settings.jobs_file
+  when they are submitted and when they finish, so jobs that were queued
+  or running when the process stopped are run again by start() (stages
+  must therefore be idempotent). Stage changes are not written: a
+  recovered job starts over anyway. Finished jobs are kept in memory only.
+"""
+
+import json
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from app.config import settings
+
+# Stages a job goes through, with the progress reported once it is reached
+JOB_STAGES = {
+    "queued": 0.0,
+    "extracting": 0.25,
+    "storing": 0.5,
+    "indexing": 0.75,
+    "done": 1.0,
+}
+
+# Finished (done/failed) jobs kept for status polling
+JOB_HISTORY = 1000
+
+# Seconds an idle worker waits for a job before checking for shutdown
+WORKER_POLL_INTERVAL = 0.5
+
+# handler(job, set_stage): runs every stage of a job, raises on failure;
+# may return fields to record on the finished job
+JobHandler = Callable[[Dict, Callable[[str], None]], Optional[Dict]]
+
+
+class IngestionQueue:
+    """
+    Bounded job queue served by a pool of worker threads
+
+    Jobs are plain dicts (JSON-serializable payload from the caller plus
+    job_id, status, stage, progress, error, created_at and updated_at).
+    status is "queued", "processing", "done" or "failed".
+    """
+
+    def __init__(self, handler: JobHandler, max_size: Optional[int] = None):
+        """
+        Args:
+            handler: Runs the stages of one job (called on a worker thread)
+            max_size: Queued jobs accepted before submit() refuses more
+                (default: settings.ingestion_queue_size)
+        """
+        self.handler = handler
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_size or settings.ingestion_queue_size)
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.RLock()  # guards _jobs and the journal file
+        self._workers: List[threading.Thread] = []
+        self._recovery: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    # ============ Submitting ============
+
+    def full(self) -> bool:
+        """True if a submit() would be refused right now"""
+        return self._queue.full()
+
+    def submit(self, payload: Dict) -> Dict:
+        """
+        Queue a new job
+
+        Args:
+            payload: JSON-serializable job data for the handler
+
+        Returns:
+            Copy of the created job
+
+        Raises:
+            queue.Full: If the queue is at capacity (nothing is recorded)
+        """
+        now = datetime.now().isoformat()
+        job = {
+            **payload,
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "stage": "queued",
+            "progress": JOB_STAGES["queued"],
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            self._queue.put_nowait(job)
+            self._jobs[job["job_id"]] = job
+            self._save()
+        self._ensure_workers()
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Copy of a job (None if unknown)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def pending(self) -> List[Dict]:
+        """Copies of the queued/processing jobs, oldest first"""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if job["status"] in ("queued", "processing")]
+
+    def find_pending(self, **fields) -> Optional[Dict]:
+        """Copy of the oldest queued/processing job whose payload has these field values"""
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] in ("queued", "processing") and \
+                        all(job.get(key) == value for key, value in fields.items()):
+                    return dict(job)
+        return None
+
+    def stats(self) -> Dict:
+        """Queue depth, capacity, workers and job counts per status"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "workers": len(self._workers),
+            "jobs": counts,
+        }
+
+    # ============ Lifecycle ============
+
+    def start(self) -> int:
+        """
+        Start the workers and queue again the jobs left unfinished by the
+        previous process
+
+        Returns:
+            Number of recovered jobs
+        """
+        with self._lock:
+            recovered = {job_id: job for job_id, job in self._load().items() if job_id not in self._jobs}
+            self._jobs.update(recovered)
+            pending = [job for job in recovered.values() if job["status"] in ("queued", "processing")]
+            for job in pending:
+                job.update(status="queued", stage="queued", progress=JOB_STAGES["queued"])
+            self._save()
+
+        self._ensure_workers()
+        pending.sort(key=lambda j: j["created_at"])
+        for i, job in enumerate(pending):
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                # More recovered jobs than queue slots: feed the rest from a
+                # thread so the application startup does not wait for them
+                self._recovery = threading.Thread(
+                    target=self._requeue, args=(pending[i:],), name="ingestion-recovery", daemon=True
+                )
+                self._recovery.start()
+                break
+        return len(pending)
+
+    def _requeue(self, jobs: List[Dict]) -> None:
+        """Queue recovered jobs, waiting for free slots (recovery thread)"""
+        for job in jobs:
+            self._queue.put(job)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the workers after their current job
+
+        Jobs still queued stay in the journal and are recovered by start().
+        """
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+        self._stopping.clear()
+
+    def join(self) -> None:
+        """Wait until every queued (and recovered) job has finished"""
+        if self._recovery is not None:
+            self._recovery.join()
+        self._queue.join()
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for i in range(len(self._workers), max(1, settings.ingestion_workers)):
+                worker = threading.Thread(target=self._work, name=f"ingestion-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    # ============ Workers ============
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self._queue.get(timeout=WORKER_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Dict) -> None:
+        """Run the handler on one job and record the outcome"""
+        job_id = job["job_id"]
+        self._update(job_id, status="processing")
+        try:
+            outcome = self.handler(dict(job), lambda stage: self._update(
+                job_id, stage=stage, progress=JOB_STAGES.get(stage, 0.0)
+            ))
+        except Exception as e:
+            self._update(job_id, status="failed", error=str(e))
+            print(f"[WARNING] Ingestion job {job_id} failed: {str(e)}")
+        else:
+            self._update(job_id, **(outcome or {}), status="done", stage="done", progress=JOB_STAGES["done"])
+
+    def _update(self, job_id: str, **changes) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes, updated_at=datetime.now().isoformat())
+            if job["status"] in ("done", "failed"):
+                # The job left the unfinished set the journal holds
+                self._prune()
+                self._save()
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond JOB_HISTORY (caller holds the lock)"""
+        finished = [job for job in self._jobs.values() if job["status"] in ("done", "failed")]
+        if len(finished) > JOB_HISTORY:
+            finished.sort(key=lambda job: job["updated_at"])
+            for job in finished[:len(finished) - JOB_HISTORY]:
+                del self._jobs[job["job_id"]]
+
+    # ============ Journal ============
+
+    def _load(self) -> Dict[str, Dict]:
+        """Jobs from the journal file (empty if missing or unreadable)"""
+        try:
+            with open(settings.jobs_file, 'r', encoding='utf-8') as f:
+                return {job["job_id"]: job for job in json.load(f).get("jobs", [])}
+        except (FileNotFoundError, ValueError, KeyError):
+            return {}
+
+    def _save(self) -> None:
+        """Write the unfinished jobs to the journal (temp file + rename, caller holds the lock)"""
+        unfinished = [job for job in self._jobs.values() if job["status"] in ("queued", "processing")]
+        settings.jobs_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = settings.jobs_file.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({"jobs": unfinished}, f, indent=2, default=str)
+        os.replace(temp_file, settings.jobs_file)
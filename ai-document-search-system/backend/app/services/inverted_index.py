@@ -0,0 +1,1042 @@
+"""
+[Human-written] Inverted Index with BM25 Ranking
+Term -> postings list (row ids + term frequencies + positions) - NO AI, purely statistical method
+
+Unlike the TF-IDF matrix there is no vocabulary cap: every term gets a
+postings list. A query only touches the postings of its own terms, so its
+cost follows the posting-list lengths instead of corpus size x vocabulary.
+Top-k queries use MaxScore dynamic pruning on top of that.
+
+Every posting also records where the term occurs in the document (word
+positions and character offsets), so snippets and highlights are built by
+position lookup instead of re-scanning document texts.
+
+Boolean filters (AND/OR/NOT, phrases, NEAR, filename/upload date fields)
+are evaluated on the sorted posting rows before anything is ranked.
+"""
+
+import copy
+import itertools
+import json
+import math
+import os
+import threading
+from datetime import datetime
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.query_parser import (
+    And, FilenameFilter, Near, Node, Not, Or, ParsedQuery, Phrase, Term, UploadedFilter, fold
+)
+from app.utils.ranking_utils import top_k_indices
+from app.utils.text_utils import tokenize, tokenize_with_positions
+
+# On-disk index artifact (bump the version when the layout changes)
+INVERTED_INDEX_FORMAT_VERSION = 4
+
+# Unique vocabulary versions across all InvertedIndex instances
+_vocabulary_ids = itertools.count(1)
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """Return array with room for at least size items (doubling capacity)"""
+    if size <= len(array):
+        return array
+    return np.resize(array, max(size, 2, len(array) * 2))
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Intersection of two sorted row arrays without a full merge
+
+    Each row of the shorter list is looked up in the longer one with a
+    binary search (the vectorized form of following skip pointers), so the
+    cost is O(m log n) for lists of length m <= n instead of O(m + n).
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    pos = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[pos] == a]
+
+
+def _field_values(fields: Optional[Dict]) -> Tuple[str, float]:
+    """(folded filename, upload timestamp or NaN) of a document's metadata"""
+    fields = fields or {}
+    uploaded = fields.get('uploaded_at')
+    if isinstance(uploaded, str):
+        try:
+            uploaded = datetime.fromisoformat(uploaded)
+        except ValueError:
+            uploaded = None
+    timestamp = uploaded.timestamp() if isinstance(uploaded, datetime) else math.nan
+    return fold(fields.get('filename') or ''), timestamp
+
+
+class _Postings:
+    """
+    Growable positional postings list of one term
+
+    Rows and term frequencies live in numpy arrays with spare capacity
+    (doubling on overflow), so appends are amortized O(1) and readers get
+    zero-copy, sorted views. The occurrences of posting i (word position,
+    char start, char end) are positions/starts/ends[ptr[i]:ptr[i + 1]].
+
+    owner is the InvertedIndex version allowed to append (see
+    InvertedIndex.fork()); term_id is the term's slot in the index's
+    document frequency array.
+    """
+
+    __slots__ = ('rows', 'tfs', 'size', 'max_tf', 'min_len',
+                 'ptr', 'positions', 'starts', 'ends', 'owner', 'term_id')
+
+    def __init__(self, capacity: int = 2, owner: Optional[object] = None, term_id: int = -1):
+        self.owner = owner
+        self.term_id = term_id
+        self.rows = np.empty(capacity, dtype=np.int32)
+        self.tfs = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+        # Bounds for the MaxScore upper bound: BM25's tf component grows
+        # with tf and shrinks with document length
+        self.max_tf = 0
+        self.min_len = np.iinfo(np.int32).max
+
+        self.ptr = np.zeros(capacity + 1, dtype=np.int64)
+        self.positions = np.empty(capacity, dtype=np.int32)
+        self.starts = np.empty(capacity, dtype=np.int32)
+        self.ends = np.empty(capacity, dtype=np.int32)
+
+    def append(self, row: int, doc_len: int, occurrences: List[Tuple[int, int, int]]) -> None:
+        """
+        Add the posting of a new (highest numbered) row
+
+        Args:
+            row: Row id
+            doc_len: Indexed length of the document
+            occurrences: (word position, char start, char end) per occurrence
+        """
+        tf = len(occurrences)
+        self.rows = _grow(self.rows, self.size + 1)
+        self.tfs = _grow(self.tfs, self.size + 1)
+        self.ptr = _grow(self.ptr, self.size + 2)
+        self.rows[self.size] = row
+        self.tfs[self.size] = tf
+
+        begin = int(self.ptr[self.size])
+        end = begin + tf
+        self.positions = _grow(self.positions, end)
+        self.starts = _grow(self.starts, end)
+        self.ends = _grow(self.ends, end)
+        self.positions[begin:end], self.starts[begin:end], self.ends[begin:end] = zip(*occurrences)
+
+        self.ptr[self.size + 1] = end
+        self.size += 1
+        self.max_tf = max(self.max_tf, tf)
+        self.min_len = min(self.min_len, doc_len)
+
+    def copy(self, owner: object) -> "_Postings":
+        """
+        Copy sharing the arrays
+
+        Appends only write past this list's size (or into grown arrays),
+        so the copy can append without changing what this list reads.
+        """
+        postings = _Postings.__new__(_Postings)
+        for slot in _Postings.__slots__:
+            setattr(postings, slot, getattr(self, slot))
+        postings.owner = owner
+        return postings
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, tfs) without copying"""
+        return self.rows[:self.size], self.tfs[:self.size]
+
+    def find(self, row: int) -> int:
+        """Index of the posting of a row, or -1 (binary search)"""
+        i = int(np.searchsorted(self.rows[:self.size], row))
+        if i < self.size and self.rows[i] == row:
+            return i
+        return -1
+
+    def occurrences(self, i: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(word positions, char starts, char ends) of posting i, without copying"""
+        begin, end = self.ptr[i], self.ptr[i + 1]
+        return self.positions[begin:end], self.starts[begin:end], self.ends[begin:end]
+
+
+class InvertedIndex:
+    """
+    Append-only inverted index scored with Okapi BM25
+
+    - Rows are numbered in insertion order, so every postings list is sorted
+    - Removed documents become tombstones: masked while scoring and left
+      out of saved artifacts. Like Lucene, document frequencies and the
+      document count include tombstoned postings until the index is
+      compacted, which add_document/remove_document do in memory once
+      tombstones pass settings.index_compaction_threshold of the rows.
+    - Per-row filename and upload time back the field filters of a query
+    - Live document frequencies are kept per term id, updated on every
+      add/remove from the term ids of the row, so the whole vocabulary's
+      frequencies are one array copy (search-as-you-type suggestions)
+    """
+
+    index_name = "inverted"
+
+    def __init__(self):
+        self.k1 = settings.bm25_k1
+        self.b = settings.bm25_b
+
+        self._lock = threading.RLock()
+        self._owner = object()  # Postings lists this version may append to
+        self._unsaved = False
+        self.generation = 0  # Bumped on every change of the ranking
+        self._reset()
+
+    def fork(self) -> "InvertedIndex":
+        """
+        Copy-on-write copy to apply the next changes to
+
+        The per-row arrays and the term dictionary are copied; postings
+        lists stay shared until the copy appends to one, which then gets its
+        own _Postings (still sharing the arrays). This index is left as it is.
+        """
+        with self._lock:
+            fork = copy.copy(self)
+            fork._lock = threading.RLock()
+            fork._owner = object()
+            fork.doc_ids = list(self.doc_ids)
+            fork._row_of = dict(self._row_of)
+            fork._postings = dict(self._postings)
+            fork._doc_len = self._doc_len.copy()
+            fork._live = self._live.copy()
+            fork._uploaded = self._uploaded.copy()
+            fork._filenames = list(self._filenames)
+            fork._terms = list(self._terms)
+            fork._doc_freqs = self._doc_freqs.copy()
+            fork._row_terms = list(self._row_terms)
+            return fork
+
+    def _reset(self) -> None:
+        """Drop all rows and postings"""
+        # Changes whenever a term is added or dropped (see SuggestIndex)
+        self.vocabulary_generation = next(_vocabulary_ids)
+        self.doc_ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._postings: Dict[str, _Postings] = {}
+        self._terms: List[str] = []  # term id -> term
+        self._doc_freqs = np.zeros(16, dtype=np.int64)  # term id -> live documents containing it
+        self._row_terms: List[np.ndarray] = []  # row -> term ids of the document
+        self._doc_len = np.zeros(16, dtype=np.int32)
+        self._live = np.zeros(16, dtype=bool)
+        self._filenames: List[str] = []
+        self._uploaded = np.full(16, np.nan)
+        self._n_live = 0
+        self._total_len = 0  # Sum of live document lengths (for avgdl)
+
+    def __len__(self) -> int:
+        return self._n_live
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row_of
+
+    def live_doc_ids(self) -> List[str]:
+        """Indexed (non-deleted) document IDs in row order"""
+        with self._lock:
+            return [d for d in self.doc_ids if d in self._row_of]
+
+    def document_frequencies(self) -> Tuple[List[str], List[int]]:
+        """
+        Every term with the number of live documents containing it
+
+        Terms that only occur in deleted documents are left out.
+
+        Returns:
+            Tuple of (terms, document frequencies)
+        """
+        with self._lock:
+            doc_freqs = self.live_doc_freqs()
+            indexed = np.flatnonzero(doc_freqs)
+            return [self._terms[term_id] for term_id in indexed], doc_freqs[indexed].tolist()
+
+    def vocabulary(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Every term by term id with its live document frequency
+
+        Term ids only change with vocabulary_generation, so the frequencies
+        of later index states line up with these terms (live_doc_freqs()).
+
+        Returns:
+            Tuple of (terms, document frequencies), 0 for terms that only
+            occur in deleted documents
+        """
+        with self._lock:
+            return list(self._terms), self.live_doc_freqs()
+
+    def live_doc_freqs(self) -> np.ndarray:
+        """Live document frequency of every term id (a copy)"""
+        with self._lock:
+            return self._doc_freqs[:len(self._terms)].copy()
+
+    # ============ Updates ============
+
+    def build(self, texts: Dict[str, str], fields: Optional[Dict[str, Dict]] = None) -> None:
+        """
+        Index the given documents from scratch
+
+        Args:
+            texts: Mapping of doc_id -> text
+            fields: Mapping of doc_id -> metadata (filename, uploaded_at)
+        """
+        fields = fields or {}
+        with self._lock:
+            self._reset()
+            for doc_id, text in texts.items():
+                self._add(doc_id, tokenize_with_positions(text), fields.get(doc_id))
+            self._unsaved = True
+            self.generation += 1
+
+    def add_document(self, doc_id: str, text: str, fields: Optional[Dict] = None) -> None:
+        """
+        Add (or replace) a document; cost depends only on the document size
+
+        Args:
+            doc_id: Document ID
+            text: Extracted document text
+            fields: Document metadata (filename, uploaded_at) for field filters
+        """
+        tokens = tokenize_with_positions(text)
+        with self._lock:
+            self._remove(doc_id)
+            self._add(doc_id, tokens, fields)
+            self._unsaved = True
+            self.generation += 1
+            if self.needs_compaction():
+                self.compact()
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document (tombstone until the next save)
+
+        Returns:
+            True if the document was indexed, False otherwise
+        """
+        with self._lock:
+            removed = self._remove(doc_id)
+            if removed:
+                self._unsaved = True
+                self.generation += 1
+                if self.needs_compaction():
+                    self.compact()
+            return removed
+
+    def _add(self, doc_id: str, tokens: List[Tuple[str, int, int, int]],
+             fields: Optional[Dict] = None) -> None:
+        """Append a row for a tokenized document (caller holds the lock)"""
+        row = len(self.doc_ids)
+        self._ensure_capacity(row + 1)
+        doc_len = len(tokens)
+
+        occurrences: Dict[str, List[Tuple[int, int, int]]] = {}
+        for term, position, start, end in tokens:
+            occurrences.setdefault(term, []).append((position, start, end))
+
+        term_ids = []
+        for term, term_occurrences in occurrences.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings(owner=self._owner, term_id=len(self._terms))
+                self._terms.append(term)
+                self._doc_freqs = _grow(self._doc_freqs, len(self._terms))
+                self._doc_freqs[postings.term_id] = 0
+                self.vocabulary_generation = next(_vocabulary_ids)
+            elif postings.owner is not self._owner:
+                # Shared with the index this one was forked from
+                postings = self._postings[term] = postings.copy(self._owner)
+            postings.append(row, doc_len, term_occurrences)
+            term_ids.append(postings.term_id)
+
+        row_terms = np.array(term_ids, dtype=np.int32)
+        self._doc_freqs[row_terms] += 1
+        self._row_terms.append(row_terms)
+        self.doc_ids.append(doc_id)
+        self._row_of[doc_id] = row
+        self._doc_len[row] = doc_len
+        self._live[row] = True
+        filename, self._uploaded[row] = _field_values(fields)
+        self._filenames.append(filename)
+        self._n_live += 1
+        self._total_len += doc_len
+
+    def needs_compaction(self) -> bool:
+        """True once enough rows are tombstones"""
+        with self._lock:
+            tombstones = len(self.doc_ids) - self._n_live
+            return tombstones > 0 and \
+                tombstones >= max(1, settings.index_compaction_threshold * len(self.doc_ids))
+
+    def compact(self) -> bool:
+        """
+        Drop the tombstoned rows from memory and renumber the live ones
+
+        Rows change, so only compact an index nobody is reading (e.g. a
+        fork() that is not published yet).
+
+        Returns:
+            True if tombstones were dropped
+        """
+        with self._lock:
+            n_rows = len(self.doc_ids)
+            if self._n_live == n_rows:
+                return False
+
+            live = self._live[:n_rows]
+            doc_len = self._doc_len[:n_rows][live]
+            postings_of: Dict[str, _Postings] = {}
+            for term, rows, tfs, occurrences in self._live_postings(live):
+                postings = _Postings(capacity=0, owner=self._owner)
+                postings.rows, postings.tfs = rows, tfs
+                postings.size = len(rows)
+                postings.max_tf = int(tfs.max())
+                postings.min_len = int(doc_len[rows].min())
+                postings.ptr = np.concatenate([[0], np.cumsum(tfs, dtype=np.int64)])
+                postings.positions, postings.starts, postings.ends = occurrences
+                postings_of[term] = postings
+
+            doc_ids = [self.doc_ids[row] for row in range(n_rows) if live[row]]
+            filenames = [self._filenames[row] for row in range(n_rows) if live[row]]
+            uploaded = self._uploaded[:n_rows][live]
+            total_len = self._total_len
+
+            self._reset()
+            self._ensure_capacity(len(doc_ids))
+            self._postings = postings_of
+            self.doc_ids = doc_ids
+            self._row_of = {doc_id: row for row, doc_id in enumerate(doc_ids)}
+            self._doc_len[:len(doc_ids)] = doc_len
+            self._live[:len(doc_ids)] = True
+            self._filenames = filenames
+            self._uploaded[:len(doc_ids)] = uploaded
+            self._n_live = len(doc_ids)
+            self._total_len = total_len
+            self._index_terms()
+            self.generation += 1
+            return True
+
+    def _index_terms(self) -> None:
+        """
+        Term ids, document frequencies and per-row term ids of freshly
+        installed postings (every row live, caller holds the lock)
+        """
+        postings_lists = list(self._postings.values())
+        for term_id, postings in enumerate(postings_lists):
+            postings.term_id = term_id
+        self._terms = list(self._postings)
+        sizes = np.array([postings.size for postings in postings_lists], dtype=np.int64)
+        self._doc_freqs = _grow(sizes, 16)
+
+        if postings_lists:
+            rows = np.concatenate([postings.view()[0] for postings in postings_lists])
+        else:
+            rows = np.empty(0, dtype=np.int32)
+        term_ids = np.repeat(np.arange(len(postings_lists), dtype=np.int32), sizes)
+        order = np.argsort(rows, kind='stable')
+        counts = np.bincount(rows, minlength=len(self.doc_ids))
+        self._row_terms = np.split(term_ids[order], np.cumsum(counts)[:-1])
+
+    def _live_postings(self, live: np.ndarray):
+        """
+        (term, rows, tfs, (positions, starts, ends)) of every term with live
+        postings, rows renumbered over the live rows only (caller holds the lock)
+        """
+        new_row = (np.cumsum(live) - 1).astype(np.int32)  # old row -> compacted row
+        for term, postings in self._postings.items():
+            rows, tfs = postings.view()
+            keep = live[rows]
+            if not keep.any():
+                continue
+            n_occurrences = int(postings.ptr[postings.size])
+            keep_occurrences = np.repeat(keep, tfs)
+            yield term, new_row[rows[keep]], tfs[keep], tuple(
+                array[:n_occurrences][keep_occurrences]
+                for array in (postings.positions, postings.starts, postings.ends)
+            )
+
+    def _remove(self, doc_id: str) -> bool:
+        """Tombstone the row of a document (caller holds the lock)"""
+        row = self._row_of.pop(doc_id, None)
+        if row is None:
+            return False
+
+        self._live[row] = False
+        self._doc_freqs[self._row_terms[row]] -= 1
+        self._n_live -= 1
+        self._total_len -= int(self._doc_len[row])
+        return True
+
+    def _ensure_capacity(self, size: int) -> None:
+        """Grow the per-row arrays geometrically (amortized O(1) appends)"""
+        capacity = len(self._doc_len)
+        if size <= capacity:
+            return
+
+        new_capacity = max(size, capacity * 2)
+        doc_len = np.zeros(new_capacity, dtype=np.int32)
+        doc_len[:capacity] = self._doc_len
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:capacity] = self._live
+        uploaded = np.full(new_capacity, np.nan)
+        uploaded[:capacity] = self._uploaded
+        self._doc_len, self._live, self._uploaded = doc_len, live, uploaded
+
+    # ============ Querying ============
+
+    def _idf(self, df: int) -> float:
+        """BM25 inverse document frequency (always positive variant)"""
+        n_docs = len(self.doc_ids)  # Tombstones included, consistent with df
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def _tf_weight(self, tfs: np.ndarray, doc_len: np.ndarray, avgdl: float) -> np.ndarray:
+        """BM25 term-frequency component (without IDF)"""
+        norm = self.k1 * (1 - self.b + self.b * doc_len / avgdl)
+        return tfs * (self.k1 + 1) / (tfs + norm)
+
+    def _avgdl(self) -> float:
+        return self._total_len / self._n_live or 1.0
+
+    def _query_terms(self, query: str, avgdl: float) -> List[Tuple[_Postings, float, float]]:
+        """
+        Postings, IDF and score upper bound of each distinct query term
+
+        The upper bound (max possible contribution of the term to any
+        document) is computed from the largest tf and the shortest document
+        seen in the term's postings.
+        """
+        terms = []
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings is None or postings.size == 0:
+                continue
+            idf = self._idf(postings.size)
+            upper_bound = idf * float(self._tf_weight(
+                np.float64(postings.max_tf), np.float64(postings.min_len), avgdl
+            ))
+            terms.append((postings, idf, upper_bound))
+        return terms
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exhaustive BM25 scores for every document containing a query term
+
+        Args:
+            query: Search query
+
+        Returns:
+            Tuple of (row ids, scores) - documents without any query term
+            are never touched
+        """
+        with self._lock:
+            if self._n_live == 0:
+                return np.empty(0, dtype=np.int32), np.empty(0)
+
+            avgdl = self._avgdl()
+            all_rows, all_scores = [], []
+
+            for postings, idf, _ in self._query_terms(query, avgdl):
+                rows, tfs = postings.view()
+                live = self._live[rows]
+                rows, tfs = rows[live], tfs[live]
+                all_rows.append(rows)
+                all_scores.append(idf * self._tf_weight(tfs, self._doc_len[rows], avgdl))
+
+            if not all_rows:
+                return np.empty(0, dtype=np.int32), np.empty(0)
+
+            # Accumulate per document over the candidate rows only
+            rows, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(all_scores))
+            return rows, scores
+
+    def score_top_k(self, query: str, top_k: int,
+                    rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k BM25 scores with MaxScore dynamic pruning
+
+        Terms are processed from the highest to the lowest score upper bound.
+        theta is the k-th best score accumulated so far. While the summed
+        upper bounds of the remaining terms exceed theta, a document seen
+        only in those terms could still enter the top k, so the term's full
+        postings are scored. Once they cannot, the remaining (typically long,
+        low-IDF) postings are only probed for the current candidates with a
+        binary search, and candidates that cannot reach theta are dropped.
+
+        Args:
+            query: Search query
+            top_k: Number of results wanted
+            rows: Only score these rows (None = all live rows)
+
+        Returns:
+            Tuple of (row ids, scores) of at most top_k documents, best first
+        """
+        with self._lock:
+            if self._n_live == 0 or top_k <= 0:
+                return np.empty(0, dtype=np.int32), np.empty(0)
+
+            allowed = self._live
+            if rows is not None:
+                allowed = np.zeros_like(self._live)
+                allowed[rows] = self._live[rows]
+
+            avgdl = self._avgdl()
+            terms = sorted(self._query_terms(query, avgdl), key=lambda t: -t[2])
+            # remaining[i] = sum of upper bounds of terms i..end
+            remaining = np.cumsum([t[2] for t in terms][::-1])[::-1].tolist() + [0.0]
+
+            cand_rows = np.empty(0, dtype=np.int32)
+            cand_scores = np.empty(0)
+
+            for i, (postings, idf, _) in enumerate(terms):
+                theta = self._threshold(cand_scores, top_k)
+                rows, tfs = postings.view()
+
+                if remaining[i] >= theta:
+                    # Essential term: new documents may still enter the top k
+                    keep = allowed[rows]
+                    rows, tfs = rows[keep], tfs[keep]
+                    scores = idf * self._tf_weight(tfs, self._doc_len[rows], avgdl)
+                    merged, inverse = np.unique(
+                        np.concatenate([cand_rows, rows]), return_inverse=True
+                    )
+                    cand_scores = np.bincount(
+                        inverse, weights=np.concatenate([cand_scores, scores])
+                    )
+                    cand_rows = merged.astype(np.int32)
+                    continue
+
+                # Non-essential term: only probe the current candidates
+                pos = np.searchsorted(rows, cand_rows)
+                pos_clipped = np.minimum(pos, len(rows) - 1)
+                hit = (pos < len(rows)) & (rows[pos_clipped] == cand_rows)
+                if hit.any():
+                    hit_rows = cand_rows[hit]
+                    cand_scores[hit] += idf * self._tf_weight(
+                        tfs[pos_clipped[hit]], self._doc_len[hit_rows], avgdl
+                    )
+
+                # Drop candidates that cannot reach the threshold anymore
+                theta = self._threshold(cand_scores, top_k)
+                keep = cand_scores + remaining[i + 1] >= theta
+                cand_rows, cand_scores = cand_rows[keep], cand_scores[keep]
+
+            top = top_k_indices(cand_scores, top_k)
+            return cand_rows[top], cand_scores[top]
+
+    @staticmethod
+    def _threshold(scores: np.ndarray, k: int) -> float:
+        """k-th best score so far (0 while there are fewer than k candidates)"""
+        if len(scores) < k:
+            return 0.0
+        return float(np.partition(scores, len(scores) - k)[len(scores) - k])
+
+    def search(self, query: str, top_k: int = 5,
+               rows: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents with BM25 (MaxScore top-k)
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            rows: Only rank these rows (None = all documents)
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        with self._lock:
+            rows, scores = self.score_top_k(query, top_k, rows)
+            return [(self.doc_ids[row], float(score)) for row, score in zip(rows, scores)]
+
+    # ============ Positional matching ============
+
+    def _occurrence_keys(self, term: str, offset: int = 0) -> np.ndarray:
+        """
+        Sorted keys row * 2^32 + (position - offset) of a term's live occurrences
+
+        Keys of different terms can be intersected to find occurrences at
+        fixed distances in the same row.
+        """
+        postings = self._postings.get(term)
+        if postings is None or postings.size == 0:
+            return np.empty(0, dtype=np.int64)
+
+        rows, tfs = postings.view()
+        occurrence_rows = np.repeat(rows, tfs)
+        positions = postings.positions[:len(occurrence_rows)]
+        live = self._live[occurrence_rows]
+        return (occurrence_rows[live].astype(np.int64) << 32) + (positions[live] - offset)
+
+    def phrase_rows(self, terms: Sequence[Tuple[str, int]]) -> np.ndarray:
+        """
+        Rows containing the terms at the given relative positions
+
+        Args:
+            terms: (term, position relative to the phrase start) pairs
+
+        Returns:
+            Sorted row ids
+        """
+        with self._lock:
+            # Rarest term first keeps the intermediate results small
+            ordered = sorted(
+                terms,
+                key=lambda t: self._postings[t[0]].size if t[0] in self._postings else 0
+            )
+            keys = None
+            for term, offset in ordered:
+                term_keys = self._occurrence_keys(term, offset)
+                keys = term_keys if keys is None else np.intersect1d(keys, term_keys, assume_unique=True)
+                if len(keys) == 0:
+                    break
+
+        if keys is None:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(keys >> 32).astype(np.int32)
+
+    def near_rows(self, left: str, right: str, distance: int) -> np.ndarray:
+        """
+        Rows where the two terms occur within distance words of each other
+
+        Returns:
+            Sorted row ids
+        """
+        with self._lock:
+            left_keys = self._occurrence_keys(left)
+            right_keys = self._occurrence_keys(right)
+
+        if len(left_keys) == 0 or len(right_keys) == 0:
+            return np.empty(0, dtype=np.int32)
+
+        # Nearest left occurrence before/after each right occurrence
+        after = np.searchsorted(left_keys, right_keys)
+        before = np.maximum(after - 1, 0)
+        after = np.minimum(after, len(left_keys) - 1)
+
+        matches = np.zeros(len(right_keys), dtype=bool)
+        for neighbour in (left_keys[before], left_keys[after]):
+            same_row = (neighbour >> 32) == (right_keys >> 32)
+            matches |= same_row & (np.abs(neighbour - right_keys) <= distance)
+
+        return np.unique(right_keys[matches] >> 32).astype(np.int32)
+
+    def _live_rows(self) -> np.ndarray:
+        """All live row ids (caller holds the lock)"""
+        return np.flatnonzero(self._live[:len(self.doc_ids)]).astype(np.int32)
+
+    def term_rows(self, term: str) -> np.ndarray:
+        """Sorted live rows containing a term (its postings list)"""
+        with self._lock:
+            postings = self._postings.get(term)
+            if postings is None:
+                return np.empty(0, dtype=np.int32)
+            rows = postings.view()[0]
+            return rows[self._live[rows]]
+
+    def _field_rows(self, node: Node) -> np.ndarray:
+        """Live rows whose metadata matches a field filter (caller holds the lock)"""
+        rows = self._live_rows()
+        if isinstance(node, UploadedFilter):
+            uploaded = self._uploaded[rows]
+            # NaN (unknown upload time) never matches
+            return rows[(uploaded >= node.start) & (uploaded < node.end)]
+
+        pattern = node.pattern
+        if any(char in pattern for char in '*?['):
+            match = lambda name: fnmatchcase(name, pattern)
+        else:
+            match = lambda name: pattern in name
+        return rows[np.fromiter((match(self._filenames[row]) for row in rows),
+                                dtype=bool, count=len(rows))]
+
+    def _estimated_size(self, node: Node) -> float:
+        """Cheap upper bound on the rows of a node, for ordering intersections"""
+        if isinstance(node, Term):
+            postings = self._postings.get(node.term)
+            return postings.size if postings is not None else 0
+        if isinstance(node, Phrase):
+            return min(self._estimated_size(Term(term)) for term, _ in node.terms)
+        if isinstance(node, Near):
+            return min(self._estimated_size(Term(node.left)), self._estimated_size(Term(node.right)))
+        if isinstance(node, And):
+            return min(self._estimated_size(child) for child in node.children)
+        return len(self.doc_ids)
+
+    def evaluate(self, node: Node) -> np.ndarray:
+        """
+        Rows matching a boolean filter
+
+        AND intersects its operands from the (estimated) rarest one up and
+        stops as soon as the intersection is empty; NOT operands of an AND
+        are subtracted from it instead of being complemented; OR is a sorted
+        union.
+
+        Args:
+            node: Filter node from parse_query()
+
+        Returns:
+            Sorted live row ids
+        """
+        with self._lock:
+            if isinstance(node, Term):
+                return self.term_rows(node.term)
+            if isinstance(node, Phrase):
+                return self.phrase_rows(node.terms)
+            if isinstance(node, Near):
+                return self.near_rows(node.left, node.right, node.distance)
+            if isinstance(node, (FilenameFilter, UploadedFilter)):
+                return self._field_rows(node)
+            if isinstance(node, Not):
+                return np.setdiff1d(self._live_rows(), self.evaluate(node.child), assume_unique=True)
+            if isinstance(node, Or):
+                rows = [self.evaluate(child) for child in node.children]
+                return np.unique(np.concatenate(rows)).astype(np.int32)
+
+            # And
+            positive = sorted(
+                (child for child in node.children if not isinstance(child, Not)),
+                key=self._estimated_size
+            )
+            result = None
+            for child in positive:
+                rows = self.evaluate(child)
+                result = rows if result is None else intersect_sorted(result, rows)
+                if len(result) == 0:
+                    return result
+            if result is None:
+                result = self._live_rows()
+            for child in node.children:
+                if isinstance(child, Not):
+                    result = np.setdiff1d(result, self.evaluate(child.child), assume_unique=True)
+            return result
+
+    def match_rows(self, parsed: ParsedQuery) -> np.ndarray:
+        """
+        Rows satisfying the boolean filter of a parsed query
+
+        Returns:
+            Sorted row ids (all live rows if the query has no filter)
+        """
+        with self._lock:
+            if parsed.filter is None:
+                return self._live_rows()
+            return self.evaluate(parsed.filter)
+
+    def doc_ids_to_rows(self, doc_ids: Sequence[str]) -> np.ndarray:
+        """Sorted live rows of the given documents (unknown IDs are skipped)"""
+        with self._lock:
+            rows = {self._row_of[doc_id] for doc_id in doc_ids if doc_id in self._row_of}
+            return np.array(sorted(rows), dtype=np.int32)
+
+    def rows_to_doc_ids(self, rows: np.ndarray) -> List[str]:
+        """Document IDs of row ids"""
+        with self._lock:
+            return [self.doc_ids[row] for row in rows]
+
+    def hits(self, doc_id: str, query: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Occurrences of the query terms in one document, by position lookup
+
+        Args:
+            doc_id: Document ID
+            query: Search query
+
+        Returns:
+            Tuple of (query term index, word position, char start, char end)
+            arrays sorted by position, or None if the document is not indexed
+        """
+        terms = list(dict.fromkeys(tokenize(query)))  # distinct, in query order
+
+        with self._lock:
+            row = self._row_of.get(doc_id)
+            if row is None:
+                return None
+
+            parts = []
+            for term_index, term in enumerate(terms):
+                postings = self._postings.get(term)
+                i = postings.find(row) if postings is not None else -1
+                if i >= 0:
+                    positions, starts, ends = postings.occurrences(i)
+                    parts.append((np.full(len(positions), term_index), positions, starts, ends))
+
+        if not parts:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty, empty, empty
+
+        term_ids, positions, starts, ends = (np.concatenate(column) for column in zip(*parts))
+        order = np.argsort(positions, kind='stable')
+        return term_ids[order], positions[order], starts[order], ends[order]
+
+    # ============ Persistence ============
+
+    def _artifact_paths(self) -> Tuple[Path, Path]:
+        """Paths of the (postings, manifest) files of this index"""
+        return (
+            settings.index_dir / f"{self.index_name}_index.npz",
+            settings.index_dir / f"{self.index_name}_manifest.json"
+        )
+
+    def save_index(self) -> bool:
+        """
+        Persist the postings (live rows only, renumbered) to settings.index_dir
+
+        Layout: <name>_index.npz holds the terms, an offsets array into the
+        concatenated rows/tfs arrays, per-term max tf, the document lengths,
+        filenames and upload times and the occurrences (positions/starts/ends, tf entries per posting,
+        in posting order); <name>_manifest.json holds the version and doc_ids.
+
+        Returns:
+            True if an index was written, False if there was nothing to save
+        """
+        with self._lock:
+            if not self._unsaved:
+                return False
+
+            n_rows = len(self.doc_ids)
+            live = self._live[:n_rows]
+
+            terms, offsets, rows_parts, tfs_parts, max_tfs = [], [0], [], [], []
+            occurrence_parts = []
+            for term, rows, tfs, occurrences in self._live_postings(live):
+                terms.append(term)
+                rows_parts.append(rows)
+                tfs_parts.append(tfs)
+                max_tfs.append(int(tfs.max()))
+                offsets.append(offsets[-1] + len(rows))
+                occurrence_parts.append(occurrences)
+
+            if occurrence_parts:
+                positions, starts, ends = (np.concatenate(column) for column in zip(*occurrence_parts))
+            else:
+                positions = starts = ends = np.empty(0, dtype=np.int32)
+
+            doc_ids = [self.doc_ids[row] for row in range(n_rows) if live[row]]
+            doc_len = self._doc_len[:n_rows][live]
+            filenames = [self._filenames[row] for row in range(n_rows) if live[row]]
+            uploaded = self._uploaded[:n_rows][live]
+            self._unsaved = False
+
+        settings.index_dir.mkdir(parents=True, exist_ok=True)
+        postings_file, manifest_file = self._artifact_paths()
+
+        # Write to temporary files first, then atomically replace
+        postings_tmp = postings_file.with_suffix('.tmp')
+        with open(postings_tmp, 'wb') as f:
+            np.savez(
+                f,
+                terms=np.array(terms, dtype=str),
+                offsets=np.array(offsets, dtype=np.int64),
+                rows=np.concatenate(rows_parts) if rows_parts else np.empty(0, dtype=np.int32),
+                tfs=np.concatenate(tfs_parts) if tfs_parts else np.empty(0, dtype=np.int32),
+                max_tfs=np.array(max_tfs, dtype=np.int32),
+                doc_len=doc_len,
+                filenames=np.array(filenames, dtype=str),
+                uploaded=uploaded,
+                positions=positions,
+                starts=starts,
+                ends=ends
+            )
+        os.replace(postings_tmp, postings_file)
+
+        manifest = {
+            "version": INVERTED_INDEX_FORMAT_VERSION,
+            "index_name": self.index_name,
+            "created_at": datetime.now().isoformat(),
+            "n_terms": len(terms),
+            "doc_ids": doc_ids
+        }
+        manifest_tmp = manifest_file.with_suffix('.tmp')
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(manifest_tmp, manifest_file)
+
+        return True
+
+    def load_index(self) -> bool:
+        """
+        Load the postings written by save_index()
+
+        Returns:
+            True if a valid artifact was loaded
+        """
+        postings_path, manifest_path = self._artifact_paths()
+
+        if not manifest_path.exists() or not postings_path.exists():
+            return False
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            if manifest.get("version") != INVERTED_INDEX_FORMAT_VERSION:
+                return False
+
+            with np.load(postings_path, allow_pickle=False) as data:
+                terms = data['terms']
+                offsets = data['offsets']
+                rows = data['rows'].astype(np.int32)
+                tfs = data['tfs'].astype(np.int32)
+                max_tfs = data['max_tfs']
+                doc_len = data['doc_len'].astype(np.int32)
+                filenames = [str(name) for name in data['filenames']]
+                uploaded = data['uploaded'].astype(np.float64)
+                positions = data['positions'].astype(np.int32)
+                starts = data['starts'].astype(np.int32)
+                ends = data['ends'].astype(np.int32)
+        except (OSError, ValueError, KeyError):
+            return False
+
+        doc_ids = manifest.get("doc_ids", [])
+        if len(terms) != manifest.get("n_terms") or len(doc_len) != len(doc_ids) \
+                or not len(filenames) == len(uploaded) == len(doc_ids) \
+                or len(offsets) != len(terms) + 1 or len(max_tfs) != len(terms) \
+                or not len(positions) == len(starts) == len(ends) == int(tfs.sum()):
+            return False
+
+        # Occurrences of posting j are at occurrence_ptr[j]:occurrence_ptr[j + 1]
+        occurrence_ptr = np.concatenate([[0], np.cumsum(tfs, dtype=np.int64)])
+
+        with self._lock:
+            self._reset()
+            self._ensure_capacity(len(doc_ids))
+            for i, term in enumerate(terms):
+                start, end = offsets[i], offsets[i + 1]
+                postings = _Postings(capacity=0, owner=self._owner)
+                postings.rows = rows[start:end].copy()
+                postings.tfs = tfs[start:end].copy()
+                postings.size = int(end - start)
+                postings.max_tf = int(max_tfs[i])
+                postings.min_len = int(doc_len[postings.rows].min())
+
+                first, last = occurrence_ptr[start], occurrence_ptr[end]
+                postings.ptr = occurrence_ptr[start:end + 1] - first
+                postings.positions = positions[first:last].copy()
+                postings.starts = starts[first:last].copy()
+                postings.ends = ends[first:last].copy()
+                self._postings[str(term)] = postings
+
+            self.doc_ids = list(doc_ids)
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+            self._doc_len[:len(doc_ids)] = doc_len
+            self._live[:len(doc_ids)] = True
+            self._filenames = filenames
+            self._uploaded[:len(doc_ids)] = uploaded
+            self._n_live = len(doc_ids)
+            self._total_len = int(doc_len.sum())
+            self._index_terms()
+            self._unsaved = False
+            self.generation += 1
+
+        return True
@@ -0,0 +1,266 @@
+"""
+[Human-written] Near-Duplicate Detection (MinHash + LSH)
+Estimates the Jaccard similarity of word shingle sets - NO AI, only hashing
+
+Each document is reduced to the set of its w-word shingles (ASCII-folded,
+lower case). A MinHash signature keeps, for each of n random hash
+permutations, the smallest hash over that set; the fraction of equal
+positions between two signatures estimates the Jaccard similarity of the
+two shingle sets.
+
+Signatures are cut into b bands of r rows. Documents sharing all rows of
+at least one band land in the same bucket, so a lookup only compares the
+signatures found in its own b buckets instead of the whole corpus. Pairs
+with similarity s become candidates with probability 1 - (1 - s^r)^b (an
+S-curve around (1/b)^(1/r), about 0.71 for 16 bands of 8 rows).
+"""
+
+import copy
+import threading
+import zlib
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.utils.query_parser import fold
+from app.utils.text_utils import WORD_PATTERN
+
+# Permutations are multiply-shift hashes: the top 32 bits of a * x + b (mod 2^64)
+MAX_HASH = np.uint64((1 << 32) - 1)
+HASH_SHIFT = np.uint64(32)
+
+# Multiplier combining the word hashes of a shingle
+SHINGLE_BASE = np.uint64(1_000_003)
+
+# Shingles hashed per numpy block (bounds the permutations x shingles matrix)
+SHINGLE_BLOCK = 4096
+
+# Fixed, so signatures stored in metadata.json stay comparable across restarts
+MINHASH_SEED = 1
+
+
+@lru_cache(maxsize=8)
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Coefficients (a, b) of the hash permutations"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+    return a, b
+
+
+def shingle_hashes(text: str, shingle_size: int) -> np.ndarray:
+    """
+    32-bit hashes of the distinct w-word shingles of a text
+
+    Texts shorter than shingle_size words form a single shingle.
+
+    Args:
+        text: Document text
+        shingle_size: Words per shingle
+
+    Returns:
+        Sorted unique uint64 array of values below 2^32
+    """
+    words = WORD_PATTERN.findall(fold(text))
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode('utf-8')) for word in words), dtype=np.uint64, count=len(words)
+    )
+    size = min(shingle_size, len(words))
+    n_shingles = len(words) - size + 1
+    hashes = np.zeros(n_shingles, dtype=np.uint64)
+    for offset in range(size):
+        # Wraps around 2^64 on purpose
+        hashes = hashes * SHINGLE_BASE + word_hashes[offset:offset + n_shingles]
+    return np.unique((hashes ^ (hashes >> HASH_SHIFT)) & MAX_HASH)
+
+
+def minhash_signature(text: str, num_perm: Optional[int] = None,
+                      shingle_size: Optional[int] = None) -> np.ndarray:
+    """
+    MinHash signature of a document
+
+    Args:
+        text: Document text
+        num_perm: Signature length (default: settings.minhash_permutations)
+        shingle_size: Words per shingle (default: settings.minhash_shingle_size)
+
+    Returns:
+        uint32 array of num_perm minimum hashes (all 2^32 - 1 for an empty text)
+    """
+    num_perm = num_perm or settings.minhash_permutations
+    a, b = _permutations(num_perm, MINHASH_SEED)
+    shingles = shingle_hashes(text, shingle_size or settings.minhash_shingle_size)
+
+    signature = np.full(num_perm, MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(shingles), SHINGLE_BLOCK):
+        block = shingles[start:start + SHINGLE_BLOCK]
+        hashed = np.multiply.outer(a, block)  # wraps around 2^64 on purpose
+        hashed += b[:, None]
+        hashed >>= HASH_SHIFT
+        np.minimum(signature, hashed.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+
+def encode_signature(signature: np.ndarray) -> str:
+    """Hex form of a signature for metadata.json"""
+    return signature.astype('<u4').tobytes().hex()
+
+
+def decode_signature(value: str) -> np.ndarray:
+    """Signature from its hex form"""
+    return np.frombuffer(bytes.fromhex(value), dtype='<u4').astype(np.uint32)
+
+
+def jaccard_estimate(a: np.ndarray, b: np.ndarray) -> float:
+    """Fraction of equal MinHash positions (estimated Jaccard similarity)"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """
+    LSH banding index over MinHash signatures
+
+    Documents without any shingle (empty texts) are not indexed: their
+    signatures would all be equal. Buckets are frozensets, replaced on
+    change, so fork() only copies the dictionaries.
+    """
+
+    def __init__(self, num_perm: Optional[int] = None, bands: Optional[int] = None,
+                 threshold: Optional[float] = None):
+        """
+        Args:
+            num_perm: Signature length (default: settings.minhash_permutations)
+            bands: LSH bands (default: settings.lsh_bands); must divide num_perm
+            threshold: Estimated Jaccard similarity from which two documents
+                are near-duplicates (default: settings.near_duplicate_threshold)
+
+        Raises:
+            ValueError: If bands does not divide num_perm
+        """
+        self.num_perm = num_perm or settings.minhash_permutations
+        self.bands = bands or settings.lsh_bands
+        if self.num_perm % self.bands:
+            raise ValueError(f"lsh_bands ({self.bands}) must divide minhash_permutations ({self.num_perm})")
+        self.rows = self.num_perm // self.bands
+        self.threshold = settings.near_duplicate_threshold if threshold is None else threshold
+
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, FrozenSet[str]]] = [{} for _ in range(self.bands)]
+
+    def fork(self) -> "NearDuplicateIndex":
+        """Copy-on-write copy to apply the next changes to (this index is left as it is)"""
+        with self._lock:
+            fork = copy.copy(self)
+            fork._lock = threading.Lock()
+            fork._signatures = dict(self._signatures)
+            fork._buckets = [dict(buckets) for buckets in self._buckets]
+            return fork
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, doc_id: str, signature: np.ndarray) -> None:
+        """
+        Add (or replace) a document
+
+        Args:
+            doc_id: Document ID
+            signature: Its MinHash signature (num_perm values)
+
+        Raises:
+            ValueError: If the signature has the wrong length
+        """
+        if len(signature) != self.num_perm:
+            raise ValueError(f"Expected a signature of {self.num_perm} values, got {len(signature)}")
+
+        with self._lock:
+            self._remove(doc_id)
+            if (signature == MAX_HASH).all():
+                return
+            self._signatures[doc_id] = signature
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets[key] = buckets.get(key, frozenset()) | {doc_id}
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Remove a document
+
+        Returns:
+            True if the document was indexed
+        """
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> bool:
+        signature = self._signatures.pop(doc_id, None)
+        if signature is None:
+            return False
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets[key] - {doc_id}
+            if bucket:
+                buckets[key] = bucket
+            else:
+                del buckets[key]
+        return True
+
+    def signature(self, doc_id: str) -> Optional[np.ndarray]:
+        """Indexed signature of a document (None if not indexed)"""
+        return self._signatures.get(doc_id)
+
+    def query(self, signature: np.ndarray, threshold: Optional[float] = None,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        Indexed documents similar to a signature
+
+        Only documents sharing an LSH bucket with the signature are
+        compared, so a near-duplicate that shares no band (unlikely above
+        the S-curve threshold) is missed.
+
+        Args:
+            signature: MinHash signature to look up
+            threshold: Minimum estimated Jaccard similarity (default: self.threshold)
+            exclude: Document to leave out (the one being looked up)
+
+        Returns:
+            List of (doc_id, similarity), most similar first
+        """
+        threshold = self.threshold if threshold is None else threshold
+        with self._lock:
+            candidates = set()
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                candidates |= buckets.get(key, frozenset())
+            candidates.discard(exclude)
+            signatures = [(doc_id, self._signatures[doc_id]) for doc_id in candidates]
+
+        similar = []
+        for doc_id, other in signatures:
+            similarity = jaccard_estimate(signature, other)
+            if similarity >= threshold:
+                similar.append((doc_id, similarity))
+        similar.sort(key=lambda item: (-item[1], item[0]))
+        return similar
+
+    def near_duplicates(self, doc_id: str, threshold: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Near-duplicates of an indexed document
+
+        Returns:
+            List of (doc_id, similarity), most similar first; empty if the
+            document is not indexed
+        """
+        signature = self._signatures.get(doc_id)
+        if signature is None:
+            return []
+        return self.query(signature, threshold, exclude=doc_id)
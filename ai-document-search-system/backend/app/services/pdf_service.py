@@ -1,81 +1,308 @@
 """
 [Human-written] PDF Text Extraction Service
 Uses PyMuPDF (fitz) for deterministic PDF parsing - NO AI
+
+Large PDFs are split into contiguous page ranges that are extracted and
+cleaned by a pool of worker processes (PyMuPDF holds the GIL, so threads
+would not help). Each worker opens its own fitz document; the page texts
+are joined once at the end. Bulk uploads use the same pool with one whole
+PDF per task.
+
+The page boundaries are kept: the document store records where every page
+starts in the text, so pages can be read back one by one and passages
+cited with their page number. Uploads stream the cleaned pages from
+iter_pdf_pages() into the store as they are extracted, which saves the
+page list and joined copies of the text. It does not bound the memory of
+an upload: every index takes the whole text (passages and shingles span
+pages), so ingest_upload() decodes the stored document once, O(document).
 """
 
-import fitz  # PyMuPDF
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
 
 from app.config import settings
+from app.services.document_store import PAGE_SEPARATOR, PageTable, document_store
 from app.utils.text_utils import clean_text
 
+# Page ranges in flight per worker process (several per worker even out slow pages)
+SHARDS_PER_WORKER = 4
+
+# Pages per range at most, so large PDFs are extracted in many small ranges
+PAGES_PER_RANGE = 16
+
+# (workers, pool) of the page extraction processes, created on first use
+_pool: Tuple[int, Optional[ProcessPoolExecutor]] = (0, None)
+_pool_lock = threading.Lock()
+
 
-def extract_text_from_pdf(pdf_path: Path) -> Dict[str, any]:
+def _extraction_pool(workers: int) -> ProcessPoolExecutor:
+    """Worker processes for page extraction (replaced if the worker count changes)"""
+    global _pool
+    with _pool_lock:
+        size, pool = _pool
+        if pool is None or size != workers:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            # spawn: forking a process that runs server threads is unsafe
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool = (workers, pool)
+        return pool
+
+
+def shutdown_extraction_pool() -> None:
+    """Stop the page extraction processes (application shutdown)"""
+    global _pool
+    with _pool_lock:
+        _, pool = _pool
+        _pool = (0, None)
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def extraction_workers() -> int:
+    """Worker processes used for large PDFs (settings value, capped at the CPU count)"""
+    return max(1, min(settings.pdf_extraction_workers, os.cpu_count() or 1))
+
+
+def page_ranges(page_count: int, n_ranges: int) -> List[Tuple[int, int]]:
+    """
+    Split pages into contiguous [start, end) ranges of (almost) equal size
+
+    Args:
+        page_count: Number of pages
+        n_ranges: Number of ranges (fewer if there are fewer pages)
+
+    Returns:
+        List of (start, end) covering every page once, in page order
+    """
+    n_ranges = max(1, min(n_ranges, page_count))
+    bounds = [page_count * i // n_ranges for i in range(n_ranges + 1)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def join_pages(pages: List[str]) -> Tuple[str, PageTable]:
+    """
+    Full text of a document and the start of every page in it
+
+    Args:
+        pages: Page texts, in order
+
+    Returns:
+        Tuple of (full text, page table): the pages joined with
+        PAGE_SEPARATOR and stripped, and the byte and character offsets of
+        each page start in that text (empty pages at either end start at its
+        beginning/end)
+    """
+    joined = PAGE_SEPARATOR.join(pages)
+    full_text = joined.strip()
+    lead_chars = len(joined) - len(joined.lstrip())
+    lead_bytes = len(joined[:lead_chars].encode('utf-8'))
+    total_chars, total_bytes = len(full_text), len(full_text.encode('utf-8'))
+
+    byte_starts, char_starts = [], []
+    byte_offset = char_offset = 0
+    for page in pages:
+        byte_starts.append(min(max(0, byte_offset - lead_bytes), total_bytes))
+        char_starts.append(min(max(0, char_offset - lead_chars), total_chars))
+        byte_offset += len(page.encode('utf-8')) + len(PAGE_SEPARATOR)
+        char_offset += len(page) + len(PAGE_SEPARATOR)
+    return full_text, (byte_starts, char_starts)
+
+
+def extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """
+    Cleaned text of pages [start, end) (runs in a worker process)
+
+    Args:
+        pdf_path: Path to PDF file
+        start: First page (0-based)
+        end: Page after the last one
+
+    Returns:
+        List of cleaned page texts
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return [clean_text(doc[page_num].get_text()) for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+
+def iter_pdf_pages(pdf_path: Path, workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Cleaned text of every page of a PDF, produced one page at a time
+
+    Uploads feed this generator straight into the document store instead
+    of collecting a page list first (indexing then reads the whole text
+    back, see ingest_upload()). PDFs with at
+    least settings.pdf_parallel_min_pages pages are extracted by worker
+    processes, in ranges of at most PAGES_PER_RANGE pages; the ranges are
+    yielded in order, and the next range is only submitted once one has been
+    consumed (at most workers * SHARDS_PER_WORKER ranges in flight).
+
+    Args:
+        pdf_path: Path to PDF file
+        workers: Worker processes (default: extraction_workers(); 1 = in-process)
+
+    Yields:
+        Cleaned page texts, in page order
+
+    Raises:
+        Exception: If the PDF cannot be read (possibly after some pages)
+    """
+    workers = extraction_workers() if workers is None else workers
+    try:
+        doc = fitz.open(pdf_path)
+        try:
+            page_count = len(doc)
+            if workers <= 1 or page_count < settings.pdf_parallel_min_pages:
+                for page_num in range(page_count):
+                    # Clean text using classical methods
+                    yield clean_text(doc[page_num].get_text())
+                return
+        finally:
+            doc.close()
+
+        window = workers * SHARDS_PER_WORKER
+        ranges = iter(page_ranges(page_count, max(window, -(-page_count // PAGES_PER_RANGE))))
+        pool = _extraction_pool(workers)
+        futures = deque()
+
+        def submit_next() -> None:
+            page_range = next(ranges, None)
+            if page_range is not None:
+                futures.append(pool.submit(extract_page_range, str(pdf_path), *page_range))
+
+        try:
+            for _ in range(window):
+                submit_next()
+            while futures:
+                pages = futures.popleft().result()
+                submit_next()
+                yield from pages
+        finally:
+            for future in futures:
+                future.cancel()
+
+    except Exception as e:
+        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+
+def extract_text_from_pdf(pdf_path: Path, workers: Optional[int] = None) -> Dict[str, any]:
     """
     Extract text from PDF file using PyMuPDF (deterministic, no AI)
 
+    Collects iter_pdf_pages() into memory; uploads stream the pages with
+    save_extracted_pages() instead.
+
     Args:
         pdf_path: Path to PDF file
+        workers: Worker processes (default: extraction_workers(); 1 = in-process)
 
     Returns:
         Dictionary containing:
             - full_text: Complete extracted text
             - page_count: Number of pages
             - pages: List of text per page
+            - page_table: Page starts in full_text (see join_pages)
     """
-    try:
-        doc = fitz.open(pdf_path)
-        pages = []
-        full_text = ""
+    pages = list(iter_pdf_pages(pdf_path, workers))
+    full_text, page_table = join_pages(pages)
+    return {
+        "full_text": full_text,
+        "page_count": len(pages),
+        "pages": pages,
+        "page_table": page_table
+    }
 
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
 
-            # Clean text using classical methods
-            cleaned_text = clean_text(text)
-            pages.append(cleaned_text)
-            full_text += cleaned_text + "\n\n"
+def extract_texts_from_pdfs(pdf_paths: List[Path], workers: Optional[int] = None) -> List[Union[Dict, Exception]]:
+    """
+    Extract several PDFs at once, one whole PDF per worker process
 
-        doc.close()
+    Files are the unit of work here (a bulk upload has many small PDFs), so
+    each PDF is extracted in-process by the worker that picks it up.
 
-        return {
-            "full_text": full_text.strip(),
-            "page_count": len(pages),
-            "pages": pages
-        }
+    Args:
+        pdf_paths: Paths to PDF files
+        workers: Worker processes (default: extraction_workers(); 1 = in-process)
 
-    except Exception as e:
-        raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    Returns:
+        For each path, in order, the extract_text_from_pdf() result or the
+        exception raised for that file
+    """
+    workers = extraction_workers() if workers is None else workers
+    if workers <= 1 or len(pdf_paths) <= 1:
+        results = []
+        for pdf_path in pdf_paths:
+            try:
+                results.append(extract_text_from_pdf(pdf_path, workers=workers))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    pool = _extraction_pool(workers)
+    futures = [pool.submit(extract_text_from_pdf, pdf_path, 1) for pdf_path in pdf_paths]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
 
 
-def save_extracted_text(doc_id: str, text: str) -> Path:
+def save_extracted_text(doc_id: str, text: str, page_table: Optional[PageTable] = None) -> Path:
     """
-    Save extracted text to file for caching
+    Save extracted text to the document store
 
     Args:
         doc_id: Document ID
         text: Extracted text
+        page_table: Page starts in the text (PDFs, see join_pages)
 
     Returns:
-        Path to saved text file
+        Path to the store data file holding the text
     """
-    text_file = settings.extracted_dir / f"{doc_id}.txt"
-
     try:
-        with open(text_file, 'w', encoding='utf-8') as f:
-            f.write(text)
-
-        return text_file
+        document_store.put(doc_id, text, page_table)
+        return document_store.data_path
 
     except Exception as e:
         raise Exception(f"Failed to save extracted text: {str(e)}")
 
 
+def save_extracted_pages(doc_id: str, pages: Iterable[str]) -> PageTable:
+    """
+    Stream page texts into the document store as they are produced
+
+    Stores the same text and page table as save_extracted_text(doc_id,
+    *join_pages(pages)) without ever joining the pages in memory.
+
+    Args:
+        doc_id: Document ID
+        pages: Cleaned page texts, in order (e.g. iter_pdf_pages())
+
+    Returns:
+        Page table of the stored text
+
+    Raises:
+        Exception: Whatever producing or writing a page raised (nothing is
+            stored)
+    """
+    return document_store.put_pages(doc_id, pages)
+
+
 def load_extracted_text(doc_id: str) -> str:
     """
-    Load previously extracted text from cache
+    Load previously extracted text from the document store
 
     Args:
         doc_id: Document ID
@@ -84,15 +311,59 @@ def load_extracted_text(doc_id: str) -> str:
         Extracted text
 
     Raises:
-        FileNotFoundError: If text file doesn't exist
+        FileNotFoundError: If the document has no extracted text
+    """
+    return document_store.get(doc_id)
+
+
+def load_extracted_pages(doc_id: str, start: int, end: int) -> List[str]:
+    """
+    Load pages [start, end) of a document without decoding the rest
+
+    Args:
+        doc_id: Document ID
+        start: First page (0-based)
+        end: Page after the last one (clipped to the page count)
+
+    Returns:
+        List of page texts
+
+    Raises:
+        FileNotFoundError: If the document has no extracted text
+        ValueError: If the document has no pages (text files)
+    """
+    return document_store.get_pages(doc_id, start, end)
+
+
+def load_page_table(doc_id: str) -> Optional[PageTable]:
+    """Page starts of a document's extracted text (None without pages)"""
+    return document_store.page_table(doc_id)
+
+
+def page_number(doc_id: str, char_offset: int) -> Optional[int]:
+    """
+    Page number (1-based, as cited) of a character offset in the extracted text
+
+    Returns:
+        Page number, or None for documents without pages
     """
-    text_file = settings.extracted_dir / f"{doc_id}.txt"
+    page = document_store.page_at(doc_id, char_offset)
+    return page + 1 if page is not None else None
 
-    if not text_file.exists():
-        raise FileNotFoundError(f"Extracted text not found for document {doc_id}")
 
-    with open(text_file, 'r', encoding='utf-8') as f:
-        return f.read()
+def delete_extracted_text(doc_id: str) -> bool:
+    """
+    Delete extracted text from the document store
+
+    Args:
+        doc_id: Document ID
+
+    Returns:
+        True if the document had extracted text
+    """
+    legacy_file = settings.extracted_dir / f"{doc_id}.txt"
+    legacy_file.unlink(missing_ok=True)
+    return document_store.delete(doc_id)
 
 
 def get_pdf_metadata(pdf_path: Path) -> Dict[str, any]:
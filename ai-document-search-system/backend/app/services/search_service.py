@@ -3,127 +3,2132 @@
 Uses TF-IDF for keyword-based search - NO AI, purely statistical method
 """
 
+import copy
+import itertools
 import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict
-from sklearn.feature_extraction.text import TfidfVectorizer
+from typing import Callable, List, Dict, NamedTuple, Optional, Sequence, Tuple, Union
+from sklearn.base import BaseEstimator, clone
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 import numpy as np
+import scipy.sparse as sp
 from unidecode import unidecode  # Turkish character normalization
 
 from app.config import settings
-from app.services.pdf_service import load_extracted_text
-from app.utils.text_utils import extract_snippet
+from app.services.inverted_index import InvertedIndex, intersect_sorted
+from app.services.near_duplicate_index import NearDuplicateIndex, decode_signature, minhash_signature
+from app.services.pdf_service import load_extracted_text, page_number
+from app.services.semantic_index import MIN_SIMILARITY, SemanticIndex
+from app.services.suggest_index import SuggestIndex
+from app.utils.cache_utils import QueryCache
+from app.utils.query_parser import ParsedQuery, normalize_query, parse_query
+from app.utils.ranking_utils import fuse_rrf, fuse_weighted, top_k_indices
+from app.utils.text_utils import (
+    best_snippet_window, build_snippet, chunk_text_with_offsets, extract_snippet
+)
 
+# On-disk index artifact (bump the version when the layout changes)
+INDEX_FORMAT_VERSION = 2
 
-class SearchService:
-    """Classical TF-IDF based search service (no AI)"""
+# When several engines are fused, each contributes this many times top_k candidates
+FUSION_DEPTH = 3
 
-    def __init__(self):
+# Collapsed searches rank this many times top_k documents before folding near-duplicates
+COLLAPSE_DEPTH = 3
+
+# Ranking engines of the retrieval pipeline
+RETRIEVAL_ENGINES = ("tfidf", "bm25", "semantic")
+
+# Snippets show the best window of this many words (plus context) around query terms
+SNIPPET_CONTEXT_WORDS = 15
+SNIPPET_WINDOW_WORDS = 2 * SNIPPET_CONTEXT_WORDS
+
+# Snapshot indexes with a TF-IDF fit, compacted by SearchService
+COMPACTED_INDEXES = ("documents", "passages")
+
+# Ids of full TF-IDF fits, unique across index instances
+_fit_ids = itertools.count(1)
+
+
+def turkish_normalizer(text):
+    """
+    Normalize Turkish and English text for TF-IDF.
+    Converts Turkish characters to ASCII equivalents.
+    Example: "BİTİRME" → "bitirme", "çalışma" → "calisma"
+    """
+    return unidecode(text).lower()
+
+
+def _smooth_idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    """
+    Same smoothed IDF formula as sklearn's TfidfTransformer (smooth_idf=True):
+    idf(t) = ln((1 + n) / (1 + df(t))) + 1
+    """
+    return np.log((1 + n_docs) / (1 + df)) + 1
+
+
+class HashingTfidfVectorizer(BaseEstimator):
+    """
+    TF-IDF over hashed term columns (feature hashing, no vocabulary)
+
+    A term's column is hash(term) mod n_features, so nothing is selected or
+    stored per term: every term, however rare, is searchable as soon as a
+    document containing it is indexed, and memory is fixed by n_features
+    instead of growing with the corpus vocabulary. The IDF table (idf_,
+    one value per column) is kept separately and maintained by TfidfIndex
+    from document frequencies, like the IDF of the vocabulary vectorizer.
+
+    Terms sharing a column are indistinguishable; with n_features well
+    above the vocabulary size such collisions are rare.
+    """
+
+    def __init__(self, n_features: int = 2 ** 20, preprocessor: Optional[Callable[[str], str]] = None):
+        self.n_features = n_features
+        self.preprocessor = preprocessor
+
+    def _hasher(self) -> HashingVectorizer:
+        """Stateless term hasher with the project-wide tokenization"""
+        hasher = getattr(self, '_hasher_', None)
+        if hasher is None:
+            hasher = self._hasher_ = HashingVectorizer(
+                n_features=self.n_features,
+                stop_words='english',
+                lowercase=False,  # We handle lowercasing in preprocessor
+                preprocessor=self.preprocessor,
+                alternate_sign=False,
+                norm=None
+            )
+        return hasher
+
+    def build_analyzer(self) -> Callable[[str], List[str]]:
+        return self._hasher().build_analyzer()
+
+    def counts(self, texts: List[str]) -> sp.csr_matrix:
+        """Raw term counts per hashed column (texts x n_features)"""
+        return sp.csr_matrix(self._hasher().transform(texts))
+
+    def _weight(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """Counts x IDF, L2-normalized (without an n_features x n_features diagonal)"""
+        counts.data *= self.idf_[counts.indices]
+        return normalize(counts)
+
+    def fit_transform(self, texts: List[str]) -> sp.csr_matrix:
+        """
+        Compute the IDF table from the texts and return their TF-IDF rows
+
+        Raises:
+            ValueError: If the texts contain no terms (like TfidfVectorizer)
+        """
+        counts = self.counts(texts)
+        if counts.nnz == 0:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+        df = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf_ = _smooth_idf(df, counts.shape[0])
+        return self._weight(counts)
+
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        """TF-IDF rows of texts with the current IDF table"""
+        return self._weight(self.counts(texts))
+
+
+class TfidfIndex:
+    """
+    Incrementally updatable TF-IDF index over keyed rows (no AI)
+
+    - add_document() appends a single row using the current vocabulary
+    - remove_document() marks the row as a tombstone (skipped while ranking)
+    - IDF weights are refreshed from document frequencies on the next search,
+      by rescaling the existing rows instead of re-tokenizing the corpus
+    - Once enough rows changed since the last full fit, a compaction
+      (full refit without tombstones) runs in a background thread
+
+    Subclasses define where row texts come from (_load_text) and the
+    artifact name used by save_index()/load_index().
+
+    fork() returns a copy-on-write copy: the fitted matrix and vectorizer
+    are replaced, never modified, so they are shared; only the row
+    bookkeeping is copied.
+    """
+
+    index_name = "tfidf"  # Prefix of the on-disk artifact files
+    cache_texts = True    # Keep loaded texts in doc_texts
+
+    def __init__(self, auto_compact: bool = True):
+        """
+        Args:
+            auto_compact: Compact in a background thread once enough rows
+                changed; False if the owner schedules compactions itself
+        """
         # Normalize Turkish characters for better search results
         # İ→i, Ş→s, Ç→c, Ğ→g, Ü→u, Ö→o
-        def turkish_normalizer(text):
-            """
-            Normalize Turkish and English text for TF-IDF.
-            Converts Turkish characters to ASCII equivalents.
-            Example: "BİTİRME" → "bitirme", "çalışma" → "calisma"
-            """
-            return unidecode(text).lower()
-
-        self.vectorizer = TfidfVectorizer(
+        self.vectorizer = self._new_vectorizer()
+        self.doc_vectors = None
+        self.doc_ids = []
+        self.doc_texts = {}
+
+        # Incremental index state
+        self._lock = threading.RLock()
+        self._row_of: Dict[str, int] = {}     # key -> row in doc_vectors
+        self._tombstones = set()              # rows of deleted keys
+        self._df: Optional[np.ndarray] = None  # document frequency of live rows
+        self._pending_rows: List[sp.csr_matrix] = []  # raw counts of appended rows
+        self._dirty = False                   # IDF/rows need refreshing
+        self._changes_since_fit = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.auto_compact = auto_compact
+        self._unsaved = False                 # changes not yet written by save_index()
+        self.generation = 0                   # bumped on every change of the ranking
+        self.fit_generation = 0               # id of the last full fit (new vocabulary)
+
+    @staticmethod
+    def _new_vectorizer() -> Union[TfidfVectorizer, HashingTfidfVectorizer]:
+        """
+        Create an unfitted vectorizer with the project-wide configuration
+
+        settings.tfidf_vectorizer selects a fitted vocabulary capped at
+        tfidf_max_features terms ("vocabulary") or feature hashing into
+        tfidf_hash_features columns ("hashing")
+        """
+        if settings.tfidf_vectorizer == "hashing":
+            return HashingTfidfVectorizer(
+                n_features=settings.tfidf_hash_features,
+                preprocessor=turkish_normalizer
+            )
+        return TfidfVectorizer(
             max_features=settings.tfidf_max_features,
             stop_words='english',
             lowercase=False,  # We handle lowercasing in preprocessor
             preprocessor=turkish_normalizer
         )
-        self.doc_vectors = None
-        self.doc_ids = []
-        self.doc_texts = {}
 
-    def load_documents(self) -> None:
+    def _load_text(self, key: str) -> str:
+        """Load the text of a row from its source (implemented by subclasses)"""
+        raise NotImplementedError
+
+    def _get_text(self, key: str) -> str:
+        """Return a row's text, loading it on first use"""
+        text = self.doc_texts.get(key)
+        if text is None:
+            text = self._load_text(key)
+            if self.cache_texts:
+                self.doc_texts[key] = text
+        return text
+
+    def build(self, texts: Dict[str, str]) -> None:
         """
-        Load all documents from metadata and build search index
+        Fit the index from scratch
+
+        Args:
+            texts: Mapping of row key -> text, in row order
+        """
+        vectorizer, doc_vectors = self._fit_vectors(list(texts.values()))
+        self._install_fit(list(texts), texts if self.cache_texts else {}, vectorizer, doc_vectors)
+
+    def _fit_vectors(self, texts: List[str]):
+        """
+        Fit a fresh vectorizer on the given texts (no shared state touched)
+
+        Returns:
+            Tuple of (vectorizer, TF-IDF matrix), or (None, None) for no texts
+        """
+        if not texts:
+            return None, None
+
+        vectorizer = clone(self.vectorizer)
+        try:
+            doc_vectors = vectorizer.fit_transform(texts)
+        except ValueError:
+            # Empty vocabulary (e.g. only stop words) - nothing to index yet
+            return None, None
+        return vectorizer, doc_vectors
+
+    def _install_fit(self, doc_ids: List[str], doc_texts: Dict[str, str],
+                     vectorizer: Optional[TfidfVectorizer], doc_vectors) -> None:
+        """Replace the whole index with a freshly fitted one"""
+        with self._lock:
+            if vectorizer is not None:
+                self.vectorizer = vectorizer
+            self.doc_vectors = doc_vectors
+            self.doc_ids = list(doc_ids) if doc_vectors is not None else []
+            self.doc_texts = doc_texts
+            self._row_of = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+            self._tombstones = set()
+            self._df = None
+            self._pending_rows = []
+            self._dirty = False
+            self._changes_since_fit = 0
+            self._unsaved = True
+            self.generation += 1
+            self.fit_generation = next(_fit_ids)
+
+    def fork(self) -> "TfidfIndex":
+        """
+        Copy-on-write copy to apply the next changes to
+
+        The fitted matrix and the vectorizer are shared (both are replaced,
+        never modified); the row bookkeeping is copied, so changes to the
+        copy leave this index as it is.
+        """
+        with self._lock:
+            fork = copy.copy(self)
+            fork._lock = threading.RLock()
+            fork.doc_ids = list(self.doc_ids)
+            fork.doc_texts = dict(self.doc_texts)
+            fork._row_of = dict(self._row_of)
+            fork._tombstones = set(self._tombstones)
+            fork._df = None if self._df is None else self._df.copy()
+            fork._pending_rows = list(self._pending_rows)
+            fork._compaction_thread = None
+            return fork
+
+    # ============ Incremental updates ============
+
+    def add_document(self, doc_id: str, text: str) -> None:
+        """
+        Add (or replace) a single document without refitting the corpus
+
+        Cost depends only on the size of the new document: it is tokenized
+        with the current vocabulary and appended as a new row. Terms outside
+        the vocabulary become searchable after the next compaction.
+
+        Args:
+            doc_id: Document ID (row key)
+            text: Extracted document text
+        """
+        self.add_documents({doc_id: text})
+
+    def add_documents(self, texts: Dict[str, str]) -> None:
+        """
+        Add (or replace) several rows at once
+
+        Args:
+            texts: Mapping of row key -> text
+        """
+        with self._lock:
+            self._add_texts(texts)
+        self._maybe_schedule_compaction()
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document by marking its row as a tombstone
+
+        Args:
+            doc_id: Document ID (row key)
+
+        Returns:
+            True if the document was indexed, False otherwise
+        """
+        with self._lock:
+            removed = self._remove_key(doc_id)
+        self._maybe_schedule_compaction()
+        return removed
+
+    def _add_texts(self, texts: Dict[str, str]) -> None:
+        """Append rows for the given texts (caller holds the lock)"""
+        for key in texts:
+            self._remove_key(key)
+
+        if self.doc_vectors is None:
+            # Empty index: a full fit over the known texts is already cheap
+            pending = dict(self.doc_texts)
+            pending.update(texts)
+            self.build(pending)
+            return
+
+        self._ensure_df()
+        for key, text in texts.items():
+            counts = self._count_vector(text)
+
+            self._row_of[key] = len(self.doc_ids)
+            self.doc_ids.append(key)
+            if self.cache_texts:
+                self.doc_texts[key] = text
+            self._pending_rows.append(counts)
+            self._df[counts.indices] += 1
+
+        self._dirty = True
+        self._changes_since_fit += len(texts)
+        self._unsaved = True
+        self.generation += 1
+
+    def _remove_key(self, key: str) -> bool:
+        """Tombstone the row of a key (caller holds the lock)"""
+        self.doc_texts.pop(key, None)
+        row = self._row_of.pop(key, None)
+        if row is None:
+            return False
+
+        self._ensure_df()
+        self._df[self._row_terms(row)] -= 1
+        self._tombstones.add(row)
+        self._dirty = True
+        self._changes_since_fit += 1
+        self._unsaved = True
+        self.generation += 1
+        return True
+
+    @property
+    def hashing(self) -> bool:
+        """True if terms are hashed into columns instead of looked up in a vocabulary"""
+        return isinstance(self.vectorizer, HashingTfidfVectorizer)
+
+    def _vectorizer_config(self) -> Dict:
+        """Vectorizer settings a saved artifact must match"""
+        if self.hashing:
+            return {"mode": "hashing", "n_features": self.vectorizer.n_features}
+        return {"mode": "vocabulary", "max_features": self.vectorizer.max_features}
+
+    def _count_vector(self, text: str) -> sp.csr_matrix:
+        """Raw term counts of a text over the current vocabulary (1 x V)"""
+        if self.hashing:
+            return self.vectorizer.counts([text])
+
+        vocabulary = self.vectorizer.vocabulary_
+        analyzer = self.vectorizer.build_analyzer()
+
+        counts: Dict[int, int] = {}
+        for token in analyzer(text):
+            col = vocabulary.get(token)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+
+        cols = np.array(sorted(counts), dtype=np.int32)
+        data = np.array([counts[c] for c in cols], dtype=np.float64)
+        return sp.csr_matrix(
+            (data, cols, np.array([0, len(cols)])),
+            shape=(1, len(vocabulary))
+        )
+
+    def _row_terms(self, row: int) -> np.ndarray:
+        """Column indices of the terms present in a row"""
+        fitted_rows = self.doc_vectors.shape[0]
+        if row < fitted_rows:
+            start, end = self.doc_vectors.indptr[row], self.doc_vectors.indptr[row + 1]
+            return self.doc_vectors.indices[start:end]
+        return self._pending_rows[row - fitted_rows].indices
+
+    def _ensure_df(self) -> None:
+        """Derive document frequencies from the fitted matrix (once per fit)"""
+        if self._df is None:
+            n_terms = self.doc_vectors.shape[1]
+            self._df = np.bincount(self.doc_vectors.indices, minlength=n_terms).astype(np.int64)
+
+    def _refresh_weights(self) -> None:
         """
-        metadata_path = settings.metadata_file
+        Bring doc_vectors up to date after incremental changes
 
-        if not metadata_path.exists():
-            self.doc_ids = []
-            self.doc_texts = {}
+        Recomputes IDF from the maintained document frequencies, rescales the
+        existing (L2-normalized) rows by new_idf / old_idf and appends the
+        pending rows. This is a vectorized pass over the matrix - no text is
+        re-read or re-tokenized.
+        """
+        if not self._dirty:
             return
 
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        n_live = len(self.doc_ids) - len(self._tombstones)
+        old_idf = self.vectorizer.idf_
+        new_idf = _smooth_idf(self._df, n_live)
+
+        doc_vectors = normalize(self.doc_vectors @ sp.diags(new_idf / old_idf))
+        if self._pending_rows:
+            new_rows = normalize(sp.vstack(self._pending_rows) @ sp.diags(new_idf))
+            doc_vectors = sp.vstack([doc_vectors, new_rows])
+
+        self.doc_vectors = sp.csr_matrix(doc_vectors)
+        self.vectorizer = self._with_idf(new_idf)
+        self._pending_rows = []
+        self._dirty = False
+
+    def _with_idf(self, idf: np.ndarray) -> Union[TfidfVectorizer, HashingTfidfVectorizer]:
+        """Copy of the fitted vectorizer with other IDF weights (vocabulary shared)"""
+        vectorizer = clone(self.vectorizer)
+        if not self.hashing:
+            vectorizer.vocabulary_ = self.vectorizer.vocabulary_
+        vectorizer.idf_ = idf
+        return vectorizer
 
-        documents = metadata.get('documents', [])
+    # ============ Compaction ============
 
-        if not documents:
-            self.doc_ids = []
-            self.doc_texts = {}
+    def needs_compaction(self) -> bool:
+        """True once enough rows changed since the last full fit"""
+        with self._lock:
+            threshold = max(1, settings.index_compaction_threshold * len(self.doc_ids))
+            return self._changes_since_fit >= threshold
+
+    def _maybe_schedule_compaction(self) -> None:
+        """Start a background compaction once enough rows changed since the last fit"""
+        if not self.auto_compact or not self.needs_compaction():
             return
+        with self._lock:
+            thread = self._compaction_thread
+            if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+                return
+
+            self._compaction_thread = threading.Thread(
+                target=self.compact, name=f"{self.index_name}-compaction", daemon=True
+            )
+            self._compaction_thread.start()
+
+    def compact(self) -> None:
+        """
+        Refit the index without tombstones (re-selects the vocabulary)
+
+        The expensive fit runs without holding the lock, so searches and
+        incremental updates keep working. Rows added or removed while
+        fitting are reconciled incrementally before the new index is swapped
+        in; they count as changes since the new fit, so a compaction follows
+        once enough of them piled up.
+        """
+        fit = self._fit_live_rows()
+        texts: Dict[Tuple[str, int], Optional[str]] = {}
+        installed = False
+        while not installed:
+            # Texts of rows added meanwhile are read before taking the lock
+            self._read_replay_texts(fit, texts)
+            with self._lock:
+                installed = self._install_compaction(fit, texts)
+
+        self.save_index()
+        self._maybe_schedule_compaction()
+
+    def _fit_live_rows(self) -> tuple:
+        """
+        Expensive half of a compaction: fit over the live rows (lock not held
+        while fitting)
 
-        # Load text for each document
-        texts = []
-        valid_docs = []
+        Returns:
+            Tuple of (keys, texts, vectorizer, doc_vectors, rows at the start)
+            for _install_compaction()
+        """
+        with self._lock:
+            doc_ids = [d for d in self.doc_ids if d in self._row_of]
+            n_rows = len(self.doc_ids)
 
-        for doc in documents:
-            doc_id = doc['doc_id']
+        texts = {}
+        for doc_id in doc_ids:
             try:
-                text = load_extracted_text(doc_id)
-                texts.append(text)
-                valid_docs.append(doc)
-                self.doc_texts[doc_id] = text
+                texts[doc_id] = self._get_text(doc_id)
             except FileNotFoundError:
-                # Skip documents with missing text files
+                # Deleted meanwhile - handled by the replay below
                 continue
+        doc_ids = [d for d in doc_ids if d in texts]
+
+        vectorizer, doc_vectors = self._fit_vectors([texts[d] for d in doc_ids])
+        return doc_ids, texts, vectorizer, doc_vectors, n_rows
+
+    def _replay_rows(self, fit: tuple) -> Tuple[List[str], List[Tuple[str, int]]]:
+        """
+        Changes since a fit from _fit_live_rows() started (caller holds the lock)
+
+        Returns:
+            Tuple of (keys removed, (key, row) of live rows missing from the
+            fit: added or replaced meanwhile, or unreadable while fitting)
+        """
+        doc_ids, _, _, _, n_rows = fit
+        fitted = set(doc_ids)
+        removed = [key for key in doc_ids if key not in self._row_of]
+        added = [(key, row) for key, row in self._row_of.items() if row >= n_rows or key not in fitted]
+        return removed, added
+
+    def _read_replay_texts(self, fit: tuple, texts: Dict[Tuple[str, int], Optional[str]]) -> None:
+        """Read the texts of the rows to replay that are not in texts yet (no lock held while reading)"""
+        with self._lock:
+            _, added = self._replay_rows(fit)
+
+        for key, row in added:
+            if (key, row) not in texts:
+                try:
+                    texts[(key, row)] = self._get_text(key)
+                except FileNotFoundError:
+                    texts[(key, row)] = None  # deleted meanwhile
+
+    def _install_compaction(self, fit: tuple, texts: Dict[Tuple[str, int], Optional[str]]) -> bool:
+        """
+        Cheap half of a compaction: install a fit from _fit_live_rows() and
+        replay the rows added or removed since (caller holds the lock)
+
+        Args:
+            fit: Result of _fit_live_rows()
+            texts: Texts of the rows to replay, from _read_replay_texts()
 
-        if texts:
-            self.doc_ids = [doc['doc_id'] for doc in valid_docs]
-            # Build TF-IDF matrix
-            self.doc_vectors = self.vectorizer.fit_transform(texts)
+        Returns:
+            False (nothing installed) if rows were added after their texts were read
+        """
+        doc_ids, fitted_texts, vectorizer, doc_vectors, _ = fit
+        removed, added = self._replay_rows(fit)
+        if any(row_key not in texts for row_key in added):
+            return False
+
+        self._install_fit(doc_ids, fitted_texts if self.cache_texts else {}, vectorizer, doc_vectors)
+
+        # Replay changes that happened while fitting
+        for key in removed:
+            self._remove_key(key)
+        replayed = {key: texts[(key, row)] for key, row in added if texts[(key, row)] is not None}
+        if replayed:
+            self._add_texts(replayed)
+        # The replayed rows are changes since the new fit (out of its vocabulary)
+        self._changes_since_fit = len(removed) + len(replayed)
+        return True
+
+    # ============ Persistence ============
+
+    def save_index(self) -> bool:
+        """
+        Persist the fitted index as a versioned on-disk artifact
+
+        Layout (in settings.index_dir, prefixed with index_name):
+        - <name>_index.npz: CSR document matrix (live rows only), IDF vector
+          and vocabulary terms ordered by column (none in hashing mode)
+        - <name>_manifest.json: format version, vectorizer config, row keys
+          in order and matrix shape, used to validate the .npz on load
+
+        Returns:
+            True if an index was written, False if there was nothing to save
+        """
+        with self._lock:
+            if self.doc_vectors is None or not self._unsaved:
+                return False
+
+            self._refresh_weights()
+            live_rows = [row for row in range(len(self.doc_ids)) if row not in self._tombstones]
+            doc_vectors = self.doc_vectors[live_rows]
+            doc_ids = [self.doc_ids[row] for row in live_rows]
+            idf = self.vectorizer.idf_.copy()
+            vocabulary = {} if self.hashing else self.vectorizer.vocabulary_
+            terms = np.empty(len(vocabulary), dtype=object)
+            for term, col in vocabulary.items():
+                terms[col] = term
+            self._unsaved = False
+
+        index_dir = settings.index_dir
+        index_dir.mkdir(parents=True, exist_ok=True)
+        matrix_file, manifest_file = self._artifact_paths()
+
+        # Write to temporary files first, then atomically replace
+        matrix_tmp = matrix_file.with_suffix('.tmp')
+        with open(matrix_tmp, 'wb') as f:
+            np.savez(
+                f,
+                data=doc_vectors.data,
+                indices=doc_vectors.indices,
+                indptr=doc_vectors.indptr,
+                shape=np.array(doc_vectors.shape),
+                idf=idf,
+                terms=terms.astype(str)
+            )
+        os.replace(matrix_tmp, matrix_file)
+
+        manifest = {
+            "version": INDEX_FORMAT_VERSION,
+            "index_name": self.index_name,
+            "created_at": datetime.now().isoformat(),
+            "vectorizer": self._vectorizer_config(),
+            "shape": list(doc_vectors.shape),
+            "nnz": int(doc_vectors.nnz),
+            "doc_ids": doc_ids
+        }
+        manifest_tmp = manifest_file.with_suffix('.tmp')
+        with open(manifest_tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(manifest_tmp, manifest_file)
+
+        return True
 
-    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+    def load_index(self) -> bool:
         """
-        Search documents using TF-IDF cosine similarity
+        Load the persisted artifact written by save_index()
+
+        Returns:
+            True if a valid artifact was installed, False if it is missing or
+            was written by another format version/vectorizer config
+        """
+        matrix_path, manifest_path = self._artifact_paths()
+
+        if not manifest_path.exists() or not matrix_path.exists():
+            return False
+
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            if manifest.get("version") != INDEX_FORMAT_VERSION:
+                return False
+            if manifest.get("vectorizer") != self._vectorizer_config():
+                return False
+
+            with np.load(matrix_path, allow_pickle=False) as data:
+                shape = tuple(int(x) for x in data['shape'])
+                doc_vectors = sp.csr_matrix(
+                    (data['data'], data['indices'], data['indptr']), shape=shape
+                )
+                idf = data['idf']
+                terms = data['terms']
+        except (OSError, ValueError, KeyError):
+            return False
+
+        doc_ids = manifest.get("doc_ids", [])
+        n_columns = self.vectorizer.n_features if self.hashing else len(terms)
+        if list(shape) != manifest.get("shape") or doc_vectors.nnz != manifest.get("nnz") \
+                or len(doc_ids) != shape[0] or n_columns != shape[1] or len(idf) != shape[1]:
+            return False
+
+        vectorizer = clone(self.vectorizer)
+        if not self.hashing:
+            vectorizer.vocabulary_ = {str(term): col for col, term in enumerate(terms)}
+        vectorizer.idf_ = idf
+        # Texts are loaded lazily instead of all at startup
+        self._install_fit(doc_ids, {}, vectorizer, doc_vectors)
+        self._unsaved = False
+        return True
+
+    def _artifact_paths(self) -> Tuple[Path, Path]:
+        """Paths of the (matrix, manifest) files of this index"""
+        return (
+            settings.index_dir / f"{self.index_name}_index.npz",
+            settings.index_dir / f"{self.index_name}_manifest.json"
+        )
+
+    # ============ Querying ============
+
+    def _similarities(self, query: str, rows: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Cosine similarity of the query against the rows (caller holds the lock)
 
         Args:
             query: Search query
-            top_k: Number of results to return
+            rows: Live rows to score (sub-matrix); None scores every row
 
         Returns:
-            List of search results with scores
+            Scores per row (tombstones scored 0), or None for an empty index
         """
         if not self.doc_ids or self.doc_vectors is None:
-            return []
+            return None
+
+        self._refresh_weights()
 
         # Transform query to TF-IDF vector
         query_vector = self.vectorizer.transform([query])
 
+        if rows is not None:
+            return cosine_similarity(query_vector, self.doc_vectors[rows]).flatten()
+
         # Calculate cosine similarity
         similarities = cosine_similarity(query_vector, self.doc_vectors).flatten()
 
-        # Get top K results
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        # Deleted rows never rank
+        if self._tombstones:
+            similarities[list(self._tombstones)] = 0
 
-        # Filter out results with zero similarity
-        results = []
-        for idx in top_indices:
-            score = float(similarities[idx])
-            if score > 0:
-                doc_id = self.doc_ids[idx]
-                text = self.doc_texts[doc_id]
-                snippet = extract_snippet(text, query, context_words=15)
-
-                results.append({
-                    'doc_id': doc_id,
-                    'score': round(score, 4),
-                    'snippet': snippet
-                })
+        return similarities
 
-        return results
+    def matrix(self) -> Optional[sp.csr_matrix]:
+        """TF-IDF matrix with up-to-date weights (tombstoned rows included), None if empty"""
+        with self._lock:
+            if self.doc_vectors is None:
+                return None
+            self._refresh_weights()
+            return self.doc_vectors
+
+    def rank(self, query: str, top_k: int, keys: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank rows by TF-IDF cosine similarity
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            keys: Only score these rows (sub-matrix); None = all
+
+        Returns:
+            List of (key, score) with non-zero scores, best first
+        """
+        with self._lock:
+            rows = None
+            if keys is not None:
+                rows = np.array(sorted(
+                    self._row_of[key] for key in keys if key in self._row_of
+                ), dtype=np.int64)
+                if len(rows) == 0:
+                    return []
+
+            similarities = self._similarities(query, rows)
+            if similarities is None:
+                return []
+
+            # Get top K results (partial selection, only k rows get sorted)
+            top_indices = top_k_indices(similarities, top_k)
+            top_rows = top_indices if rows is None else rows[top_indices]
+
+            # Filter out results with zero similarity
+            return [
+                (self.doc_ids[row], float(similarities[idx]))
+                for idx, row in zip(top_indices, top_rows)
+                if similarities[idx] > 0
+            ]
+
+    def rank_many(self, queries: List[str], top_ks: List[int]) -> List[List[Tuple[str, float]]]:
+        """
+        Rank rows for several queries with one sparse matrix product
+
+        Query and document rows are both L2-normalized, so the dot product
+        equals the cosine similarity. The product stays sparse: only
+        rows sharing a term with a query get a score.
+
+        Returns:
+            One list of (key, score) per query, best first
+        """
+        if not queries:
+            return []
+
+        with self._lock:
+            if not self.doc_ids or self.doc_vectors is None:
+                return [[] for _ in queries]
+
+            self._refresh_weights()
+            query_vectors = self.vectorizer.transform(queries)
+            scores = sp.csr_matrix(query_vectors @ self.doc_vectors.T)
+            scores.sort_indices()
+            tombstones = np.array(sorted(self._tombstones), dtype=np.int64)
+
+            ranked = []
+            for i, top_k in enumerate(top_ks):
+                start, end = scores.indptr[i], scores.indptr[i + 1]
+                rows = scores.indices[start:end]
+                row_scores = scores.data[start:end]
+
+                # Deleted rows never rank, zero scores are no match
+                keep = row_scores > 0
+                if len(tombstones):
+                    keep &= ~np.isin(rows, tombstones)
+                rows, row_scores = rows[keep], row_scores[keep]
+
+                top = top_k_indices(row_scores, top_k)
+                ranked.append([(self.doc_ids[rows[j]], float(row_scores[j])) for j in top])
+
+            return ranked
+
+
+class DocumentIndex(TfidfIndex):
+    """Document-level TF-IDF index; texts are read from the document store"""
+
+    cache_texts = False
+
+    def _load_text(self, doc_id: str) -> str:
+        return load_extracted_text(doc_id)
+
+
+class PassageIndex(TfidfIndex):
+    """
+    Passage-level TF-IDF index for the RAG pipeline (no AI)
+
+    Documents are split with overlapping word windows; each passage is one
+    row keyed "<doc_id>:<start>:<end>" (character offsets into the document
+    text), so passages are sliced from the document text on demand instead
+    of being stored twice.
+
+    A doc_id -> live rows map is kept up to date on every add/remove, so
+    removing or scoping to a document never scans the passage keys.
+    """
+
+    index_name = "passages"
+    cache_texts = False
+
+    def __init__(self, doc_text_loader: Callable[[str], str], auto_compact: bool = True):
+        super().__init__(auto_compact)
+        self._doc_text = doc_text_loader
+        self.chunk_size = settings.passage_chunk_size
+        self.overlap = settings.passage_overlap
+        self._doc_rows: Dict[str, Tuple[int, ...]] = {}  # doc_id -> live rows (replaced, never mutated)
+
+    @staticmethod
+    def passage_key(doc_id: str, start: int, end: int) -> str:
+        """Row key of a passage"""
+        return f"{doc_id}:{start}:{end}"
+
+    @staticmethod
+    def parse_key(key: str) -> Tuple[str, int, int]:
+        """Split a passage key into (doc_id, start, end)"""
+        doc_id, start, end = key.rsplit(':', 2)
+        return doc_id, int(start), int(end)
+
+    def _load_text(self, key: str) -> str:
+        doc_id, start, end = self.parse_key(key)
+        return self._doc_text(doc_id)[start:end]
+
+    def fork(self) -> "PassageIndex":
+        with self._lock:
+            fork = super().fork()
+            fork._doc_rows = dict(self._doc_rows)
+            return fork
+
+    def _install_fit(self, doc_ids: List[str], doc_texts: Dict[str, str],
+                     vectorizer: Optional[TfidfVectorizer], doc_vectors) -> None:
+        with self._lock:
+            super()._install_fit(doc_ids, doc_texts, vectorizer, doc_vectors)
+            self._rebuild_doc_rows()
+
+    def _install_compaction(self, fit: tuple, texts: Dict[Tuple[str, int], Optional[str]]) -> bool:
+        installed = super()._install_compaction(fit, texts)
+        if installed:
+            # The replay may have tombstoned single passages
+            self._rebuild_doc_rows()
+        return installed
+
+    def _rebuild_doc_rows(self) -> None:
+        """Derive the doc_id -> rows map from the row keys (once per fit, caller holds the lock)"""
+        doc_rows: Dict[str, List[int]] = {}
+        for key, row in self._row_of.items():
+            doc_rows.setdefault(self.parse_key(key)[0], []).append(row)
+        self._doc_rows = {doc_id: tuple(rows) for doc_id, rows in doc_rows.items()}
+
+    def _add_texts(self, texts: Dict[str, str]) -> None:
+        super()._add_texts(texts)
+        new_rows: Dict[str, List[int]] = {}
+        for key in texts:
+            new_rows.setdefault(self.parse_key(key)[0], []).append(self._row_of[key])
+        for doc_id, rows in new_rows.items():
+            known = self._doc_rows.get(doc_id, ())
+            self._doc_rows[doc_id] = known + tuple(row for row in rows if row not in known)
+
+    def split(self, doc_id: str, text: str) -> Dict[str, str]:
+        """Split a document into passages keyed by their offsets"""
+        chunks = chunk_text_with_offsets(
+            text,
+            chunk_size=self.chunk_size,
+            overlap=self.overlap
+        )
+        return {
+            self.passage_key(doc_id, chunk['start'], chunk['end']): chunk['text']
+            for chunk in chunks
+        }
+
+    def build_from_documents(self, doc_texts: Dict[str, str]) -> None:
+        """Fit the passage index from scratch over whole documents"""
+        texts = {}
+        for doc_id, text in doc_texts.items():
+            texts.update(self.split(doc_id, text))
+        self.build(texts)
+
+    def add_passages(self, doc_id: str, text: str) -> None:
+        """Index (or re-index) all passages of a document"""
+        with self._lock:
+            self._remove_doc(doc_id)
+            passages = self.split(doc_id, text)
+            if passages:
+                self._add_texts(passages)
+        self._maybe_schedule_compaction()
+
+    def remove_passages(self, doc_id: str) -> None:
+        """Tombstone all passages of a document"""
+        with self._lock:
+            self._remove_doc(doc_id)
+        self._maybe_schedule_compaction()
+
+    def _remove_doc(self, doc_id: str) -> None:
+        """Tombstone the passages of a document (caller holds the lock)"""
+        for row in self._doc_rows.pop(doc_id, ()):
+            self._remove_key(self.doc_ids[row])
+
+    def indexed_doc_ids(self) -> set:
+        """Documents that currently have passages in the index"""
+        with self._lock:
+            return set(self._doc_rows)
+
+    def rows_of_documents(self, doc_ids: Sequence[str]) -> np.ndarray:
+        """Sorted live passage rows of the given documents (doc_id -> rows lookups)"""
+        with self._lock:
+            rows = [row for doc_id in set(doc_ids) for row in self._doc_rows.get(doc_id, ())]
+            return np.array(sorted(rows), dtype=np.int64)
+
+    def search(self, query: str, top_k: int = 5,
+               doc_ids: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Find the passages most similar to the query
+
+        Args:
+            query: Search query / question
+            top_k: Number of passages to return
+            doc_ids: Only score passages of these documents (sub-matrix); None = all
+
+        Returns:
+            List of passages (doc_id, start, end, page, text, score), best first
+        """
+        with self._lock:
+            rows = None
+            if doc_ids is not None:
+                rows = self.rows_of_documents(doc_ids)
+                if len(rows) == 0:
+                    return []
+
+            similarities = self._similarities(query, rows)
+            if similarities is None:
+                return []
+
+            top_indices = top_k_indices(similarities, top_k)
+
+            results = []
+            for idx in top_indices:
+                score = float(similarities[idx])
+                if score > 0:
+                    key = self.doc_ids[idx if rows is None else rows[idx]]
+                    doc_id, start, end = self.parse_key(key)
+                    results.append({
+                        'doc_id': doc_id,
+                        'start': start,
+                        'end': end,
+                        'page': page_number(doc_id, start),
+                        'text': self._get_text(key),
+                        'score': round(score, 4)
+                    })
+
+            return results
+
+
+Ranking = List[Tuple[str, float]]  # (doc_id, score), best first
+
+
+class RetrievalPipeline:
+    """
+    Hybrid retrieval: several ranking engines fused into one top k (no AI)
+
+    Each engine is a function (query, depth, allowed doc_ids, snapshot) ->
+    Ranking that returns a bounded candidate list (FUSION_DEPTH x top_k) instead of
+    scoring into a full result list. The engines run in parallel on a
+    thread pool (the numpy/scipy kernels release the GIL) and their lists
+    are merged by settings.fusion_strategy:
+    - "rrf": reciprocal rank fusion, sum of 1 / (rrf_k + rank)
+    - "weighted": weighted sum of max-normalized scores (semantic gets
+      settings.semantic_weight, lexical engines share the rest)
+
+    Stage timings (milliseconds) are returned per call and aggregated for
+    stats().
+    """
+
+    def __init__(self, engines: Dict[str, Callable[[str, int, Optional[Sequence[str]], "IndexSnapshot"], Ranking]]):
+        """
+        Args:
+            engines: Ranking function per engine name
+        """
+        self.engines = engines
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {}  # stage -> [calls, total ms, max ms]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        """Shared worker pool, created on first parallel query"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.retrieval_workers, thread_name_prefix="retrieval"
+                )
+            return self._executor
+
+    def _timed(self, name: str, query: str, depth: int, doc_ids: Optional[Sequence[str]],
+               snapshot: "IndexSnapshot") -> Tuple[Ranking, float]:
+        start = time.perf_counter()
+        ranking = self.engines[name](query, depth, doc_ids, snapshot)
+        return ranking, (time.perf_counter() - start) * 1000
+
+    def run(self, query: str, top_k: int, names: Sequence[str], snapshot: "IndexSnapshot",
+            doc_ids: Optional[Sequence[str]] = None,
+            precomputed: Optional[Dict[str, Ranking]] = None,
+            timings: Optional[Dict[str, float]] = None) -> Ranking:
+        """
+        Rank with every named engine and fuse the candidate lists
+
+        Args:
+            query: Ranking text
+            top_k: Number of results to return
+            names: Engines to run (one engine = its own ranking, no fusion)
+            snapshot: Indexes the query started on
+            doc_ids: Documents the engines may return (None = all)
+            precomputed: Rankings already computed for some engines (at
+                least depth(top_k, len(names)) deep)
+            timings: Dict that receives the time of each stage
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        timings = {} if timings is None else timings
+        depth = self.depth(top_k, len(names))
+        rankings = dict(precomputed or {})
+        todo = [name for name in names if name not in rankings]
+
+        if len(todo) > 1 and settings.retrieval_workers > 1:
+            pool = self._pool()
+            futures = {
+                name: pool.submit(self._timed, name, query, depth, doc_ids, snapshot)
+                for name in todo
+            }
+            for name, future in futures.items():
+                rankings[name], timings[name] = future.result()
+        else:
+            for name in todo:
+                rankings[name], timings[name] = self._timed(name, query, depth, doc_ids, snapshot)
+
+        if len(names) == 1:
+            return rankings[names[0]][:top_k]
+
+        start = time.perf_counter()
+        fused = self.fuse({name: rankings[name] for name in names}, top_k)
+        timings['fusion'] = (time.perf_counter() - start) * 1000
+        return fused
+
+    @staticmethod
+    def depth(top_k: int, n_engines: int) -> int:
+        """Candidates per engine: deeper lists when they are fused"""
+        return top_k * FUSION_DEPTH if n_engines > 1 else top_k
+
+    @staticmethod
+    def weights(names: Sequence[str]) -> List[float]:
+        """Weighted-fusion weight of each engine"""
+        lexical = [name for name in names if name != "semantic"]
+        if not lexical or len(lexical) == len(names):
+            return [1 / len(names)] * len(names)
+        semantic_weight = settings.semantic_weight
+        return [
+            semantic_weight if name == "semantic" else (1 - semantic_weight) / len(lexical)
+            for name in names
+        ]
+
+    def fuse(self, rankings: Dict[str, Ranking], top_k: int) -> Ranking:
+        """Merge the candidate lists with the configured strategy"""
+        names = list(rankings)
+        lists = [rankings[name] for name in names]
+        if settings.fusion_strategy == "rrf":
+            return fuse_rrf(lists, top_k, k=settings.rrf_k)
+        return fuse_weighted(lists, self.weights(names), top_k)
+
+    def record(self, timings: Dict[str, float]) -> None:
+        """Add the stage timings of one query to the aggregated stats"""
+        with self._stats_lock:
+            for stage, ms in timings.items():
+                entry = self._stages.setdefault(stage, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += ms
+                entry[2] = max(entry[2], ms)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Calls, mean and max milliseconds per stage"""
+        with self._stats_lock:
+            return {
+                stage: {
+                    "calls": int(calls),
+                    "mean_ms": round(total / calls, 3),
+                    "max_ms": round(maximum, 3)
+                }
+                for stage, (calls, total, maximum) in self._stages.items()
+            }
+
+
+class IndexSnapshot(NamedTuple):
+    """
+    Document TF-IDF, inverted, passage and near-duplicate index of one
+    corpus state (published once, never modified)
+
+    A write forks the current snapshot (copy-on-write, see fork()), applies
+    the change to the copies and publishes them in one assignment. A query
+    takes the current snapshot once and uses it to the end, so neither
+    writes nor rebuilds change the indexes under a running query (the
+    TF-IDF weights of appended rows are still refreshed lazily, which does
+    not change what the snapshot ranks). generation is bumped by every
+    published snapshot, so cached results of an older one never match again.
+    """
+    documents: DocumentIndex
+    inverted: InvertedIndex
+    passages: PassageIndex
+    near_duplicates: NearDuplicateIndex
+    generation: int = 0
+
+    def fork(self) -> "IndexSnapshot":
+        """Copy-on-write copies of all indexes, to apply the next write to"""
+        return IndexSnapshot(
+            self.documents.fork(), self.inverted.fork(), self.passages.fork(),
+            self.near_duplicates.fork(), self.generation
+        )
+
+
+def _documents_attribute(name: str) -> property:
+    """
+    Attribute of the current snapshot's document index, exposed on SearchService
+
+    Setting it is a write like any other: the document index is forked,
+    changed and published as a new snapshot.
+    """
+    def get(self):
+        return getattr(self._snapshot.documents, name)
+
+    def set(self, value):
+        with self._lock:
+            snapshot = self._snapshot
+            documents = snapshot.documents.fork()
+            setattr(documents, name, value)
+            self._publish(snapshot._replace(documents=documents))
+
+    return property(get, set, doc=f"{name} of the current document TF-IDF index")
+
+
+class SearchService:
+    """
+    Classical TF-IDF based search service (no AI)
+
+    Keeps four indexes in sync on every add/remove, held together by the
+    current IndexSnapshot:
+    - the document-level TF-IDF matrix (DocumentIndex, cosine ranking)
+    - an InvertedIndex with BM25 ranking (no vocabulary cap), used when
+      settings.search_engine == "bm25"
+    - a passage-level index (PassageIndex, used to build compact RAG contexts)
+    - a MinHash/LSH NearDuplicateIndex (signatures from metadata.json,
+      computed from the text for documents uploaded without one)
+
+    Ranking goes through a RetrievalPipeline over the "tfidf", "bm25" and
+    "semantic" engines (settings.retrieval_engines, or search_engine plus
+    "semantic" with settings.semantic_search). The semantic engine is an
+    LSA projection of the TF-IDF matrix (SemanticIndex, with an LSH nearest
+    neighbour index); it follows the TF-IDF rows lazily: refitted after a
+    full TF-IDF fit, new rows folded in on the next query.
+
+    Ranked results (including snippets) are kept in an LRU/TTL QueryCache,
+    keyed on the normalized query, top_k and filters and dropped whenever
+    index_generation changes.
+
+    Document texts are not kept in memory: they are read on demand from the
+    memory-mapped DocumentStore (through load_extracted_text), which keeps
+    only a small LRU of decoded hot documents.
+
+    Writes are copy-on-write: under the write lock the current snapshot is
+    forked, changed and published. Besides the indexed text, a write costs
+    a copy of the row bookkeeping and the term dictionaries (arrays and
+    matrices are shared); a batch shares one copy. Queries never take the
+    write lock. Compactions of the TF-IDF indexes refit in a background
+    thread and publish the refitted index the same way.
+
+    Rebuilds: load_documents()/rebuild_index() build a whole new snapshot
+    off to the side and publish it in one step; documents added or
+    removed while a rebuild runs are journaled and replayed on the new
+    indexes before publishing.
+    """
+
+    vectorizer = _documents_attribute("vectorizer")
+    doc_vectors = _documents_attribute("doc_vectors")
+    doc_ids = _documents_attribute("doc_ids")
+    doc_texts = _documents_attribute("doc_texts")
+    generation = _documents_attribute("generation")
+    fit_generation = _documents_attribute("fit_generation")
+
+    def __init__(self):
+        self._lock = threading.RLock()  # serializes writes (fork + publish)
+        self._snapshot = IndexSnapshot(
+            DocumentIndex(auto_compact=False), InvertedIndex(),
+            PassageIndex(self._get_text, auto_compact=False), NearDuplicateIndex()
+        )
+        self._journal: Optional[List[Tuple[str, Optional[str], Optional[Dict]]]] = None
+        self._rebuild_lock = threading.Lock()  # one rebuild at a time
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.semantic = SemanticIndex()
+        self._suggestions = (-1, -1, SuggestIndex())  # (index_generation, vocabulary_generation, prefix index)
+        self._suggest_lock = threading.Lock()
+        self._semantic_lock = threading.Lock()  # one fit/fold-in at a time
+        self.pipeline = RetrievalPipeline({
+            "tfidf": self._rank_tfidf,
+            "bm25": self._rank_bm25,
+            "semantic": lambda query, k, doc_ids, snapshot: self.search_semantic(
+                query, k, doc_ids, snapshot=snapshot
+            ),
+        })
+        self.cache = QueryCache(
+            max_size=settings.query_cache_size,
+            ttl=settings.query_cache_ttl
+        )
+
+    def snapshot(self) -> IndexSnapshot:
+        """Current indexes (a query reads this once)"""
+        return self._snapshot
+
+    @property
+    def documents(self) -> DocumentIndex:
+        return self._snapshot.documents
+
+    @property
+    def inverted(self) -> InvertedIndex:
+        return self._snapshot.inverted
+
+    @property
+    def passages(self) -> PassageIndex:
+        return self._snapshot.passages
+
+    @property
+    def near_duplicates(self) -> NearDuplicateIndex:
+        return self._snapshot.near_duplicates
+
+    @property
+    def index_generation(self) -> int:
+        """
+        Monotonically increasing number, bumped by every published snapshot
+        (add/remove, rebuild, load, background compaction)
+        """
+        return self._snapshot.generation
+
+    def _publish(self, snapshot: IndexSnapshot) -> None:
+        """Make a forked or freshly built snapshot the current one (caller holds the lock)"""
+        self._snapshot = snapshot._replace(generation=self._snapshot.generation + 1)
+
+    @staticmethod
+    def retrieval_engines() -> Tuple[str, ...]:
+        """Engines ranking /search queries, in fusion order"""
+        engines = tuple(dict.fromkeys(settings.retrieval_engines))
+        if not engines:
+            engines = (settings.search_engine,) + (("semantic",) if settings.semantic_search else ())
+        return engines
+
+    def _cache_key(self, kind: str, query: str, top_k: int, **filters) -> tuple:
+        """Cache key: normalized query, top_k, ranking engines and filter set"""
+        engines = self.retrieval_engines()
+        ranking = (engines, settings.fusion_strategy if len(engines) > 1 else None)
+        return (kind, ranking, normalize_query(query), top_k, tuple(sorted(filters.items())))
+
+    def pipeline_stats(self) -> Dict:
+        """Engines, fusion strategy and aggregated stage timings of /search"""
+        return {
+            "engines": list(self.retrieval_engines()),
+            "fusion_strategy": settings.fusion_strategy,
+            "stages": self.pipeline.stats()
+        }
+
+    def cache_stats(self) -> Dict:
+        """Query cache counters (hits, misses, evictions, ...)"""
+        return self.cache.stats()
+
+    def _get_text(self, doc_id: str) -> str:
+        """Text of a document (read from the document store)"""
+        return self._snapshot.documents._get_text(doc_id)
+
+    def build(self, texts: Dict[str, str]) -> None:
+        """
+        Fit the document TF-IDF index from scratch (other indexes unchanged)
+
+        Args:
+            texts: Mapping of doc_id -> text, in row order
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            documents = snapshot.documents.fork()
+            documents.build(texts)
+            self._publish(snapshot._replace(documents=documents))
+
+    def load_documents(self) -> None:
+        """
+        Load all documents from metadata and build search index
+
+        The indexes are built off to the side while searches keep using the
+        current ones, then published at once.
+        """
+        with self._lock:
+            self._journal = []  # record writes made while building
+
+        try:
+            metadata_path = settings.metadata_file
+
+            documents = []
+            if metadata_path.exists():
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                documents = metadata.get('documents', [])
+
+            # Load text for each document
+            doc_texts = {}
+
+            for doc in documents:
+                doc_id = doc['doc_id']
+                try:
+                    doc_texts[doc_id] = load_extracted_text(doc_id)
+                except FileNotFoundError:
+                    # Skip documents with missing text files
+                    continue
+
+            built = self._build_snapshot(doc_texts, {doc['doc_id']: doc for doc in documents})
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        self._swap(built)
+
+    def _empty_snapshot(self) -> IndexSnapshot:
+        """Unpublished empty indexes, with the vectorizer config and chunking of the live ones"""
+        live = self._snapshot
+        documents = DocumentIndex(auto_compact=False)
+        documents.vectorizer = clone(live.documents.vectorizer)
+        passages = PassageIndex(self._get_text, auto_compact=False)
+        passages.chunk_size, passages.overlap = live.passages.chunk_size, live.passages.overlap
+        return IndexSnapshot(documents, InvertedIndex(), passages, NearDuplicateIndex())
+
+    def _build_snapshot(self, doc_texts: Dict[str, str], documents: Dict[str, Dict]) -> IndexSnapshot:
+        """
+        Fit every index over the given texts without touching the live ones
+
+        Returns:
+            The new indexes, not published yet
+        """
+        built = self._empty_snapshot()
+        built.documents.build(doc_texts)
+        built.inverted.build(doc_texts, documents)
+        built.passages.build_from_documents(doc_texts)
+        for doc_id, text in doc_texts.items():
+            built.near_duplicates.add(doc_id, self._signature(text, documents.get(doc_id)))
+        return built
+
+    def _swap(self, built: IndexSnapshot) -> None:
+        """Replay journaled writes on freshly built indexes and publish them"""
+        with self._lock:
+            journal, self._journal = self._journal or [], None
+            # Not published yet, so the journal is applied to them in place
+            for doc_id, text, metadata in journal:
+                if text is None:
+                    self._remove(built, doc_id)
+                else:
+                    self._add(built, [(doc_id, text, metadata)])
+            self._publish(built)
+        if journal:
+            self._maybe_schedule_compaction()
+
+    def _add(self, snapshot: IndexSnapshot, documents: List[Tuple[str, str, Optional[Dict]]],
+             signatures: Optional[List[np.ndarray]] = None) -> None:
+        """Add documents to the indexes of an unpublished snapshot"""
+        if signatures is None:
+            signatures = [self._signature(text, metadata) for _, text, metadata in documents]
+        snapshot.documents.add_documents({doc_id: text for doc_id, text, _ in documents})
+        for (doc_id, text, metadata), signature in zip(documents, signatures):
+            snapshot.inverted.add_document(doc_id, text, metadata)
+            snapshot.passages.add_passages(doc_id, text)
+            snapshot.near_duplicates.add(doc_id, signature)
+
+    @staticmethod
+    def _remove(snapshot: IndexSnapshot, doc_id: str) -> bool:
+        """Remove a document from the indexes of an unpublished snapshot"""
+        removed = snapshot.documents.remove_document(doc_id)
+        snapshot.inverted.remove_document(doc_id)
+        snapshot.passages.remove_passages(doc_id)
+        snapshot.near_duplicates.remove(doc_id)
+        return removed
+
+    def add_document(self, doc_id: str, text: str, metadata: Optional[Dict] = None) -> None:
+        """
+        Add (or replace) a document in all indexes
+
+        Args:
+            doc_id: Document ID
+            text: Extracted document text
+            metadata: Document metadata entry (filename, uploaded_at) for field
+                filters, and its MinHash signature if computed at upload
+        """
+        self.add_document_batch([(doc_id, text, metadata)])
+
+    def add_document_batch(self, documents: List[Tuple[str, str, Optional[Dict]]]) -> None:
+        """
+        Add (or replace) many documents in all indexes as one update
+
+        The TF-IDF rows are appended as one block (one count-vector pass
+        against the current vocabulary, one generation bump), the whole
+        batch is applied to one forked snapshot and compaction is
+        considered once.
+
+        Args:
+            documents: (doc_id, text, metadata) tuples, as for add_document()
+        """
+        signatures = [self._signature(text, metadata) for _, text, metadata in documents]
+        with self._lock:
+            if self._journal is not None:
+                self._journal.extend(documents)
+            snapshot = self._snapshot.fork()
+            self._add(snapshot, documents, signatures)
+            self._publish(snapshot)
+        self._maybe_schedule_compaction()
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Remove a document from all indexes
+
+        Args:
+            doc_id: Document ID
+
+        Returns:
+            True if the document was indexed, False otherwise
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((doc_id, None, None))
+            snapshot = self._snapshot.fork()
+            removed = self._remove(snapshot, doc_id)
+            self._publish(snapshot)
+        self._maybe_schedule_compaction()
+        return removed
+
+    @staticmethod
+    def _stored_signature(metadata: Optional[Dict]) -> Optional[np.ndarray]:
+        """MinHash signature of a metadata entry (None if absent or of another length)"""
+        stored = (metadata or {}).get('minhash')
+        if not stored:
+            return None
+        signature = decode_signature(stored)
+        return signature if len(signature) == settings.minhash_permutations else None
+
+    def _signature(self, text: str, metadata: Optional[Dict]) -> np.ndarray:
+        """MinHash signature stored in the metadata entry, or computed from the text"""
+        signature = self._stored_signature(metadata)
+        return signature if signature is not None else minhash_signature(text)
+
+    # ============ Compaction ============
+
+    def _maybe_schedule_compaction(self) -> None:
+        """Start a background compaction of the TF-IDF indexes that changed enough since their fit"""
+        snapshot = self._snapshot
+        due = tuple(name for name in COMPACTED_INDEXES if getattr(snapshot, name).needs_compaction())
+        if not due:
+            return
+
+        with self._lock:
+            thread = self._compaction_thread
+            if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+                return
+
+            self._compaction_thread = threading.Thread(
+                target=self.compact, args=(due,), name="search-compaction", daemon=True
+            )
+            self._compaction_thread.start()
+
+    def compact(self, indexes: Sequence[str] = COMPACTED_INDEXES) -> None:
+        """
+        Refit TF-IDF indexes without tombstones and publish them
+
+        Each fit runs over the current snapshot without the write lock;
+        rows added or removed meanwhile are replayed on a fork of the index
+        that is current by then, which is published in its place. The
+        replayed rows count as changes since the new fit, so another
+        compaction follows once enough of them piled up.
+
+        Args:
+            indexes: Snapshot fields to compact ("documents", "passages")
+        """
+        for name in indexes:
+            fit = getattr(self._snapshot, name)._fit_live_rows()
+            texts: Dict[Tuple[str, int], Optional[str]] = {}
+            installed = False
+            while not installed:
+                # Texts of rows added meanwhile are read before taking the lock
+                getattr(self._snapshot, name)._read_replay_texts(fit, texts)
+                with self._lock:
+                    snapshot = self._snapshot
+                    index = getattr(snapshot, name).fork()
+                    installed = index._install_compaction(fit, texts)
+                    if installed:
+                        self._publish(snapshot._replace(**{name: index}))
+
+        self.save_index()
+        self._maybe_schedule_compaction()
+
+    # ============ Persistence ============
+
+    def save_index(self) -> bool:
+        """Persist the document, inverted and passage indexes"""
+        snapshot = self._snapshot
+        saved = snapshot.documents.save_index()
+        snapshot.inverted.save_index()
+        snapshot.passages.save_index()
+        return saved
+
+    def load_index(self) -> bool:
+        """
+        Load the persisted indexes instead of refitting from extracted texts
+
+        All artifacts are validated against their manifests and then
+        reconciled with metadata.json: documents uploaded after the last save
+        are added incrementally, documents deleted since then become
+        tombstones. If an artifact is missing, from another format
+        version/config, or too stale, nothing is published and the caller
+        should refit with load_documents().
+
+        Returns:
+            True if the indexes were loaded from disk
+        """
+        with self._lock:
+            self._journal = []  # record writes made while loading
+
+        try:
+            loaded = self._load_snapshot()
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        if loaded is None:
+            with self._lock:
+                self._journal = None
+            return False
+
+        self._swap(loaded)
+        return True
+
+    def _load_snapshot(self) -> Optional[IndexSnapshot]:
+        """
+        Persisted indexes reconciled with metadata.json (see load_index())
+
+        Returns:
+            The loaded indexes, not published yet; None if they are unusable
+        """
+        loaded = self._empty_snapshot()
+        index = loaded.documents
+        if not index.load_index() or not loaded.inverted.load_index() \
+                or not loaded.passages.load_index():
+            return None
+
+        # Validate against metadata.json
+        documents = {}
+        if settings.metadata_file.exists():
+            with open(settings.metadata_file, 'r', encoding='utf-8') as f:
+                documents = {doc['doc_id']: doc for doc in json.load(f).get('documents', [])}
+        metadata_ids = list(documents)
+
+        indexed = set(index.doc_ids)
+        missing = [d for d in metadata_ids if d not in indexed]
+        removed = indexed - set(metadata_ids)
+
+        # Small drift is reconciled incrementally, large drift means a refit is cheaper
+        if len(missing) + len(removed) > settings.index_compaction_threshold * max(1, len(indexed)):
+            return None
+
+        # Indexes saved separately (e.g. by a background compaction) may lag
+        # behind the document index
+        in_inverted = set(loaded.inverted.live_doc_ids())
+        with_passages = loaded.passages.indexed_doc_ids()
+        for doc_id in in_inverted - indexed:
+            loaded.inverted.remove_document(doc_id)
+        for doc_id in with_passages - indexed:
+            loaded.passages.remove_passages(doc_id)
+        for doc_id in indexed - (in_inverted & with_passages):
+            try:
+                text = index._get_text(doc_id)
+            except FileNotFoundError:
+                continue
+            if doc_id not in in_inverted:
+                loaded.inverted.add_document(doc_id, text, documents.get(doc_id))
+            if doc_id not in with_passages:
+                loaded.passages.add_passages(doc_id, text)
+
+        # The near-duplicate index is not persisted: signatures come from metadata.json
+        for doc_id in set(index._row_of) - removed:
+            signature = self._stored_signature(documents.get(doc_id))
+            if signature is None:
+                try:
+                    signature = minhash_signature(index._get_text(doc_id))
+                except FileNotFoundError:
+                    continue
+            loaded.near_duplicates.add(doc_id, signature)
+
+        for doc_id in removed:
+            self._remove(loaded, doc_id)
+        for doc_id in missing:
+            try:
+                self._add(loaded, [(doc_id, load_extracted_text(doc_id), documents[doc_id])])
+            except FileNotFoundError:
+                # Skip documents with missing text files
+                continue
+
+        return loaded
+
+    @staticmethod
+    def _scope(doc_ids: Optional[Sequence[str]]) -> Optional[Tuple[str, ...]]:
+        """Canonical allow-list (None or empty = whole corpus)"""
+        return tuple(sorted(set(doc_ids))) if doc_ids else None
+
+    def search(self, query: str, top_k: int = 5, doc_ids: Optional[Sequence[str]] = None,
+               timings: Optional[Dict[str, float]] = None, collapse: Optional[bool] = None) -> List[Dict]:
+        """
+        Search documents with the configured ranking engines
+
+        The boolean part of the query ("quoted phrases", a NEAR/k b,
+        AND/OR/NOT, filename: and uploaded: filters) is evaluated on the
+        postings lists first; only documents satisfying it are ranked. An
+        allow-list of doc_ids is applied the same way, so only those rows are
+        ever scored. The remaining documents are ranked by the retrieval
+        pipeline (TF-IDF cosine, BM25 and/or LSA, fused if several).
+
+        With collapse, near-duplicates of a better ranked result are folded
+        into it (listed under its 'duplicates') instead of taking their own
+        place in the top_k.
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            doc_ids: Only search these documents (None or empty = all)
+            timings: Dict that receives the milliseconds spent per stage
+                (parse, filter, each engine, fusion, collapse, snippets,
+                total; cache on a cache hit)
+            collapse: Fold near-duplicates (default: settings.collapse_near_duplicates)
+
+        Returns:
+            List of search results with scores
+
+        Raises:
+            ValueError: If the query contains an invalid field filter
+        """
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+        snapshot = self._snapshot
+        scope = self._scope(doc_ids)
+        collapse = self._collapses(collapse)
+        generation = snapshot.generation  # results are cached for the snapshot they come from
+        key = self._cache_key("search", query, top_k, doc_ids=scope, collapse=collapse)
+        cached = self.cache.get(key, generation)
+        if cached is not None:
+            timings['cache'] = timings['total'] = (time.perf_counter() - start) * 1000
+            self.pipeline.record(timings)
+            return [dict(result) for result in cached]
+
+        parsed = parse_query(query)
+        timings['parse'] = (time.perf_counter() - start) * 1000
+        ranked = self._rank(parsed, top_k * COLLAPSE_DEPTH if collapse else top_k,
+                            snapshot, scope, timings=timings)
+        groups = None
+        if collapse:
+            collapse_start = time.perf_counter()
+            ranked, groups = self._collapse(ranked, top_k, snapshot.near_duplicates)
+            timings['collapse'] = (time.perf_counter() - collapse_start) * 1000
+
+        snippets_start = time.perf_counter()
+        results = self._build_results(parsed.text, ranked, snapshot, groups)
+        timings['snippets'] = (time.perf_counter() - snippets_start) * 1000
+        self.cache.put(key, results, generation)
+
+        timings['total'] = (time.perf_counter() - start) * 1000
+        self.pipeline.record(timings)
+        return [dict(result) for result in results]
+
+    def _rank(self, parsed: ParsedQuery, top_k: int, snapshot: IndexSnapshot,
+              doc_ids: Optional[Sequence[str]] = None, timings: Optional[Dict[str, float]] = None,
+              precomputed: Optional[Dict[str, List[Tuple[str, float]]]] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents for a parsed query with the retrieval pipeline
+
+        Args:
+            parsed: Parsed query
+            top_k: Number of results to return
+            snapshot: Indexes the query started on
+            doc_ids: Allow-list of documents (None = all)
+            timings: Dict that receives the time of each stage
+            precomputed: Rankings already computed for some engines
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        timings = {} if timings is None else timings
+        if parsed.has_constraints:
+            start = time.perf_counter()
+            inverted = snapshot.inverted
+            rows = inverted.match_rows(parsed)
+            if doc_ids is not None:
+                rows = intersect_sorted(inverted.doc_ids_to_rows(doc_ids), rows)
+            doc_ids = inverted.rows_to_doc_ids(rows)
+            timings['filter'] = (time.perf_counter() - start) * 1000
+            if not doc_ids:
+                return []
+            if not parsed.text.strip():
+                # Only filters / negations: nothing to rank, list the matches
+                # in row (upload) order
+                return [(doc_id, 0.0) for doc_id in doc_ids[:top_k]]
+
+        return self.pipeline.run(
+            parsed.text, top_k, self.retrieval_engines(), snapshot,
+            doc_ids=doc_ids, precomputed=precomputed, timings=timings
+        )
+
+    @staticmethod
+    def _collapses(collapse: Optional[bool]) -> bool:
+        """Whether a search folds near-duplicates (None = settings default)"""
+        return settings.collapse_near_duplicates is True if collapse is None else bool(collapse)
+
+    @staticmethod
+    def _collapse(ranked: List[Tuple[str, float]], top_k: int,
+                  near_duplicates: NearDuplicateIndex) -> Tuple[List[Tuple[str, float]], Dict[str, List[str]]]:
+        """
+        Fold each ranked document into the best ranked near-duplicate before it
+
+        Args:
+            ranked: (doc_id, score) pairs, best first
+            top_k: Number of results to keep
+            near_duplicates: Near-duplicate index the query started on
+
+        Returns:
+            Tuple of (kept (doc_id, score) pairs, kept doc_id -> folded doc_ids)
+        """
+        kept: List[Tuple[str, float]] = []
+        groups: Dict[str, List[str]] = {}
+        for doc_id, score in ranked:
+            similar = {other for other, _ in near_duplicates.near_duplicates(doc_id)}
+            leader = next((k for k, _ in kept if k in similar), None)
+            if leader is not None:
+                groups[leader].append(doc_id)
+            elif len(kept) < top_k:
+                kept.append((doc_id, score))
+                groups[doc_id] = []
+        return kept, groups
+
+    def _rank_bm25(self, query: str, top_k: int, doc_ids: Optional[Sequence[str]] = None,
+                   snapshot: Optional[IndexSnapshot] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents using BM25 over the inverted index
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            doc_ids: Only score these documents; None = all
+            snapshot: Indexes the query started on (None = current)
+
+        Returns:
+            List of (doc_id, score), best first
+        """
+        inverted = (snapshot or self._snapshot).inverted
+        rows = None
+        if doc_ids is not None:
+            rows = inverted.doc_ids_to_rows(doc_ids)
+            if len(rows) == 0:
+                return []
+        return inverted.search(query, top_k=top_k, rows=rows)
+
+    def _sync_semantic(self, documents: DocumentIndex) -> bool:
+        """
+        Bring the semantic index up to date with the rows of a document
+        index (caller holds _semantic_lock)
+
+        A new TF-IDF fit (new vocabulary) means a new SVD basis; rows
+        appended since are only folded into the current basis. Rows folded
+        in for a newer snapshot of the same fit are kept (search_semantic()
+        masks them).
+
+        Returns:
+            True if there is a usable semantic index
+        """
+        doc_vectors = documents.matrix()
+        if doc_vectors is None:
+            return False
+
+        if self.semantic.fit_generation != documents.fit_generation:
+            self.semantic.fit(doc_vectors, documents.fit_generation)
+        elif len(self.semantic) < doc_vectors.shape[0]:
+            self.semantic.add(doc_vectors[len(self.semantic):])
+        return self.semantic.is_fitted
+
+    def search_semantic(self, query: str, top_k: int = 5, doc_ids: Optional[Sequence[str]] = None,
+                        exact: bool = False, snapshot: Optional[IndexSnapshot] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents by LSA similarity (latent semantic analysis, no AI)
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            doc_ids: Only rank these documents (None = all)
+            exact: Score every document instead of the LSH candidates
+            snapshot: Indexes the query started on (None = current)
+
+        Returns:
+            List of (doc_id, similarity) above MIN_SIMILARITY, best first
+        """
+        if not query.strip():
+            return []
+
+        documents = (snapshot or self._snapshot).documents
+        # The snapshot never changes, so the fit/fold-in and the lookup only
+        # need the semantic lock: writers are never blocked by an SVD
+        with self._semantic_lock:
+            if not self._sync_semantic(documents):
+                return []
+
+            query_vector = self.semantic.project(documents.vectorizer.transform([query]))
+            if query_vector is None:
+                return []
+
+            live = np.zeros(len(self.semantic), dtype=bool)
+            live[:documents.doc_vectors.shape[0]] = True
+            live[list(documents._tombstones)] = False
+
+            rows = None
+            if doc_ids is not None:
+                rows = np.array(sorted(
+                    documents._row_of[doc_id] for doc_id in doc_ids if doc_id in documents._row_of
+                ), dtype=np.int64)
+
+            found, similarities = self.semantic.search(query_vector, top_k, live, rows, exact)
+
+        return [
+            (documents.doc_ids[row], float(similarity))
+            for row, similarity in zip(found, similarities)
+            if similarity >= MIN_SIMILARITY
+        ]
+
+    def search_many(self, queries: List[str], top_k: Union[int, List[int]] = 5,
+                    doc_ids: Optional[List[Optional[Sequence[str]]]] = None,
+                    collapse: Optional[List[Optional[bool]]] = None) -> List[List[Dict]]:
+        """
+        Search several queries at once
+
+        If the TF-IDF engine is in the pipeline, all (uncached) queries
+        without query operators or doc_ids are vectorized in one transform
+        call and scored with a single sparse matrix product (queries x
+        documents), instead of one cosine_similarity per query. The other
+        engines and the fusion run per query.
+
+        Args:
+            queries: Search queries
+            top_k: Number of results per query (one value or one per query)
+            doc_ids: Allow-list per query (None = whole corpus for all queries)
+            collapse: Near-duplicate folding per query (None = settings default)
+
+        Returns:
+            One result list per query, in input order (same format as search())
+        """
+        top_ks = [top_k] * len(queries) if isinstance(top_k, int) else list(top_k)
+        if len(top_ks) != len(queries):
+            raise ValueError("top_k must be an int or have one value per query")
+        scopes = [self._scope(ids) for ids in (doc_ids or [None] * len(queries))]
+        if len(scopes) != len(queries):
+            raise ValueError("doc_ids must have one entry per query")
+        collapses = [self._collapses(c) for c in (collapse or [None] * len(queries))]
+        if len(collapses) != len(queries):
+            raise ValueError("collapse must have one entry per query")
+        depths = [k * COLLAPSE_DEPTH if c else k for k, c in zip(top_ks, collapses)]
+
+        snapshot = self._snapshot
+        generation = snapshot.generation
+        keys = [
+            self._cache_key("search", q, k, doc_ids=scope, collapse=c)
+            for q, k, scope, c in zip(queries, top_ks, scopes, collapses)
+        ]
+        results: List[Optional[List[Dict]]] = [self.cache.get(key, generation) for key in keys]
+
+        # Each distinct (normalized query, top_k) is ranked once
+        todo: Dict[tuple, int] = {}
+        for i, key in enumerate(keys):
+            if results[i] is None:
+                todo.setdefault(key, i)
+        first = list(todo.values())
+        parsed = {i: parse_query(queries[i]) for i in first}
+
+        # Plain queries share one TF-IDF matrix product
+        engines = self.retrieval_engines()
+        if "tfidf" in engines:
+            batched = [i for i in first if not parsed[i].has_constraints and scopes[i] is None]
+        else:
+            batched = []
+        tfidf = self._rank_tfidf_many(
+            [parsed[i].text for i in batched],
+            [self.pipeline.depth(depths[i], len(engines)) for i in batched],
+            snapshot
+        )
+        precomputed = {i: {"tfidf": ranking} for i, ranking in zip(batched, tfidf)}
+
+        ranked = {
+            i: self._rank(parsed[i], depths[i], snapshot, scopes[i], precomputed=precomputed.get(i))
+            for i in first
+        }
+
+        computed = {}
+        for i in first:
+            groups = None
+            if collapses[i]:
+                ranked[i], groups = self._collapse(ranked[i], top_ks[i], snapshot.near_duplicates)
+            computed[keys[i]] = self._build_results(parsed[i].text, ranked[i], snapshot, groups)
+            self.cache.put(keys[i], computed[keys[i]], generation)
+
+        return [
+            [dict(result) for result in (cached if cached is not None else computed[key])]
+            for key, cached in zip(keys, results)
+        ]
+
+    def _build_results(self, query: str, ranked: List[Tuple[str, float]], snapshot: IndexSnapshot,
+                       groups: Optional[Dict[str, List[str]]] = None) -> List[Dict]:
+        """
+        Attach snippets, highlight offsets and the page of the snippet to
+        ranked (doc_id, score) pairs, and the near-duplicates folded into
+        each one if collapsed (groups)
+        """
+        results = []
+        for doc_id, score in ranked:
+            try:
+                snippet, highlights, offset = self._snippet(doc_id, query, snapshot.inverted)
+            except FileNotFoundError:
+                # Deleted while the query was running
+                continue
+
+            results.append({
+                'doc_id': doc_id,
+                'score': round(score, 4),
+                'snippet': snippet,
+                'highlights': highlights,
+                'page': page_number(doc_id, offset) if offset is not None else None
+            })
+            if groups is not None:
+                results[-1]['duplicates'] = groups[doc_id]
+
+        return results
+
+    def _snippet(self, doc_id: str, query: str,
+                 inverted: InvertedIndex) -> Tuple[str, List[Tuple[int, int]], Optional[int]]:
+        """
+        Snippet of a document around the query terms, found by position lookup
+
+        The term positions recorded by the inverted index select the window
+        containing the most distinct query terms; only the text around that
+        window is read.
+
+        Returns:
+            Tuple of (snippet, highlights, offset): highlights are (start, end)
+            offsets into the snippet, offset is the character offset of the
+            first hit in the document (None if unknown)
+        """
+        text = self._get_text(doc_id)
+        hits = inverted.hits(doc_id, query)
+        if hits is None:
+            # Not in the positional index: fall back to scanning the text
+            return extract_snippet(text, query, context_words=SNIPPET_CONTEXT_WORDS), [], None
+
+        term_ids, positions, starts, ends = hits
+        if len(positions) == 0:
+            return (*build_snippet(text, [], context_words=SNIPPET_CONTEXT_WORDS), 0)
+
+        first, last = best_snippet_window(term_ids, positions, SNIPPET_WINDOW_WORDS)
+        # One word can hold several terms (e.g. split by ASCII folding)
+        spans = list(dict.fromkeys(zip(
+            starts[first:last + 1].tolist(), ends[first:last + 1].tolist()
+        )))
+        return (*build_snippet(text, spans, context_words=SNIPPET_CONTEXT_WORDS), spans[0][0])
+
+    def _rank_tfidf(self, query: str, top_k: int, doc_ids: Optional[Sequence[str]] = None,
+                    snapshot: Optional[IndexSnapshot] = None) -> List[Tuple[str, float]]:
+        """
+        Rank documents using TF-IDF cosine similarity
+
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            doc_ids: Only score these documents (sub-matrix); None = all
+            snapshot: Indexes the query started on (None = current)
+
+        Returns:
+            List of (doc_id, score) with non-zero scores, best first
+        """
+        return (snapshot or self._snapshot).documents.rank(query, top_k, doc_ids)
+
+    def _rank_tfidf_many(self, queries: List[str], top_ks: List[int],
+                         snapshot: Optional[IndexSnapshot] = None) -> List[List[Tuple[str, float]]]:
+        """TF-IDF rankings of several queries with one matrix product (see TfidfIndex.rank_many)"""
+        return (snapshot or self._snapshot).documents.rank_many(queries, top_ks)
+
+    def search_passages(self, query: str, top_k: int = 5,
+                        doc_ids: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Search passages for RAG context building
+
+        Args:
+            query: Search query / question
+            top_k: Number of passages to return
+            doc_ids: Only search passages of these documents (None or empty = all)
+
+        Returns:
+            List of passages (doc_id, start, end, page, text, score), best first
+        """
+        scope = self._scope(doc_ids)
+        snapshot = self._snapshot
+        generation = snapshot.generation
+        key = self._cache_key("passages", query, top_k, doc_ids=scope)
+        cached = self.cache.get(key, generation)
+        if cached is not None:
+            return [dict(passage) for passage in cached]
+
+        passages = snapshot.passages.search(query, top_k=top_k, doc_ids=scope)
+        self.cache.put(key, passages, generation)
+        return [dict(passage) for passage in passages]
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Search-as-you-type term suggestions for a typed prefix
+
+        Served from a SuggestIndex over the inverted index vocabulary (every
+        indexed term, not only the TF-IDF features). On the first call after
+        the index changed, it is rebuilt if terms were added or dropped and
+        otherwise only gets fresh document frequencies.
+
+        Args:
+            prefix: Text typed so far (its last word is completed)
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of {term, doc_freq}, most frequent first
+        """
+        return self._suggest_index().suggest(prefix, limit)
+
+    def _suggest_index(self) -> SuggestIndex:
+        """Prefix index of the current vocabulary, refreshed when stale"""
+        generation, _, suggestions = self._suggestions
+        if generation == self.index_generation:
+            return suggestions
+
+        with self._suggest_lock:
+            generation, vocabulary, suggestions = self._suggestions
+            snapshot = self._snapshot
+            if generation != snapshot.generation:
+                inverted = snapshot.inverted
+                current_vocabulary = inverted.vocabulary_generation
+                if vocabulary == current_vocabulary:
+                    suggestions = suggestions.with_doc_freqs(inverted.live_doc_freqs())
+                else:
+                    suggestions = SuggestIndex(*inverted.vocabulary())
+                self._suggestions = (snapshot.generation, current_vocabulary, suggestions)
+            return suggestions
+
+    def rebuild_index(self, wait: bool = True) -> bool:
+        """
+        Rebuild the search index from scratch and persist it
+
+        Searches keep running on the current indexes until the new ones are
+        swapped in (see load_documents()).
+
+        Args:
+            wait: Rebuild in the calling thread; False starts a background thread
+
+        Returns:
+            False if a rebuild is already running, True otherwise
+        """
+        if not self._rebuild_lock.acquire(blocking=False):
+            return False
+
+        def rebuild():
+            try:
+                self.load_documents()
+                self._suggest_index()  # the first keystroke should not pay for it
+                self.save_index()
+            finally:
+                self._rebuild_lock.release()
+
+        if wait:
+            rebuild()
+            return True
+
+        def rebuild_in_background():
+            try:
+                rebuild()
+            except Exception as e:
+                print(f"[WARNING] Search index rebuild failed: {str(e)}")
 
-    def rebuild_index(self) -> None:
-        """Rebuild the search index from scratch"""
-        self.load_documents()
+        threading.Thread(target=rebuild_in_background, name="search-rebuild", daemon=True).start()
+        return True
 
 
 # Global search service instance
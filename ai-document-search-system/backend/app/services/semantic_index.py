@@ -0,0 +1,226 @@
+"""
+[Human-written] Latent Semantic Index with LSH
+LSA (truncated SVD of the TF-IDF matrix) + random-projection LSH - NO AI,
+purely linear algebra, runs offline on CPU
+
+Documents and queries are projected onto the top singular vectors of the
+TF-IDF matrix, so terms that co-occur across the corpus land close to each
+other and a query can match paraphrases that share no exact term.
+
+Nearest neighbours are served from random-hyperplane LSH tables: each
+table hashes a vector to the signs of its dot products with n_bits random
+hyperplanes (similar directions -> same bits). A query probes its own
+bucket and the n_bits buckets one bit away in every table, and only those
+candidates get an exact cosine score.
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+
+from app.config import settings
+from app.utils.ranking_utils import top_k_indices
+
+# Row sets up to this size are scored exactly instead of through LSH
+BRUTE_FORCE_MAX_ROWS = 2048
+
+# LSA cosine below which a document counts as unrelated to the query
+MIN_SIMILARITY = 0.1
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place (zero rows stay zero)"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors
+
+
+class SemanticIndex:
+    """
+    Dense LSA vectors of the TF-IDF rows with an LSH candidate index
+
+    - fit() computes the SVD basis and projects all rows
+    - add() folds new rows into the existing basis (no refit)
+    - Rows are aligned with the TF-IDF matrix; deleted rows are masked by
+      the caller at query time
+    """
+
+    def __init__(self, n_components: Optional[int] = None, n_tables: Optional[int] = None,
+                 n_bits: Optional[int] = None, seed: int = 42):
+        """
+        Args:
+            n_components: LSA dimensions (default: settings.semantic_components)
+            n_tables: LSH hash tables (default: settings.semantic_lsh_tables)
+            n_bits: Hyperplanes per table (default: settings.semantic_lsh_bits)
+            seed: Random seed of the SVD and the hyperplanes
+        """
+        self.n_components = n_components or settings.semantic_components
+        self.n_tables = n_tables or settings.semantic_lsh_tables
+        self.n_bits = n_bits or settings.semantic_lsh_bits
+        self.seed = seed
+
+        self._lock = threading.RLock()
+        self.fit_generation = -1  # TfidfIndex.fit_generation the basis belongs to
+        self.components: Optional[np.ndarray] = None  # (dims, n_columns)
+        self._columns: Optional[np.ndarray] = None  # TF-IDF columns in use (None = all)
+        self.vectors = np.empty((0, 0), dtype=np.float32)  # (rows, dims), unit length
+        self._planes: Optional[np.ndarray] = None  # (tables, bits, dims)
+        self._sorted_codes: Optional[np.ndarray] = None  # (tables, rows) bucket codes, sorted
+        self._order: Optional[np.ndarray] = None  # (tables, rows) row of each sorted code
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.components is not None
+
+    # ============ Building ============
+
+    def fit(self, matrix: sp.csr_matrix, fit_generation: int) -> None:
+        """
+        Compute the LSA basis of a TF-IDF matrix and index all of its rows
+
+        Args:
+            matrix: L2-normalized TF-IDF rows (documents x terms)
+            fit_generation: Identifies the TF-IDF fit the basis belongs to
+        """
+        # Hashed TF-IDF columns are mostly empty: only the used ones get a
+        # weight in the basis, so it grows with the vocabulary, not the hash width
+        columns = np.unique(matrix.indices)
+        if len(columns) * 2 < matrix.shape[1]:
+            matrix = matrix[:, columns]
+        else:
+            columns = None
+
+        n_rows, n_terms = matrix.shape
+        dims = min(self.n_components, n_terms - 1, n_rows - 1)
+
+        if dims < 1:
+            with self._lock:
+                self.components = None
+                self._columns = None
+                self.vectors = np.empty((0, 0), dtype=np.float32)
+                self.fit_generation = fit_generation
+            return
+
+        svd = TruncatedSVD(n_components=dims, algorithm='randomized', random_state=self.seed)
+        svd.fit(matrix)
+        components = svd.components_.astype(np.float32)
+        vectors = _normalize_rows(np.asarray(matrix @ components.T, dtype=np.float32))
+
+        rng = np.random.default_rng(self.seed)
+        planes = rng.standard_normal((self.n_tables, self.n_bits, dims)).astype(np.float32)
+
+        with self._lock:
+            self.components = components
+            self._columns = columns
+            self.vectors = vectors
+            self._planes = planes
+            self.fit_generation = fit_generation
+            self._build_tables()
+
+    def add(self, matrix: sp.csr_matrix) -> None:
+        """
+        Fold new TF-IDF rows into the current basis (appended in row order)
+
+        Args:
+            matrix: New L2-normalized TF-IDF rows
+        """
+        with self._lock:
+            if self.components is None or matrix.shape[0] == 0:
+                return
+            matrix = self._select_columns(matrix)
+            new_vectors = _normalize_rows(np.asarray(matrix @ self.components.T, dtype=np.float32))
+            self.vectors = np.vstack([self.vectors, new_vectors])
+            self._build_tables()
+
+    def _select_columns(self, matrix: sp.csr_matrix) -> sp.csr_matrix:
+        """Restrict TF-IDF rows to the columns of the basis"""
+        return matrix if self._columns is None else matrix[:, self._columns]
+
+    def project(self, query_vector: sp.csr_matrix) -> Optional[np.ndarray]:
+        """Unit-length LSA vector of a (1 x terms) TF-IDF query, None if it is empty"""
+        with self._lock:
+            if self.components is None:
+                return None
+            query_vector = self._select_columns(query_vector)
+            vector = np.asarray(query_vector @ self.components.T, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """(tables, rows) bucket codes: one bit per hyperplane side"""
+        bits = np.einsum('tbd,nd->tnb', self._planes, vectors) > 0
+        return bits.astype(np.int64) @ (1 << np.arange(self.n_bits, dtype=np.int64))
+
+    def _build_tables(self) -> None:
+        """Sort the bucket codes of every table (caller holds the lock)"""
+        codes = self._codes(self.vectors)
+        self._order = np.argsort(codes, axis=1, kind='stable')
+        self._sorted_codes = np.take_along_axis(codes, self._order, axis=1)
+
+    # ============ Querying ============
+
+    def candidates(self, query: np.ndarray) -> np.ndarray:
+        """
+        Rows in the query's buckets or one bit away from them (multi-probe)
+
+        Returns:
+            Sorted unique row ids
+        """
+        with self._lock:
+            query_codes = self._codes(query[np.newaxis, :])[:, 0]
+            flips = np.concatenate([[0], 1 << np.arange(self.n_bits, dtype=np.int64)])
+
+            found = []
+            for table in range(self.n_tables):
+                probes = query_codes[table] ^ flips
+                sorted_codes = self._sorted_codes[table]
+                starts = np.searchsorted(sorted_codes, probes, side='left')
+                ends = np.searchsorted(sorted_codes, probes, side='right')
+                for start, end in zip(starts, ends):
+                    if end > start:
+                        found.append(self._order[table, start:end])
+
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def search(self, query: np.ndarray, top_k: int, live: np.ndarray,
+               rows: Optional[np.ndarray] = None, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows closest to a projected query (cosine similarity)
+
+        Args:
+            query: Unit-length LSA vector from project()
+            top_k: Number of rows to return
+            live: Boolean mask of non-deleted rows
+            rows: Only consider these sorted rows (None = all)
+            exact: Score every row instead of the LSH candidates (small
+                corpora and allow-lists are always scored exactly)
+
+        Returns:
+            Tuple of (row ids, similarities), best first
+        """
+        with self._lock:
+            every_row = np.arange(len(self.vectors)) if rows is None else rows
+
+            if exact or len(every_row) <= BRUTE_FORCE_MAX_ROWS:
+                candidates = every_row[live[every_row]]
+            else:
+                candidates = self.candidates(query)
+                if rows is not None:
+                    candidates = candidates[np.isin(candidates, rows)]
+                candidates = candidates[live[candidates]]
+                # Too few neighbours in the probed buckets: fall back to exact
+                if len(candidates) < top_k:
+                    candidates = every_row[live[every_row]]
+
+            similarities = self.vectors[candidates] @ query
+            top = top_k_indices(similarities, top_k)
+            return candidates[top], similarities[top]
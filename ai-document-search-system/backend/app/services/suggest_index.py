@@ -0,0 +1,96 @@
+"""
+[Human-written] Term Suggestions (search-as-you-type)
+Prefix lookup over the index vocabulary - NO AI, a sorted array and binary search
+
+All indexed terms are kept in one sorted list. The terms starting with a
+prefix form a contiguous range of that list, found with two binary
+searches; the range is then ranked by document frequency. A lookup costs
+O(log V) plus a top-k selection over the matching range, so it answers in
+microseconds without touching any document.
+
+The sorted list only changes with the vocabulary: while no term is added,
+an index change just refreshes the document frequencies (with_doc_freqs),
+one gather from the index's per-term-id frequency array.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.query_parser import fold
+from app.utils.ranking_utils import top_k_indices
+
+# Sorts after every character an index term can contain
+PREFIX_END = '\U0010ffff'
+
+
+class SuggestIndex:
+    """
+    Immutable prefix index over (term, document frequency) pairs
+
+    Built by SearchService when the vocabulary changes, and replaced (never
+    mutated) by with_doc_freqs() when only document frequencies changed.
+    Terms with a document frequency of 0 are never suggested.
+    """
+
+    def __init__(self, terms: Sequence[str] = (), doc_freqs: Sequence[int] = ()):
+        """
+        Args:
+            terms: Indexed terms (ASCII-folded, lower case), by term id
+            doc_freqs: Document frequency of each term
+        """
+        order = sorted(range(len(terms)), key=terms.__getitem__)
+        self.terms: List[str] = [terms[i] for i in order]
+        self.term_ids = np.array(order, dtype=np.int64)  # sorted position -> term id
+        self.doc_freqs = np.asarray(doc_freqs, dtype=np.int64)[self.term_ids]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def with_doc_freqs(self, doc_freqs: np.ndarray) -> "SuggestIndex":
+        """
+        Copy with new document frequencies, sharing the sorted terms
+
+        Args:
+            doc_freqs: Document frequency by term id, in the order of the
+                terms this index was built from (InvertedIndex.live_doc_freqs())
+        """
+        index = SuggestIndex.__new__(SuggestIndex)
+        index.terms = self.terms
+        index.term_ids = self.term_ids
+        index.doc_freqs = np.asarray(doc_freqs, dtype=np.int64)[self.term_ids]
+        return index
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """[start, end) of the terms starting with an already folded prefix"""
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + PREFIX_END, lo=start)
+        return start, end
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Complete the last word of a typed query
+
+        Args:
+            prefix: Text typed so far; its last word is completed with the
+                same Turkish/ASCII folding as the index terms (nothing is
+                completed after a trailing space)
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of {term, doc_freq}, most frequent first (ties alphabetical)
+        """
+        words = fold(prefix).split()
+        if not words or prefix[-1].isspace() or limit < 1:
+            return []
+
+        start, end = self.prefix_range(words[-1])
+        if start == end:
+            return []
+
+        top = top_k_indices(self.doc_freqs[start:end], limit)
+        return [
+            {'term': self.terms[start + i], 'doc_freq': int(self.doc_freqs[start + i])}
+            for i in top if self.doc_freqs[start + i] > 0
+        ]
@@ -0,0 +1,122 @@
+"""
+[Human-written] Query Result Cache
+Bounded LRU cache with TTL, invalidated by an index generation number
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache for query results
+
+    Entries belong to one index generation: as soon as a lookup or store
+    happens with a newer generation (i.e. the index changed), the whole
+    cache is dropped. Lookups and stores with an older generation (a reader
+    that started before the change) are misses and leave the cache as it is.
+    Entries older than ttl seconds are treated as misses.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 300.0):
+        """
+        Args:
+            max_size: Maximum number of entries (0 disables caching)
+            ttl: Entry lifetime in seconds (0 = no expiry)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_generation(self, generation: int) -> None:
+        """Drop every entry if the index moved to a newer generation (caller holds the lock)"""
+        if generation > self._generation:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._generation = generation
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Cache key
+            generation: Current index generation
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        with self._lock:
+            # Entries are newer than a reader of an older generation
+            if generation < self._generation:
+                self.misses += 1
+                return None
+            self._sync_generation(generation)
+
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Store a result computed against the given index generation
+
+        Args:
+            key: Cache key
+            value: Result to cache
+            generation: Index generation the result was computed with
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            # A result computed before a concurrent index change is stale
+            if generation < self._generation:
+                return
+            self._sync_generation(generation)
+
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "generation": self._generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,311 @@
+"""
+[Human-written] Search Query Parser
+Splits a search query into ranking text and a boolean filter (no AI)
+
+Syntax:
+- "quoted phrase": the words must appear adjacent and in this order
+- a NEAR/k b: a and b must appear within k words of each other
+- AND, OR, NOT (upper case) and parentheses: boolean filter on documents
+- filename:pattern: case-insensitive substring (or * ? glob) of the filename
+- uploaded:2024-05-01, uploaded:>=2024-05, uploaded:2024-01..2024-03:
+  upload date (YYYY, YYYY-MM or YYYY-MM-DD, with = > >= < <= or a range)
+- anything else: plain words, used for ranking only
+
+Words next to each other are alternatives (OR); operators, phrases, NEAR
+and field filters are requirements that every result must satisfy.
+"""
+
+import re
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+from unidecode import unidecode
+
+from app.utils.text_utils import tokenize_with_positions
+
+QUERY_TOKEN_PATTERN = re.compile(r'''
+    "(?P<phrase>[^"]*)"
+  | (?P<field>(?i:filename|uploaded)):(?P<value>"[^"]*"|[^\s()]+)
+  | (?i:\bNEAR/(?P<distance>\d+)\b)
+  | (?P<operator>\b(?:AND|OR|NOT)\b)
+  | (?P<paren>[()])
+  | (?P<word>[^\s()"]+)
+''', re.VERBOSE)
+
+DATE_PATTERN = re.compile(r'^(\d{4})(?:-(\d{1,2}))?(?:-(\d{1,2}))?$')
+
+
+class Term(NamedTuple):
+    """Documents containing the term"""
+    term: str
+
+
+class Phrase(NamedTuple):
+    """Terms of a quoted phrase with their position relative to the first term"""
+    terms: Tuple[Tuple[str, int], ...]
+
+
+class Near(NamedTuple):
+    """Two terms that must occur within `distance` words of each other"""
+    left: str
+    right: str
+    distance: int
+
+
+class FilenameFilter(NamedTuple):
+    """Filename contains the (ASCII-folded, lower case) pattern"""
+    pattern: str
+
+
+class UploadedFilter(NamedTuple):
+    """Upload time (epoch seconds) in [start, end)"""
+    start: float
+    end: float
+
+
+class And(NamedTuple):
+    children: Tuple
+
+
+class Or(NamedTuple):
+    children: Tuple
+
+
+class Not(NamedTuple):
+    child: object
+
+
+Node = Union[Term, Phrase, Near, FilenameFilter, UploadedFilter, And, Or, Not]
+
+
+class ParsedQuery(NamedTuple):
+    """Result of parse_query()"""
+    text: str                 # Query words without operators (for ranking/snippets)
+    filter: Optional[Node]    # Boolean filter every result must satisfy
+
+    @property
+    def has_constraints(self) -> bool:
+        return self.filter is not None
+
+
+def fold(text: str) -> str:
+    """ASCII-fold and lowercase a field value (same folding as the index terms)"""
+    return unidecode(text).lower()
+
+
+def _date_range(value: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a YYYY, YYYY-MM or YYYY-MM-DD date"""
+    match = DATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid date '{value}' (expected YYYY, YYYY-MM or YYYY-MM-DD)")
+
+    year, month, day = (int(part) if part else None for part in match.groups())
+    try:
+        if day is not None:
+            start = datetime(year, month, day)
+            end = datetime.fromordinal(start.toordinal() + 1)
+        elif month is not None:
+            start = datetime(year, month, 1)
+            end = datetime(year + month // 12, month % 12 + 1, 1)
+        else:
+            start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value}'")
+    return start, end
+
+
+def _uploaded_filter(value: str) -> UploadedFilter:
+    """Parse an uploaded: value into a time interval"""
+    if '..' in value:
+        first, last = value.split('..', 1)
+        start, end = _date_range(first)[0], _date_range(last)[1]
+    else:
+        operator = re.match(r'^(>=|<=|>|<|=)?', value).group()
+        start, end = _date_range(value[len(operator):])
+        if operator == '>':
+            start, end = end, datetime.max
+        elif operator == '>=':
+            end = datetime.max
+        elif operator == '<':
+            start, end = datetime.min, start
+        elif operator == '<=':
+            start = datetime.min
+
+    return UploadedFilter(
+        float('-inf') if start == datetime.min else start.timestamp(),
+        float('inf') if end == datetime.max else end.timestamp()
+    )
+
+
+def _word_node(text: str) -> Optional[Node]:
+    """Term for a single word, Phrase for text that tokenizes into several terms"""
+    tokens = tokenize_with_positions(text)
+    if not tokens:
+        return None  # only stop words
+    if len(tokens) == 1:
+        return Term(tokens[0][0])
+    first = tokens[0][1]
+    return Phrase(tuple((term, position - first) for term, position, _, _ in tokens))
+
+
+def _combine(kind, nodes: List[Optional[Node]]) -> Optional[Node]:
+    nodes = [node for node in nodes if node is not None]
+    if not nodes:
+        return None
+    if len(nodes) == 1:
+        return nodes[0]
+    return kind(tuple(nodes))
+
+
+class _Parser:
+    """Recursive descent parser over the query tokens"""
+
+    def __init__(self, query: str):
+        self.tokens = [
+            (match.lastgroup if match.lastgroup != 'value' else 'field', match)
+            for match in QUERY_TOKEN_PATTERN.finditer(query)
+        ]
+        self.pos = 0
+        self.negated = 0
+        self.words: List[str] = []  # ranking text (nothing under NOT)
+
+    def peek(self) -> Tuple[Optional[str], Optional[re.Match]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def is_operator(self, name: str) -> bool:
+        kind, match = self.peek()
+        return kind == 'operator' and match.group() == name
+
+    def rank(self, text: str) -> None:
+        if not self.negated and text.strip():
+            self.words.append(text.strip())
+
+    def parse_group(self, nested: bool = False) -> Optional[Node]:
+        """
+        Sequence of clauses: all requirements must hold; inside parentheses
+        without requirements, the plain words are alternatives
+        """
+        required, optional = [], []
+        while self.pos < len(self.tokens):
+            kind, match = self.peek()
+            if kind == 'paren' and match.group() == ')':
+                if nested:
+                    break
+                self.pos += 1  # stray closing parenthesis
+                continue
+
+            start = self.pos
+            node = self.parse_or()
+            if self.pos == start:
+                self.pos += 1  # dangling operator
+                continue
+            if node is None:
+                continue
+            bare_word = self.pos == start + 1 and self.tokens[start][0] == 'word'
+            (optional if bare_word else required).append(node)
+
+        if required:
+            return _combine(And, required)
+        if nested:
+            return _combine(Or, optional)
+        # Top level: ranking already needs at least one query word to match
+        return None
+
+    def parse_or(self) -> Optional[Node]:
+        nodes = [self.parse_and()]
+        while self.is_operator('OR'):
+            self.pos += 1
+            nodes.append(self.parse_and())
+        return _combine(Or, nodes)
+
+    def parse_and(self) -> Optional[Node]:
+        nodes = [self.parse_not()]
+        while self.is_operator('AND'):
+            self.pos += 1
+            nodes.append(self.parse_not())
+        return _combine(And, nodes)
+
+    def parse_not(self) -> Optional[Node]:
+        if self.is_operator('NOT'):
+            self.pos += 1
+            self.negated += 1
+            child = self.parse_not()
+            self.negated -= 1
+            return Not(child) if child is not None else None
+        return self.parse_primary()
+
+    def parse_primary(self) -> Optional[Node]:
+        kind, match = self.peek()
+        if kind is None or kind in ('operator', 'distance'):
+            return None
+
+        if kind == 'paren':
+            if match.group() == ')':
+                return None
+            self.pos += 1
+            node = self.parse_group(nested=True)
+            if self.peek()[0] == 'paren':
+                self.pos += 1  # closing parenthesis
+            return node
+
+        self.pos += 1
+
+        if kind == 'phrase':
+            self.rank(match.group('phrase'))
+            return _word_node(match.group('phrase'))
+
+        if kind == 'field':
+            value = match.group('value').strip('"')
+            if match.group('field').lower() == 'filename':
+                return FilenameFilter(fold(value))
+            return _uploaded_filter(value)
+
+        # Plain word, possibly the left operand of NEAR/k
+        word = match.group('word')
+        self.rank(word)
+        next_kind, next_match = self.peek()
+        if next_kind == 'distance' and self.pos + 1 < len(self.tokens) \
+                and self.tokens[self.pos + 1][0] == 'word':
+            right = self.tokens[self.pos + 1][1].group('word')
+            self.pos += 2
+            self.rank(right)
+            left_node, right_node = _word_node(word), _word_node(right)
+            if isinstance(left_node, Term) and isinstance(right_node, Term):
+                return Near(left_node.term, right_node.term, int(next_match.group('distance')))
+            return _combine(And, [left_node, right_node])
+
+        return _word_node(word)
+
+
+def parse_query(query: str) -> ParsedQuery:
+    """
+    Parse phrase, proximity, boolean and field operators out of a search query
+
+    Args:
+        query: Raw search query
+
+    Returns:
+        ParsedQuery with the plain ranking text and the filter
+
+    Raises:
+        ValueError: If a field filter value is invalid (e.g. a bad date)
+    """
+    parser = _Parser(query)
+    node = parser.parse_group()
+    return ParsedQuery(' '.join(parser.words), node)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for cache keys
+
+    Words are ASCII-folded and lowercased like the index terms; boolean
+    operators keep their case because "AND" and "and" mean different things.
+    """
+    tokens = []
+    for match in QUERY_TOKEN_PATTERN.finditer(query):
+        text = match.group()
+        tokens.append(text if match.lastgroup == 'operator' else fold(text))
+    return ' '.join(tokens)
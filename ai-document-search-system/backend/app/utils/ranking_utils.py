@@ -0,0 +1,92 @@
+"""
+[Human-written] Ranking Utilities
+Top-k selection and result fusion helpers shared by the search engines (no AI)
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+
+    Uses partial selection (argpartition, O(n)) and sorts only the selected
+    k entries instead of sorting every score.
+
+    Args:
+        scores: Score per candidate
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices into scores
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if n > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(n)
+
+    # argpartition scrambles the selected indices: break ties on the index
+    # so that earlier rows come first, as with a full stable sort
+    top = np.sort(top)
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def fuse_weighted(rankings: Sequence[List[Tuple[str, float]]], weights: Sequence[float],
+                  top_k: int) -> List[Tuple[str, float]]:
+    """
+    Combine ranked lists with a weighted sum of max-normalized scores
+
+    Each list is scaled so that its best score is 1, which makes scores of
+    different engines (cosine, BM25) comparable. A document missing from a
+    list contributes 0 for it.
+
+    Args:
+        rankings: Lists of (doc_id, score), best first
+        weights: Weight of each list
+        top_k: Number of results to return
+
+    Returns:
+        List of (doc_id, fused score), best first (ties keep first-seen order)
+    """
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if not ranking:
+            continue
+        best = max(score for _, score in ranking) or 1.0
+        for doc_id, score in ranking:
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * score / best
+
+    ranked = sorted(fused.items(), key=lambda item: -item[1])
+    return ranked[:top_k]
+
+
+def fuse_rrf(rankings: Sequence[List[Tuple[str, float]]], top_k: int,
+             k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Combine ranked lists with reciprocal rank fusion
+
+    Every list adds 1 / (k + rank) for each of its documents (rank starts at
+    1). Only ranks are used, so engines with unrelated score scales need no
+    normalization; k damps the advantage of the very first ranks.
+
+    Args:
+        rankings: Lists of (doc_id, score), best first
+        top_k: Number of results to return
+        k: Rank constant (60 in the original RRF paper)
+
+    Returns:
+        List of (doc_id, fused score), best first (ties keep first-seen order)
+    """
+    fused: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+
+    ranked = sorted(fused.items(), key=lambda item: -item[1])
+    return ranked[:top_k]
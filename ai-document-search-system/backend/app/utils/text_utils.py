@@ -4,7 +4,16 @@ Classical text cleaning and chunking using deterministic methods (no AI)
 """
 
 import re
-from typing import List
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+from unidecode import unidecode  # Turkish character normalization
+
+# Same token definition as sklearn's default token_pattern
+TOKEN_PATTERN = re.compile(r'(?u)\b\w\w+\b')
+WORD_PATTERN = re.compile(r'(?u)\w+')
+NON_SPACE_PATTERN = re.compile(r'\S+')
 
 
 def clean_text(text: str) -> str:
@@ -32,6 +41,51 @@ def clean_text(text: str) -> str:
     return text
 
 
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index terms (no AI)
+
+    Mirrors the analyzer of the TF-IDF vectorizer in search_service:
+    Turkish characters folded to ASCII, lowercased, English stop words removed.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms in document order
+    """
+    return [term for term, _, _, _ in tokenize_with_positions(text)]
+
+
+def tokenize_with_positions(text: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Split text into index terms with their positions (no AI)
+
+    Word positions count every token, stop words included, so the gaps
+    between terms stay exact for phrase and proximity matching; stop words
+    themselves are not returned. Character offsets refer to the original
+    (not ASCII-folded) text.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of (term, word position, char start, char end) in document order
+    """
+    tokens = []
+    position = 0
+    for match in WORD_PATTERN.finditer(text):
+        word = match.group()
+        normalized = word.lower() if word.isascii() else unidecode(word).lower()
+
+        for token in TOKEN_PATTERN.findall(normalized):
+            if token not in ENGLISH_STOP_WORDS:
+                tokens.append((token, position, match.start(), match.end()))
+            position += 1
+
+    return tokens
+
+
 def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
     """
     Split text into chunks using word-based chunking (no AI)
@@ -63,6 +117,153 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]
     return chunks
 
 
+def chunk_text_with_offsets(text: str, chunk_size: int = 500, overlap: int = 50) -> List[Dict]:
+    """
+    Split text into overlapping word windows, keeping character offsets (no AI)
+
+    Same windowing as chunk_text(), but each chunk is a slice of the original
+    text so it can be located (and re-sliced) later.
+
+    Args:
+        text: Text to chunk
+        chunk_size: Approximate number of words per chunk
+        overlap: Number of words to overlap between chunks
+
+    Returns:
+        List of dicts with 'text', 'start' and 'end' (character offsets)
+    """
+    spans = [m.span() for m in re.finditer(r'\S+', text)]
+    chunks = []
+
+    if not spans:
+        return chunks
+
+    start = 0
+    while start < len(spans):
+        end = min(start + chunk_size, len(spans))
+        char_start = spans[start][0]
+        char_end = spans[end - 1][1]
+        chunks.append({
+            'text': text[char_start:char_end],
+            'start': char_start,
+            'end': char_end
+        })
+
+        # Move start position with overlap
+        start = end - overlap if end < len(spans) else len(spans)
+
+    return chunks
+
+
+def best_snippet_window(term_ids: Sequence[int], positions: Sequence[int],
+                        window: int) -> Tuple[int, int]:
+    """
+    Choose the snippet window covering the most distinct query terms
+
+    Slides over the query-term occurrences of a document (sorted by word
+    position); ties are broken by the number of occurrences, then by the
+    earliest window.
+
+    Args:
+        term_ids: Query term index of each occurrence
+        positions: Word position of each occurrence (ascending)
+        window: Window length in words
+
+    Returns:
+        (first, last) occurrence indices (inclusive) of the best window
+    """
+    best, best_key = (0, 0), (0, 0)
+    counts: Counter = Counter()
+    first = 0
+
+    for last in range(len(positions)):
+        counts[term_ids[last]] += 1
+        while positions[last] - positions[first] >= window:
+            counts[term_ids[first]] -= 1
+            if counts[term_ids[first]] == 0:
+                del counts[term_ids[first]]
+            first += 1
+
+        key = (len(counts), last - first + 1)
+        if key > best_key:
+            best, best_key = (first, last), key
+
+    return best
+
+
+def build_snippet(text: str, hits: Sequence[Tuple[int, int]],
+                  context_words: int = 10) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Build a snippet around known term occurrences, with highlight offsets
+
+    Only the text around the hits is scanned (never the whole document).
+
+    Args:
+        text: Full text
+        hits: (char start, char end) of the occurrences to show, ascending
+        context_words: Number of words to include before and after the hits
+
+    Returns:
+        Tuple of (snippet, highlights) where highlights are (start, end)
+        offsets into the snippet
+    """
+    # Generous character budget per context word
+    budget = context_words * 40
+    if hits:
+        start, end = hits[0][0], hits[-1][1]
+    else:
+        start = end = 0
+        context_words *= 2
+
+    # Extend to context_words whole words on each side
+    left = max(0, start - budget)
+    before = list(NON_SPACE_PATTERN.finditer(text, left, start))
+    word_start = start
+    if before and before[-1].end() == start:
+        # The hit starts inside a word (e.g. after a parenthesis)
+        word_start = before.pop().start()
+    if before and context_words > 0:
+        left = before[max(0, len(before) - context_words)].start()
+    else:
+        left = word_start
+
+    words = []
+    for match in NON_SPACE_PATTERN.finditer(text, left, end + budget):
+        words.append(match.span())
+        if match.start() >= end:
+            context_words -= 1
+            if context_words <= 0:
+                break
+    if not words:
+        return '', []
+    right = words[-1][1]
+
+    # Join the words with single spaces, remembering where each one landed
+    parts, offsets = [], []
+    prefix = '...' if NON_SPACE_PATTERN.search(text, 0, words[0][0]) else ''
+    length = len(prefix)
+    for word_start, word_end in words:
+        if parts:
+            length += 1
+        offsets.append((word_start, length))
+        parts.append(text[word_start:word_end])
+        length += word_end - word_start
+    snippet = prefix + ' '.join(parts)
+    if NON_SPACE_PATTERN.search(text, right):
+        snippet += '...'
+
+    highlights = []
+    word_index = 0
+    for hit_start, hit_end in hits:
+        while word_index + 1 < len(words) and words[word_index + 1][0] <= hit_start:
+            word_index += 1
+        word_start, snippet_start = offsets[word_index]
+        offset = snippet_start + hit_start - word_start
+        highlights.append((offset, offset + hit_end - hit_start))
+
+    return snippet, highlights
+
+
 def extract_snippet(text: str, query: str, context_words: int = 10) -> str:
     """
     Extract a snippet around the first occurrence of query in text
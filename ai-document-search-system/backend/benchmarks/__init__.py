@@ -0,0 +1,4 @@
+"""
+[Human-written] Benchmarks
+Standalone performance scripts, run with: python -m benchmarks.<name>
+"""
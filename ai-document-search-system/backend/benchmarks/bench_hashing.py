@@ -0,0 +1,92 @@
+"""
+[Human-written] TF-IDF Vectorizer Mode Benchmark
+Recall on rare terms, memory and latency of the capped vocabulary vs feature
+hashing (settings.tfidf_vectorizer)
+
+Recall@k: queries are single mid/low frequency terms; the relevant
+documents are the ones containing the term (from the inverted index).
+Memory: document matrix + IDF table + vocabulary dict (terms included).
+
+Usage (from backend/):
+    python -m benchmarks.bench_hashing [--sizes 5000 20000] [--queries 300]
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List
+from unittest.mock import patch
+
+from app.config import settings
+from app.services.inverted_index import InvertedIndex
+from app.services.search_service import SearchService
+from benchmarks.bench_topk import TOP_K, VOCABULARY_SIZE, make_corpus, time_per_query
+
+MODES = {
+    "vocabulary (1000)": {"tfidf_vectorizer": "vocabulary", "tfidf_max_features": 1000},
+    "vocabulary (all)": {"tfidf_vectorizer": "vocabulary", "tfidf_max_features": None},
+    "hashing (2^18)": {"tfidf_vectorizer": "hashing", "tfidf_hash_features": 2 ** 18},
+    "hashing (2^20)": {"tfidf_vectorizer": "hashing", "tfidf_hash_features": 2 ** 20},
+}
+
+
+def index_bytes(service: SearchService) -> int:
+    """Approximate memory of the TF-IDF matrix, IDF table and vocabulary"""
+    matrix = service.doc_vectors
+    total = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    total += service.vectorizer.idf_.nbytes
+    vocabulary = getattr(service.vectorizer, 'vocabulary_', None)
+    if vocabulary:
+        total += sys.getsizeof(vocabulary) + sum(sys.getsizeof(term) for term in vocabulary)
+    return total
+
+
+def make_rare_queries(n_queries: int, rng: random.Random) -> List[str]:
+    """Single terms outside the 1000 most frequent ones"""
+    return [f"term{rng.randint(1000, VOCABULARY_SIZE - 1)}" for _ in range(n_queries)]
+
+
+def recall_at_k(service: SearchService, inverted: InvertedIndex, queries: List[str]) -> float:
+    recall = []
+    for query in queries:
+        relevant = set(inverted.rows_to_doc_ids(inverted.term_rows(query)))
+        if not relevant:
+            continue
+        found = {doc_id for doc_id, _ in service._rank_tfidf(query, TOP_K)}
+        recall.append(len(found & relevant) / min(TOP_K, len(relevant)))
+    return sum(recall) / len(recall) if recall else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    queries = make_rare_queries(args.queries, rng)
+
+    print(f"{'docs':>7} | {'mode':<18} | {'fit (s)':>7} | {'MB':>7} | {'ms/query':>8} | {'recall@' + str(TOP_K):>9}")
+    for n_docs in args.sizes:
+        corpus: Dict[str, str] = make_corpus(n_docs, rng)
+        inverted = InvertedIndex()
+        inverted.build(corpus)
+
+        for mode, overrides in MODES.items():
+            mode_settings = settings.model_copy(update={**overrides, "index_compaction_threshold": 100})
+            with patch("app.services.search_service.settings", mode_settings):
+                service = SearchService()
+                start = time.perf_counter()
+                service.build(corpus)
+                fit_s = time.perf_counter() - start
+
+                query_ms = time_per_query(lambda q: service._rank_tfidf(q, TOP_K), queries)
+                recall = recall_at_k(service, inverted, queries)
+                mb = index_bytes(service) / 2 ** 20
+
+            print(f"{n_docs:>7} | {mode:<18} | {fit_s:>7.2f} | {mb:>7.1f} | {query_ms:>8.3f} | {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
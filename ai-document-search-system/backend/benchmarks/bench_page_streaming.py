@@ -0,0 +1,67 @@
+"""
+[Human-written] Page Streaming Benchmark
+Peak Python memory and wall time of storing an extracted PDF: whole text
+(extract_text_from_pdf + put) vs pages streamed into the store (iter_pdf_pages
++ put_pages)
+
+Memory is the tracemalloc peak (Python objects only; PyMuPDF's own buffers
+are not counted). Extraction runs in-process (workers=1) for both. Indexing
+is not measured: an upload decodes the whole stored text for it either way.
+
+Usage (from backend/):
+    python -m benchmarks.bench_page_streaming [--pages 100 400]
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.services.document_store import DocumentStore
+from app.services.pdf_service import extract_text_from_pdf, iter_pdf_pages
+from benchmarks.bench_pdf_extraction import make_pdf
+
+
+def measure(function):
+    """(seconds, peak traced bytes) of one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 400])
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'pages':>6} | {'mode':>8} | {'seconds':>8} | {'peak MiB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in args.pages:
+            pdf_path = Path(tmp) / f"report-{n_pages}.pdf"
+            make_pdf(pdf_path, n_pages, rng)
+            store = DocumentStore(Path(tmp) / f"store-{n_pages}", cache_size=0)
+
+            def joined():
+                extracted = extract_text_from_pdf(pdf_path, workers=1)
+                store.put("joined", extracted['full_text'], extracted['page_table'])
+
+            def streamed():
+                store.put_pages("streamed", iter_pdf_pages(pdf_path, workers=1))
+
+            for mode, function in (("joined", joined), ("streamed", streamed)):
+                seconds, peak = measure(function)
+                print(f"{n_pages:>6} | {mode:>8} | {seconds:>8.2f} | {peak / 2 ** 20:>8.2f}")
+
+            assert bytes(store.get_bytes("joined")) == bytes(store.get_bytes("streamed"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+[Human-written] PDF Page Extraction Benchmark
+Wall time of extract_text_from_pdf on multi-hundred-page PDFs, in-process
+vs page ranges on a pool of worker processes (settings.pdf_extraction_workers)
+
+The PDFs are generated with PyMuPDF (dense text pages). The pool is warmed
+up before timing, as it is in a running server after the first large upload.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pdf_extraction [--pages 200 500] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from app.services.pdf_service import extract_text_from_pdf, shutdown_extraction_pool
+
+WORDS_PER_PAGE = 600
+
+
+def make_pdf(path: Path, n_pages: int, rng: random.Random) -> None:
+    """Write a PDF of n_pages A4 pages filled with random words"""
+    doc = fitz.open()
+    for _ in range(n_pages):
+        page = doc.new_page()
+        text = " ".join(f"term{rng.randint(0, 20000)}" for _ in range(WORDS_PER_PAGE))
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=7)
+    doc.save(path)
+    doc.close()
+
+
+def best_of(runs: int, function) -> float:
+    """Best wall time of several runs, in seconds"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 500])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'pages':>6} | {'workers':>7} | {'seconds':>8} | {'pages/s':>8} | {'speedup':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in args.pages:
+            pdf_path = Path(tmp) / f"report-{n_pages}.pdf"
+            make_pdf(pdf_path, n_pages, rng)
+            expected = extract_text_from_pdf(pdf_path, workers=1)["full_text"]
+
+            baseline = None
+            for workers in args.workers:
+                extracted = extract_text_from_pdf(pdf_path, workers=workers)  # warm-up
+                assert extracted["full_text"] == expected
+                seconds = best_of(args.runs, lambda: extract_text_from_pdf(pdf_path, workers=workers))
+                baseline = baseline or seconds
+                print(f"{n_pages:>6} | {workers:>7} | {seconds:>8.2f} | {n_pages / seconds:>8.0f} | "
+                      f"{baseline / seconds:>6.2f}x")
+
+    shutdown_extraction_pool()
+
+
+if __name__ == "__main__":
+    main()
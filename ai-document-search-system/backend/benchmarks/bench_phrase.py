@@ -0,0 +1,43 @@
+"""
+[Human-written] Phrase / Proximity Query Benchmark
+Latency of "quoted phrase" and NEAR/k matching on the positional postings
+vs corpus size
+
+Usage (from backend/):
+    python -m benchmarks.bench_phrase [--sizes 1000 10000 30000] [--queries 100]
+"""
+
+import argparse
+import random
+
+from app.services.inverted_index import InvertedIndex
+from app.utils.query_parser import parse_query
+from benchmarks.bench_topk import make_corpus, time_per_query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 30000])
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    def pair() -> str:
+        return f"term{rng.randint(0, 50)} term{rng.randint(0, 500)}"
+
+    phrases = [parse_query(f'"{pair()}"') for _ in range(args.queries)]
+    nears = [parse_query(pair().replace(" ", " NEAR/5 ")) for _ in range(args.queries)]
+
+    print(f"{'docs':>8} | {'phrase':>10} | {'near/5':>10}   (ms/query)")
+    for n_docs in args.sizes:
+        index = InvertedIndex()
+        index.build(make_corpus(n_docs, rng))
+
+        phrase_ms = time_per_query(index.match_rows, phrases)
+        near_ms = time_per_query(index.match_rows, nears)
+        print(f"{n_docs:>8} | {phrase_ms:>10.3f} | {near_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
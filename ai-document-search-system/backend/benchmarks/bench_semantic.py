@@ -0,0 +1,86 @@
+"""
+[Human-written] Semantic Search Benchmark
+LSA fit time, query latency and recall@k of the LSH index vs brute force
+(exact cosine over every LSA vector)
+
+The corpus is a topic mixture (each document draws most of its words from
+one or two topics) - unlike the uniform Zipf corpus of bench_topk it has
+the latent structure LSA is meant to find.
+
+Usage (from backend/):
+    python -m benchmarks.bench_semantic [--sizes 10000 50000] [--queries 200]
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from app.services.search_service import SearchService
+from benchmarks.bench_topk import TOP_K, time_per_query
+
+N_TOPICS = 100
+TOPIC_TERMS = 50
+
+
+def topic_terms(topic: int) -> List[str]:
+    return [f"topic{topic}term{i}" for i in range(TOPIC_TERMS)]
+
+
+def make_topic_corpus(n_docs: int, rng: random.Random) -> Dict[str, str]:
+    """Documents mixing one or two topics with background words"""
+    background = [f"common{i}" for i in range(500)]
+    corpus = {}
+    for i in range(n_docs):
+        topics = rng.sample(range(N_TOPICS), rng.randint(1, 2))
+        words = []
+        for topic in topics:
+            words += rng.choices(topic_terms(topic), k=rng.randint(20, 100))
+        words += rng.choices(background, k=rng.randint(10, 50))
+        rng.shuffle(words)
+        corpus[str(i)] = " ".join(words)
+    return corpus
+
+
+def make_topic_queries(n_queries: int, rng: random.Random) -> List[str]:
+    """Two or three words of one topic"""
+    return [
+        " ".join(rng.sample(topic_terms(rng.randrange(N_TOPICS)), rng.randint(2, 3)))
+        for _ in range(n_queries)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    queries = make_topic_queries(args.queries, rng)
+
+    print(f"{'docs':>8} | {'fit (s)':>8} | {'exact':>8} | {'lsh':>8} | {'recall@' + str(TOP_K):>9}   (ms/query)")
+    for n_docs in args.sizes:
+        service = SearchService()
+        service.build(make_topic_corpus(n_docs, rng))
+
+        start = time.perf_counter()
+        service.search_semantic("warm up")
+        fit_s = time.perf_counter() - start
+
+        exact_ms = time_per_query(lambda q: service.search_semantic(q, TOP_K, exact=True), queries)
+        lsh_ms = time_per_query(lambda q: service.search_semantic(q, TOP_K), queries)
+
+        recall = []
+        for query in queries:
+            exact = {doc_id for doc_id, _ in service.search_semantic(query, TOP_K, exact=True)}
+            found = {doc_id for doc_id, _ in service.search_semantic(query, TOP_K)}
+            if exact:
+                recall.append(len(found & exact) / len(exact))
+
+        mean_recall = sum(recall) / len(recall) if recall else 0.0
+        print(f"{n_docs:>8} | {fit_s:>8.2f} | {exact_ms:>8.3f} | {lsh_ms:>8.3f} | {mean_recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
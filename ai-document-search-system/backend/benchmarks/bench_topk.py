@@ -0,0 +1,86 @@
+"""
+[Human-written] Top-k Ranking Benchmark
+Query latency vs corpus size: exhaustive scoring + full sort vs pruned /
+partial top-k selection
+
+Usage (from backend/):
+    python -m benchmarks.bench_topk [--sizes 1000 10000 50000] [--queries 200]
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.services.inverted_index import InvertedIndex
+from app.utils.ranking_utils import top_k_indices
+
+VOCABULARY_SIZE = 20000
+TOP_K = 10
+
+
+def make_corpus(n_docs: int, rng: random.Random) -> Dict[str, str]:
+    """Synthetic corpus with a Zipfian term distribution"""
+    words = [f"term{i}" for i in range(VOCABULARY_SIZE)]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY_SIZE)]
+    return {
+        str(i): " ".join(rng.choices(words, weights, k=rng.randint(50, 400)))
+        for i in range(n_docs)
+    }
+
+
+def make_queries(n_queries: int, rng: random.Random) -> List[str]:
+    """Queries mixing one frequent term with mid/low frequency terms"""
+    return [
+        " ".join([f"term{rng.randint(0, 20)}"] +
+                 [f"term{rng.randint(20, 2000)}" for _ in range(rng.randint(1, 3))])
+        for _ in range(n_queries)
+    ]
+
+
+def time_per_query(fn: Callable[[str], object], queries: List[str]) -> float:
+    """Mean latency in milliseconds"""
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def bm25_exhaustive(index: InvertedIndex, query: str):
+    """Score every matching document, then sort all of them"""
+    rows, scores = index.score(query)
+    order = np.argsort(scores)[::-1][:TOP_K]
+    return rows[order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    queries = make_queries(args.queries, rng)
+
+    print(f"{'docs':>8} | {'bm25 full':>10} | {'maxscore':>10} | "
+          f"{'argsort':>10} | {'argpartition':>12}   (ms/query)")
+    for n_docs in args.sizes:
+        index = InvertedIndex()
+        index.build(make_corpus(n_docs, rng))
+
+        full_ms = time_per_query(lambda q: bm25_exhaustive(index, q), queries)
+        maxscore_ms = time_per_query(lambda q: index.score_top_k(q, TOP_K), queries)
+
+        # Dense score vector as produced by the TF-IDF cosine similarity
+        dense = np.random.default_rng(0).random(n_docs)
+        argsort_ms = time_per_query(lambda q: np.argsort(dense)[::-1][:TOP_K], queries)
+        partition_ms = time_per_query(lambda q: top_k_indices(dense, TOP_K), queries)
+
+        print(f"{n_docs:>8} | {full_ms:>10.3f} | {maxscore_ms:>10.3f} | "
+              f"{argsort_ms:>10.3f} | {partition_ms:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Unit tests for the Document Store (mmap-backed text storage)
+
+Tests cover:
+- Put/get round trip with non-ASCII text
+- Zero-copy byte slices
+- Replace and delete, persisted across reopen
+- Import of legacy <doc_id>.txt files
+- Compaction of deleted texts
+- Recovery from a torn write
+- Page tables: reading single pages, offset -> page lookup
+- Streaming pages into the store (same layout, reads not blocked, failures undone)
+"""
+
+import threading
+
+import pytest
+from app.services.document_store import DocumentStore, INDEX_FILE
+from app.services.pdf_service import join_pages
+
+@pytest.fixture
+def store(tmp_path):
+    return DocumentStore(tmp_path, cache_size=2)
+
+def test_put_and_get(store):
+    """Test that stored texts are read back (including Turkish characters)"""
+    store.put("1", "Bitirme çalışması")
+    store.put("2", "Second document")
+
+    assert store.get("1") == "Bitirme çalışması"
+    assert bytes(store.get_bytes("2")) == b"Second document"
+    assert isinstance(store.get_bytes("2"), memoryview)
+    assert len(store) == 2
+
+def test_missing_document(store):
+    """Test that unknown documents raise FileNotFoundError"""
+    with pytest.raises(FileNotFoundError):
+        store.get("404")
+
+def test_replace_delete_and_reopen(store, tmp_path):
+    """Test that the offset table replays replaces and deletions"""
+    store.put("1", "old text")
+    store.put("1", "new text")
+    store.put("2", "to be deleted")
+    assert store.delete("2") is True
+    assert store.delete("2") is False
+
+    reopened = DocumentStore(tmp_path)
+
+    assert reopened.get("1") == "new text"
+    assert "2" not in reopened
+    assert reopened.doc_ids() == ["1"]
+
+def test_legacy_text_file_imported(store, tmp_path):
+    """Test that texts extracted by older versions are moved into the store"""
+    (tmp_path / "legacy.txt").write_text("Legacy content", encoding="utf-8")
+
+    assert store.get("legacy") == "Legacy content"
+    assert not (tmp_path / "legacy.txt").exists()
+    assert DocumentStore(tmp_path).get("legacy") == "Legacy content"
+
+def test_compact(store, tmp_path):
+    """Test that compaction drops deleted texts and keeps live ones readable"""
+    store.put("1", "keep me")
+    store.put("2", "x" * 1000)
+    old_data = store.data_path
+    store.delete("2")
+
+    store.compact()
+
+    assert not old_data.exists()
+    assert store.data_path.stat().st_size == len("keep me")
+    assert DocumentStore(tmp_path).get("1") == "keep me"
+
+def test_torn_record_ignored(store, tmp_path):
+    """Test that a half-written offset record does not break reopening"""
+    store.put("1", "complete")
+    with open(tmp_path / INDEX_FILE, 'a', encoding='utf-8') as f:
+        f.write('["2", 8, 10')  # crash while appending
+
+    reopened = DocumentStore(tmp_path)
+
+    assert reopened.doc_ids() == ["1"]
+    assert reopened.get("1") == "complete"
+
+def test_pages_read_without_whole_document(store, tmp_path):
+    """Test that pages are read from the mapping, the LRU and after compaction alike"""
+    # Setup - an empty first page and multi-byte characters
+    pages = ["", "Çevik yazılım", "Sprint planlama", ""]
+    text, page_table = join_pages(pages)
+    store.put("1", text, page_table)
+    store.put("2", "No pages here")
+    store.put("3", "evict 1 from the LRU")
+    store.put("4", "x" * 100)
+    store.delete("4")
+
+    # Execute
+    from_mapping = store.get_pages("1", 0, 10)
+    store.get("1")
+    from_cache = store.get_pages("1", 1, 3)
+    store.compact()
+    reopened = DocumentStore(tmp_path, cache_size=0)
+
+    # Assert
+    assert text == "Çevik yazılım\n\nSprint planlama"
+    assert from_mapping == pages
+    assert from_cache == pages[1:3]
+    assert reopened.get_pages("1", 2, 3) == ["Sprint planlama"]
+    assert reopened.page_count("1") == 4 and reopened.page_count("2") is None
+    assert [reopened.page_at("1", offset) for offset in (0, 14, 15, len(text))] == [1, 1, 2, 3]
+    assert reopened.page_at("2", 0) is None
+    with pytest.raises(ValueError):
+        reopened.get_pages("2", 0, 1)
+
+@pytest.mark.parametrize("pages", [
+    ["Çevik", "yazılım"],
+    ["", "", "Sprint", "", "", "Kanban", "", ""],
+    ["", ""],
+    [],
+])
+def test_put_pages_matches_join(store, pages):
+    """Test that streamed pages are stored exactly like the joined text"""
+    # Execute
+    page_table = store.put_pages("streamed", iter(pages))
+    store.put("joined", *join_pages(pages))
+
+    # Assert
+    assert page_table == store.page_table("joined")
+    assert bytes(store.get_bytes("streamed")) == bytes(store.get_bytes("joined"))
+    assert store.get_pages("streamed", 0, len(pages)) == pages
+
+def test_put_pages_streams_without_blocking_reads(store, tmp_path):
+    """Test that reads go on while pages are produced and a failed stream leaves no trace"""
+    # Setup
+    store.put("1", "already stored")
+    reads = []
+    def pages():
+        yield "first page"
+        reader = threading.Thread(target=lambda: reads.append(store.get("1")))
+        reader.start()
+        reader.join(5)
+        raise ValueError("Corrupt page")
+    size = store.data_path.stat().st_size
+
+    # Execute
+    with pytest.raises(ValueError):
+        store.put_pages("2", pages())
+    store.put("3", "after the failure")
+
+    # Assert - the partial text was truncated away before the next write
+    assert reads == ["already stored"]
+    assert "2" not in store
+    assert store.data_path.stat().st_size == size + len("after the failure")
+    assert DocumentStore(tmp_path).get("3") == "after the failure"
@@ -0,0 +1,88 @@
+"""
+Unit tests for the background ingestion queue
+
+Tests cover:
+- Stage progress, failures and backpressure of the bounded queue
+- Recovery of unfinished jobs from the journal on restart
+"""
+
+import json
+import queue
+import threading
+from unittest.mock import patch
+
+import pytest
+from app.config import settings
+from app.services.ingestion_service import IngestionQueue
+
+@pytest.fixture
+def queue_settings(tmp_path):
+    """One worker, one queued job at most, journal in a temp dir"""
+    test_settings = settings.model_copy(update={
+        "jobs_file": tmp_path / "jobs.json",
+        "ingestion_workers": 1,
+        "ingestion_queue_size": 1,
+    })
+    with patch("app.services.ingestion_service.settings", test_settings):
+        yield test_settings
+
+def test_backpressure_stages_and_failures(queue_settings):
+    """Test that a full queue refuses jobs and outcomes are recorded"""
+    # Setup - the handler blocks until released
+    started, release = threading.Event(), threading.Event()
+    def handler(job, set_stage):
+        started.set()
+        set_stage("extracting")
+        release.wait(5)
+        if job["fail"]:
+            raise ValueError("Corrupt PDF")
+        set_stage("indexing")
+    ingestion = IngestionQueue(handler)
+
+    # Execute - first job running, second queued, third refused
+    running = ingestion.submit({"fail": False})
+    started.wait(5)
+    queued = ingestion.submit({"fail": True})
+    with pytest.raises(queue.Full):
+        ingestion.submit({"fail": False})
+    in_progress = ingestion.get(running["job_id"])
+    unfinished = json.loads(queue_settings.jobs_file.read_text(encoding="utf-8"))
+    release.set()
+    ingestion.join()
+
+    # Assert
+    assert in_progress["status"] == "processing" and in_progress["stage"] == "extracting"
+    assert in_progress["progress"] == 0.25
+    assert ingestion.get(running["job_id"])["status"] == "done"
+    failed = ingestion.get(queued["job_id"])
+    assert failed["status"] == "failed" and failed["error"] == "Corrupt PDF"
+    assert ingestion.stats()["jobs"] == {"done": 1, "failed": 1}
+    # The journal only holds the unfinished jobs
+    assert {job["job_id"] for job in unfinished["jobs"]} == {running["job_id"], queued["job_id"]}
+    journal = json.loads(queue_settings.jobs_file.read_text(encoding="utf-8"))
+    assert journal["jobs"] == []
+
+def test_restart_recovers_unfinished_jobs(queue_settings):
+    """Test that queued and interrupted jobs run again after a restart"""
+    # Setup - journal left by a process that stopped mid-way
+    def job(job_id, status, created_at):
+        return {"job_id": job_id, "doc_id": job_id, "status": status, "stage": "queued",
+                "progress": 0.0, "error": None, "created_at": created_at, "updated_at": created_at}
+    queue_settings.jobs_file.write_text(json.dumps({"jobs": [
+        job("queued", "queued", "2024-05-01T10:00:02"),
+        job("interrupted", "processing", "2024-05-01T10:00:01"),
+        job("finished", "done", "2024-05-01T10:00:00"),
+    ]}), encoding="utf-8")
+    ran = []
+    ingestion = IngestionQueue(lambda job, set_stage: ran.append(job["doc_id"]))
+
+    # Execute - more recovered jobs than queue slots, start() does not wait
+    recovered = ingestion.start()
+    ingestion.join()
+    ingestion.stop()
+
+    # Assert - in upload order, the finished job is not run again
+    assert recovered == 2
+    assert ran == ["interrupted", "queued"]
+    assert ingestion.get("queued")["status"] == "done"
+    assert ingestion.get("finished")["status"] == "done"
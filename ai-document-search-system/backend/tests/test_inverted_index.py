@@ -0,0 +1,264 @@
+"""
+Unit tests for the Inverted Index (BM25 ranking)
+
+Tests cover:
+- BM25 ranking over postings lists
+- No vocabulary cap (rare terms stay searchable)
+- Only documents containing a query term are scored
+- Tombstoned deletions (compacted in memory past the threshold)
+- MaxScore top-k matches exhaustive scoring
+- Term positions and character offsets
+- Phrase and NEAR/k matching on positional postings
+- Boolean and field filters, skip-pointer intersection
+- Save/load round trip
+- Live document frequencies per term id
+"""
+
+import random
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.config import settings
+from app.services.inverted_index import InvertedIndex, intersect_sorted
+from app.services.search_service import SearchService
+from app.utils.query_parser import parse_query
+
+MOCK_TEXTS = {
+    "1": "Artificial Intelligence is transforming software engineering.",
+    "2": "Traditional software development uses waterfall model.",
+    "3": "Waterfall and waterfall again: the waterfall model in detail."
+}
+
+MOCK_FIELDS = {
+    "1": {"filename": "AI_Report.pdf", "uploaded_at": "2024-03-15T10:00:00"},
+    "2": {"filename": "waterfall-notes.txt", "uploaded_at": "2024-05-02T09:30:00"},
+    "3": {"filename": "Şelale Raporu.pdf", "uploaded_at": "2024-05-20T18:00:00"}
+}
+
+@pytest.fixture
+def index():
+    """Inverted index with the mock documents"""
+    inverted = InvertedIndex()
+    inverted.build(MOCK_TEXTS, MOCK_FIELDS)
+    return inverted
+
+def test_bm25_ranking(index):
+    """Test that higher term frequency ranks higher"""
+    results = index.search("waterfall")
+
+    assert [doc_id for doc_id, _ in results] == ["3", "2"]
+    assert results[0][1] > results[1][1] > 0
+
+def test_only_matching_documents_scored(index):
+    """Test that documents without any query term are never touched"""
+    rows, scores = index.score("intelligence")
+
+    assert list(rows) == [0]
+    assert len(scores) == 1
+
+def test_no_vocabulary_cap():
+    """Test that rare terms beyond the TF-IDF max_features are searchable"""
+    texts = {str(i): f"common filler term{i}" for i in range(1500)}
+    inverted = InvertedIndex()
+    inverted.build(texts)
+
+    results = inverted.search("term1234")
+
+    assert [doc_id for doc_id, _ in results] == ["1234"]
+
+def test_remove_document(index):
+    """Test that removed documents no longer rank"""
+    assert index.remove_document("3") is True
+    assert [doc_id for doc_id, _ in index.search("waterfall")] == ["2"]
+    assert index.remove_document("3") is False
+
+def test_compaction_drops_tombstones(index):
+    """Test that tombstones past the threshold are compacted without touching forks"""
+    # Setup
+    fresh = InvertedIndex()
+    fresh.build({doc_id: MOCK_TEXTS[doc_id] for doc_id in ("2", "3")}, MOCK_FIELDS)
+    index.build(MOCK_TEXTS, MOCK_FIELDS)
+    before = index.fork()
+    test_settings = settings.model_copy(update={"index_compaction_threshold": 0.3})
+
+    # Execute
+    with patch("app.services.inverted_index.settings", test_settings):
+        index.remove_document("1")
+
+    # Assert - rows, postings and BM25 statistics only count live documents
+    assert index.doc_ids == ["2", "3"]
+    assert "intelligence" not in index._postings
+    results, expected = index.search("software waterfall"), fresh.search("software waterfall")
+    assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected])
+    assert [list(a) for a in index.hits("3", "waterfall")] == [list(a) for a in fresh.hits("3", "waterfall")]
+    assert index.rows_to_doc_ids(index.match_rows(parse_query("filename:*rapor*"))) == ["3"]
+    index.add_document("4", "waterfall review")
+    assert {doc_id for doc_id, _ in index.search("waterfall", top_k=3)} == {"2", "3", "4"}
+    assert before.doc_ids == ["1", "2", "3"] and before.search("intelligence")[0][0] == "1"
+
+def test_maxscore_matches_exhaustive():
+    """Test that pruned top-k returns the same documents as full scoring"""
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(200)]
+    weights = [1 / (rank + 1) for rank in range(len(words))]  # Zipf-like
+    texts = {
+        str(i): " ".join(rng.choices(words, weights, k=rng.randint(5, 60)))
+        for i in range(400)
+    }
+    inverted = InvertedIndex()
+    inverted.build(texts)
+    for doc_id in ("3", "50", "120"):
+        inverted.remove_document(doc_id)
+
+    for query in ("w0 w1 w150", "w2 w3 w4 w5", "w199 w0", "w10"):
+        rows, scores = inverted.score(query)
+        order = np.lexsort((rows, -scores))[:10]
+        top_rows, top_scores = inverted.score_top_k(query, 10)
+
+        assert list(top_rows) == list(rows[order])
+        assert top_scores == pytest.approx(scores[order])
+
+def test_hits_positions_and_offsets(index):
+    """Test that term occurrences are found by position lookup"""
+    text = MOCK_TEXTS["3"]
+    term_ids, positions, starts, ends = index.hits("3", "model waterfall")
+
+    # Sorted by position; term ids follow the query order
+    assert list(positions) == sorted(positions)
+    assert [text[s:e].lower() for s, e in zip(starts, ends)] == \
+        ["waterfall", "waterfall", "waterfall", "model"]
+    assert list(term_ids) == [1, 1, 1, 0]
+    assert index.hits("missing", "waterfall") is None
+
+def test_phrase_rows():
+    """Test that phrases need adjacent terms in order (stop words keep their slot)"""
+    inverted = InvertedIndex()
+    inverted.build({
+        "1": "The state of the art in search engines.",
+        "2": "Art is the state of mind.",
+        "3": "State art museum.",
+    })
+
+    rows = inverted.phrase_rows([("state", 0), ("art", 3)])
+
+    assert inverted.rows_to_doc_ids(rows) == ["1"]
+
+def test_near_rows():
+    """Test that NEAR/k matches terms within k words in either order"""
+    inverted = InvertedIndex()
+    inverted.build({
+        "1": "waterfall is a sequential model",
+        "2": "model before waterfall",
+        "3": "waterfall one two three four five six model",
+    })
+
+    assert inverted.rows_to_doc_ids(inverted.near_rows("waterfall", "model", 4)) == ["1", "2"]
+    assert inverted.rows_to_doc_ids(inverted.near_rows("waterfall", "model", 10)) == ["1", "2", "3"]
+
+def test_intersect_sorted():
+    """Test that the binary search intersection matches a full merge"""
+    rng = np.random.default_rng(7)
+    for short, long in [(0, 50), (5, 5000), (300, 400)]:
+        a = np.unique(rng.integers(0, 10000, short)).astype(np.int32)
+        b = np.unique(rng.integers(0, 10000, long)).astype(np.int32)
+
+        assert list(intersect_sorted(a, b)) == list(np.intersect1d(a, b))
+        assert list(intersect_sorted(b, a)) == list(np.intersect1d(a, b))
+
+@pytest.mark.parametrize("query, expected", [
+    ("software AND waterfall", ["2"]),
+    ("software OR waterfall", ["1", "2", "3"]),
+    ("waterfall AND NOT software", ["3"]),
+    ("NOT (intelligence OR traditional)", ["3"]),
+    ('"waterfall model" AND (traditional OR NOT software)', ["2", "3"]),
+    ("filename:report", ["1"]),
+    ("filename:*.pdf", ["1", "3"]),
+    ("filename:selale", ["3"]),
+    ("uploaded:2024-05", ["2", "3"]),
+    ("uploaded:<2024-05-02 OR filename:raporu", ["1", "3"]),
+    ("uploaded:2024-05-20..2024-06", ["3"]),
+])
+def test_boolean_and_field_filters(index, query, expected):
+    """Test boolean operators and metadata filters on the postings"""
+    rows = index.match_rows(parse_query(query))
+
+    assert index.rows_to_doc_ids(rows) == expected
+
+def test_filters_skip_tombstones(index):
+    """Test that removed documents never match, even under NOT"""
+    index.remove_document("2")
+
+    assert index.rows_to_doc_ids(index.match_rows(parse_query("NOT intelligence"))) == ["3"]
+    assert index.rows_to_doc_ids(index.match_rows(parse_query("uploaded:2024-05"))) == ["3"]
+
+def test_save_and_load(index, tmp_path):
+    """Test that saved postings (live rows only) rank like a fresh build"""
+    index.remove_document("1")
+    fresh = InvertedIndex()
+    fresh.build({doc_id: MOCK_TEXTS[doc_id] for doc_id in ("2", "3")})
+    expected = fresh.search("software waterfall")
+
+    test_settings = settings.model_copy(update={"index_dir": tmp_path})
+    with patch("app.services.inverted_index.settings", test_settings):
+        assert index.save_index() is True
+        restored = InvertedIndex()
+        assert restored.load_index() is True
+
+    assert restored.live_doc_ids() == ["2", "3"]
+    results = restored.search("software waterfall")
+    assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in expected]
+    assert [score for _, score in results] == pytest.approx([score for _, score in expected])
+    assert [list(a) for a in restored.hits("3", "waterfall")] == \
+        [list(a) for a in fresh.hits("3", "waterfall")]
+    filtered = restored.match_rows(parse_query("filename:*rapor* uploaded:>=2024-05"))
+    assert restored.rows_to_doc_ids(filtered) == ["3"]
+
+def test_document_frequencies_follow_changes(index, tmp_path):
+    """Test that live document frequencies track adds, removals, compaction and load"""
+    def doc_freqs(inverted):
+        return dict(zip(*inverted.document_frequencies()))
+
+    def expected(*doc_ids):
+        fresh = InvertedIndex()
+        fresh.build({doc_id: texts[doc_id] for doc_id in doc_ids})
+        return doc_freqs(fresh)
+
+    texts = dict(MOCK_TEXTS, **{"4": "waterfall review of the software"})
+    before = index.fork()
+    terms, by_id = index.vocabulary()
+
+    with patch("app.services.inverted_index.settings", settings.model_copy(update={"index_compaction_threshold": 100})):
+        index.add_document("4", texts["4"])
+        index.remove_document("2")
+    assert doc_freqs(index) == expected("1", "3", "4")
+    assert doc_freqs(before) == expected("1", "2", "3")
+    # Term ids are stable while the vocabulary grows
+    assert index.vocabulary()[0][:len(terms)] == terms
+    assert list(before.live_doc_freqs()) == list(by_id)
+
+    test_settings = settings.model_copy(update={"index_compaction_threshold": 0.3, "index_dir": tmp_path})
+    with patch("app.services.inverted_index.settings", test_settings):
+        index.remove_document("1")
+        assert index.doc_ids == ["3", "4"]  # compacted
+        assert doc_freqs(index) == expected("3", "4")
+        assert index.save_index() is True
+        restored = InvertedIndex()
+        assert restored.load_index() is True
+    assert doc_freqs(restored) == expected("3", "4")
+    restored.remove_document("3")
+    assert doc_freqs(restored) == expected("4")
+
+def test_search_service_bm25_engine():
+    """Test that settings.search_engine switches SearchService to BM25"""
+    service = SearchService()
+    service.inverted.build(MOCK_TEXTS)
+    service.doc_texts = dict(MOCK_TEXTS)
+
+    bm25_settings = settings.model_copy(update={"search_engine": "bm25"})
+    with patch("app.services.search_service.settings", bm25_settings):
+        results = service.search("waterfall", top_k=1)
+
+    assert results[0]['doc_id'] == "3"
+    assert "waterfall" in results[0]['snippet'].lower()
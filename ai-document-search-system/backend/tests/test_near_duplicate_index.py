@@ -0,0 +1,143 @@
+"""
+Unit tests for near-duplicate detection (MinHash + LSH)
+
+Tests cover:
+- MinHash estimates of the shingle Jaccard similarity
+- LSH lookups, removal and empty documents
+- Collapsing near-duplicates in search results
+- Signatures read back from metadata.json on load and rebuild
+"""
+
+import json
+import random
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from app.config import settings
+from app.services.document_store import DocumentStore
+from app.services.near_duplicate_index import (
+    NearDuplicateIndex, decode_signature, encode_signature, jaccard_estimate, minhash_signature
+)
+from app.services.pdf_service import save_extracted_text
+from app.services.search_service import SearchService
+
+rng = random.Random(7)
+WORDS = [f"word{i}" for i in range(2000)]
+REPORT = " ".join(rng.choice(WORDS) for _ in range(300)) + " budget budget overrun"
+REVISION = REPORT.replace(REPORT.split()[150], "amended", 1)
+OTHER_REPORT = " ".join(rng.choice(WORDS) for _ in range(300)) + " budget"
+
+def shingle_jaccard(a, b, size=5):
+    def shingles(text):
+        words = text.split()
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+
+def test_signature_estimates_jaccard():
+    """Test that equal signature positions track the true shingle overlap"""
+    # Setup - revisions with more and more words replaced
+    words = REPORT.split()
+    revisions = []
+    for changed in (3, 15, 60):
+        revised = list(words)
+        for i in rng.sample(range(len(words)), changed):
+            revised[i] = f"changed{i}"
+        revisions.append(" ".join(revised))
+
+    # Execute
+    signature = minhash_signature(REPORT)
+    estimates = [jaccard_estimate(signature, minhash_signature(text)) for text in revisions]
+
+    # Assert
+    assert signature.dtype == np.uint32 and len(signature) == settings.minhash_permutations
+    assert (minhash_signature(REPORT.upper()) == signature).all()  # folded like the index
+    assert (decode_signature(encode_signature(signature)) == signature).all()
+    for text, estimate in zip(revisions, estimates):
+        assert abs(estimate - shingle_jaccard(REPORT, text)) < 0.12
+    assert estimates == sorted(estimates, reverse=True)
+
+def test_lsh_finds_near_duplicates():
+    """Test lookups through the LSH buckets"""
+    # Setup
+    index = NearDuplicateIndex(num_perm=128, bands=16, threshold=0.8)
+    index.add("report", minhash_signature(REPORT))
+    index.add("revision", minhash_signature(REVISION))
+    index.add("other", minhash_signature(OTHER_REPORT))
+    index.add("empty", minhash_signature(""))
+
+    # Execute
+    similar = index.near_duplicates("report")
+
+    # Assert
+    assert [doc_id for doc_id, _ in similar] == ["revision"]
+    assert similar[0][1] >= 0.8
+    assert "empty" not in index and len(index) == 3
+    assert index.near_duplicates("other") == []
+    assert [d for d, _ in index.near_duplicates("other", threshold=0.0)] == []  # no shared bucket
+
+    index.remove("revision")
+    assert index.near_duplicates("report") == []
+    with pytest.raises(ValueError):
+        index.add("short", np.zeros(10, dtype=np.uint32))
+
+@pytest.fixture
+def service(tmp_path):
+    """Search service with the extracted texts and metadata in a temp dir"""
+    test_settings = settings.model_copy(update={
+        "index_dir": tmp_path / "index",
+        "metadata_file": tmp_path / "metadata.json",
+        "index_compaction_threshold": 100,
+    })
+    with patch("app.services.search_service.settings", test_settings), \
+         patch("app.services.inverted_index.settings", test_settings), \
+         patch("app.services.pdf_service.document_store", DocumentStore(tmp_path / "extracted")):
+        yield SearchService(), test_settings
+
+def test_search_collapses_near_duplicates(service):
+    """Test that a revision is folded into the better ranked report"""
+    # Setup
+    search_service, test_settings = service
+    texts = {"1": REPORT, "2": REVISION, "3": OTHER_REPORT}
+    for doc_id, text in texts.items():
+        save_extracted_text(doc_id, text)
+    test_settings.metadata_file.write_text(
+        json.dumps({"documents": [{"doc_id": doc_id} for doc_id in texts]}), encoding="utf-8"
+    )
+    search_service.load_documents()
+
+    # Execute
+    plain = search_service.search("budget", top_k=2)
+    collapsed = search_service.search("budget", top_k=2, collapse=True)
+    batch = search_service.search_many(["budget"], top_k=2, collapse=[True])
+
+    # Assert
+    assert {r['doc_id'] for r in plain} == {"1", "2"}
+    assert "duplicates" not in plain[0]
+    assert [r['doc_id'] for r in collapsed][1:] == ["3"]
+    assert {collapsed[0]['doc_id']} | set(collapsed[0]['duplicates']) == {"1", "2"}
+    assert collapsed[1]['duplicates'] == []
+    assert batch == [collapsed]
+
+def test_signatures_from_metadata_on_load(service):
+    """Test that load and rebuild use the signatures stored at upload"""
+    # Setup
+    search_service, test_settings = service
+    documents = []
+    for doc_id, text in {"1": REPORT, "2": REVISION}.items():
+        save_extracted_text(doc_id, text)
+        documents.append({"doc_id": doc_id, "filename": f"{doc_id}.pdf",
+                          "minhash": encode_signature(minhash_signature(text))})
+        search_service.add_document(doc_id, text, documents[-1])
+    test_settings.metadata_file.write_text(json.dumps({"documents": documents}), encoding="utf-8")
+    search_service.save_index()
+
+    # Execute
+    loaded = SearchService()
+    with patch("app.services.search_service.minhash_signature") as compute:
+        assert loaded.load_index()
+        loaded.rebuild_index()
+
+    # Assert - nothing recomputed
+    compute.assert_not_called()
+    assert [d for d, _ in loaded.near_duplicates.near_duplicates("2")] == ["1"]
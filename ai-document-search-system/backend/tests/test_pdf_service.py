@@ -5,6 +5,9 @@ Tests cover:
 - Text extraction from valid PDFs
 - Error handling for invalid/corrupt files
 - Metadata extraction (page count, size)
+- Parallel extraction of page ranges in worker processes
+- Bulk extraction of many PDFs, one per worker
+- Streaming cleaned pages into the document store
 
 Note on AI Error: 
 During test generation, AI suggested using 'io.BytesIO' for file simulation but 
@@ -15,7 +18,11 @@ This has been corrected manually.
 import pytest
 from pathlib import Path
 from unittest.mock import MagicMock, patch
-from app.services.pdf_service import extract_text_from_pdf, get_pdf_metadata
+from app.services.pdf_service import (
+    extract_text_from_pdf, extract_texts_from_pdfs, get_pdf_metadata, iter_pdf_pages, page_ranges,
+    save_extracted_pages, shutdown_extraction_pool
+)
+from app.services.document_store import DocumentStore
 
 # Mock data
 MOCK_PDF_CONTENT = b"%PDF-1.4 mock content"
@@ -88,4 +95,126 @@ def test_get_pdf_metadata_success(mock_pymupdf, tmp_path):
     
     # Assert
     assert metadata['page_count'] == 5
-    assert metadata['file_size'] > 0
\ No newline at end of file
+    assert metadata['file_size'] > 0
+
+def test_page_ranges():
+    """Test that page ranges cover every page once, in order"""
+    assert page_ranges(10, 3) == [(0, 3), (3, 6), (6, 10)]
+    assert page_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert page_ranges(0, 4) == []
+
+def test_parallel_extraction_matches_sequential(tmp_path):
+    """Test that worker processes return the same pages as in-process extraction"""
+    # Setup - a real 12 page PDF
+    import fitz
+    pdf_path = tmp_path / "report.pdf"
+    doc = fitz.open()
+    for page_num in range(12):
+        doc.new_page().insert_text((72, 72), f"Page {page_num} agile sprint review")
+    doc.save(pdf_path)
+    doc.close()
+
+    # Execute
+    sequential = extract_text_from_pdf(pdf_path, workers=1)
+    with patch("app.services.pdf_service.settings") as mock_settings:
+        mock_settings.pdf_parallel_min_pages = 4
+        with patch("app.services.pdf_service.fitz.open", wraps=fitz.open) as opened:
+            parallel = extract_text_from_pdf(pdf_path, workers=2)
+    shutdown_extraction_pool()
+
+    # Assert - page ranges were opened by the workers, not in this process
+    assert opened.call_count == 1
+    assert parallel == sequential
+    assert parallel['page_count'] == 12
+    assert parallel['pages'][11] == "Page 11 agile sprint review"
+    assert parallel['full_text'].startswith("Page 0 agile sprint review\n\nPage 1")
+    assert parallel['page_table'][1][11] == parallel['full_text'].index("Page 11")
+
+def test_parallel_extraction_bounds_ranges_in_flight(tmp_path):
+    """Test that the next page range is only submitted once one has been consumed"""
+    # Setup - 40 pages in 20 ranges of 2, 4 ranges in flight (2 workers)
+    import fitz
+    from concurrent.futures import Future
+    pdf_path = tmp_path / "report.pdf"
+    doc = fitz.open()
+    for page_num in range(40):
+        doc.new_page().insert_text((72, 72), f"Page {page_num}")
+    doc.save(pdf_path)
+    doc.close()
+
+    submitted = []
+
+    def submit(function, *args):
+        submitted.append(args[1:])
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    pool = MagicMock(submit=submit)
+
+    # Execute
+    with patch("app.services.pdf_service.settings") as mock_settings, \
+         patch("app.services.pdf_service.SHARDS_PER_WORKER", 2), \
+         patch("app.services.pdf_service.PAGES_PER_RANGE", 2), \
+         patch("app.services.pdf_service._extraction_pool", return_value=pool):
+        mock_settings.pdf_parallel_min_pages = 4
+        pages = iter_pdf_pages(pdf_path, workers=2)
+        first = next(pages)
+        in_flight = len(submitted)
+        rest = list(pages)
+
+    # Assert
+    assert first == "Page 0"
+    assert in_flight == 5
+    assert submitted == [(start, start + 2) for start in range(0, 40, 2)]
+    assert [first] + rest == extract_text_from_pdf(pdf_path, workers=1)['pages']
+
+def test_bulk_extraction_reports_failures_per_file(tmp_path):
+    """Test that one corrupt PDF does not fail the others of a bulk extraction"""
+    # Setup
+    import fitz
+    paths = []
+    for name in ("week1", "week2"):
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), f"{name} lecture notes")
+        doc.save(tmp_path / f"{name}.pdf")
+        doc.close()
+        paths.append(tmp_path / f"{name}.pdf")
+    (tmp_path / "corrupt.pdf").write_bytes(MOCK_PDF_CONTENT)
+    paths.insert(1, tmp_path / "corrupt.pdf")
+
+    # Execute
+    parallel = extract_texts_from_pdfs(paths, workers=2)
+    shutdown_extraction_pool()
+    sequential = extract_texts_from_pdfs(paths, workers=1)
+
+    # Assert - results in input order, the error in place of the corrupt file
+    for results in (parallel, sequential):
+        assert results[0]['full_text'] == "week1 lecture notes"
+        assert isinstance(results[1], Exception)
+        assert results[2]['full_text'] == "week2 lecture notes"
+
+def test_pages_streamed_into_store(tmp_path):
+    """Test that pages are produced lazily and stored like a full extraction"""
+    # Setup
+    import fitz
+    pdf_path = tmp_path / "course.pdf"
+    doc = fitz.open()
+    for topic in ("Scrum roles", "", "Kanban boards"):
+        doc.new_page().insert_text((72, 72), topic)
+    doc.save(pdf_path)
+    doc.close()
+    store = DocumentStore(tmp_path / "extracted")
+
+    # Execute
+    pages = iter_pdf_pages(pdf_path, workers=1)
+    first = next(pages)
+    with patch("app.services.pdf_service.document_store", store):
+        page_table = save_extracted_pages("1", iter_pdf_pages(pdf_path, workers=1))
+    extracted = extract_text_from_pdf(pdf_path, workers=1)
+    pages.close()
+
+    # Assert
+    assert first == "Scrum roles"
+    assert page_table == extracted['page_table']
+    assert store.get("1") == extracted['full_text'] == "Scrum roles\n\n\n\nKanban boards"
@@ -0,0 +1,54 @@
+"""
+Unit tests for the Query Result Cache
+
+Tests cover:
+- LRU eviction and hit/miss counters
+- TTL expiry
+- Invalidation on index generation change
+"""
+
+from unittest.mock import patch
+from app.utils.cache_utils import QueryCache
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = QueryCache(max_size=2, ttl=0)
+    cache.put("a", 1, generation=0)
+    cache.put("b", 2, generation=0)
+    assert cache.get("a", generation=0) == 1  # "b" is now least recent
+
+    cache.put("c", 3, generation=0)
+
+    assert cache.get("b", generation=0) is None
+    assert cache.get("a", generation=0) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 1)
+
+def test_ttl_expiry():
+    """Test that entries older than the TTL are misses"""
+    cache = QueryCache(max_size=10, ttl=60)
+    with patch("app.utils.cache_utils.time.monotonic", return_value=1000.0):
+        cache.put("a", 1, generation=0)
+    with patch("app.utils.cache_utils.time.monotonic", return_value=1061.0):
+        assert cache.get("a", generation=0) is None
+
+def test_generation_invalidation():
+    """Test that a newer generation drops entries and older results are not stored"""
+    cache = QueryCache(max_size=10, ttl=0)
+    cache.put("a", 1, generation=1)
+
+    assert cache.get("a", generation=2) is None
+    cache.put("b", 2, generation=1)  # computed before the change
+    assert cache.get("b", generation=2) is None
+    assert cache.stats()['invalidations'] == 1
+
+def test_older_generation_lookup_keeps_cache():
+    """Test that a lookup from an older generation is a miss and drops nothing"""
+    cache = QueryCache(max_size=10, ttl=0)
+    cache.put("a", 1, generation=2)
+
+    assert cache.get("a", generation=1) is None
+
+    assert cache.get("a", generation=2) == 1
+    stats = cache.stats()
+    assert (stats['generation'], stats['invalidations'], stats['misses']) == (2, 0, 1)
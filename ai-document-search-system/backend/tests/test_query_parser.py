@@ -0,0 +1,82 @@
+"""
+Unit tests for the Search Query Parser
+
+Tests cover:
+- Quoted phrases with stop word gaps
+- NEAR/k operators
+- Plain ranking text without operators
+- AND/OR/NOT precedence, parentheses and field filters
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.utils.query_parser import (
+    And, FilenameFilter, Near, Not, Or, Phrase, Term, UploadedFilter, normalize_query, parse_query
+)
+
+def test_plain_query_has_no_constraints():
+    """Test that plain words are only used for ranking"""
+    parsed = parse_query("agile sprints")
+
+    assert parsed.text == "agile sprints"
+    assert not parsed.has_constraints
+
+def test_quoted_phrase():
+    """Test that stop words inside a phrase keep their position slot"""
+    parsed = parse_query('"State of the Art" models')
+
+    assert parsed.text == "State of the Art models"
+    assert parsed.filter == Phrase((("state", 0), ("art", 3)))
+
+def test_near_operator():
+    """Test that NEAR/k links the neighbouring words"""
+    parsed = parse_query("waterfall near/3 model sprints")
+
+    assert parsed.text == "waterfall model sprints"
+    assert parsed.filter == Near("waterfall", "model", 3)
+
+def test_dangling_operators_ignored():
+    """Test that an operator without operands is dropped"""
+    parsed = parse_query('NEAR/2 agile "" NEAR/4')
+
+    assert parsed.text == "agile"
+    assert not parsed.has_constraints
+
+def test_boolean_precedence_and_negation():
+    """Test that NOT binds tighter than AND, AND tighter than OR"""
+    parsed = parse_query("agile OR scrum AND NOT waterfall")
+
+    assert parsed.filter == Or((Term("agile"), And((Term("scrum"), Not(Term("waterfall"))))))
+    # Negated words are not used for ranking
+    assert parsed.text == "agile scrum"
+
+def test_parentheses_and_lowercase_operators():
+    """Test grouping, and that lower case and/or/not are plain words"""
+    parsed = parse_query("(agile scrum) AND sprint and planning")
+
+    assert parsed.filter == And((Or((Term("agile"), Term("scrum"))), Term("sprint")))
+    assert parsed.text == "agile scrum sprint and planning"
+
+def test_field_filters():
+    """Test filename patterns and upload date intervals"""
+    parsed = parse_query('filename:"Bitirme Raporu" uploaded:2024-05 agile')
+
+    assert parsed.text == "agile"
+    assert parsed.filter == And((
+        FilenameFilter("bitirme raporu"),
+        UploadedFilter(datetime(2024, 5, 1).timestamp(), datetime(2024, 6, 1).timestamp())
+    ))
+    assert parse_query("uploaded:>=2024").filter == \
+        UploadedFilter(datetime(2024, 1, 1).timestamp(), float("inf"))
+    assert parse_query("uploaded:2024-01..2024-02-10").filter == \
+        UploadedFilter(datetime(2024, 1, 1).timestamp(), datetime(2024, 2, 11).timestamp())
+
+    with pytest.raises(ValueError):
+        parse_query("uploaded:yesterday")
+
+def test_normalize_query_keeps_operator_case():
+    """Test that cache keys fold words but not boolean operators"""
+    assert normalize_query("  Agile AND  Çalışma ") == "agile AND calisma"
+    assert normalize_query("agile and calisma") != normalize_query("agile AND calisma")
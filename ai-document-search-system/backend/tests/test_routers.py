@@ -2,7 +2,13 @@
 [AI-generated] Integration Tests for API Routers
 
 Tests cover:
-- Document Upload (POST /api/v1/documents/upload)
+- Document Upload (POST /api/v1/documents/upload, background ingestion job)
+- Ingestion job status (GET /api/v1/jobs/{id}) and queue backpressure
+- Duplicate uploads (content hash: return existing / reuse extraction)
+- Near-duplicates of a document (MinHash/LSH)
+- Streaming upload limits (size, magic bytes, no partial files left behind)
+- Reading single pages of an extracted PDF (GET /api/v1/documents/{id}/pages)
+- Bulk upload of many files / zip archives (POST /api/v1/documents/bulk)
 - Document Listing (GET /api/v1/documents)
 - Document Deletion (DELETE /api/v1/documents/{id})
 - AI Summarization (POST /api/v1/ai/summarize)
@@ -13,11 +19,18 @@ which would have caused real API calls to Groq. This was caught and
 'patch' decorators were added to mock the AI response.
 """
 
+import io
+import json
+import threading
+import zipfile
+
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
 from pathlib import Path
 from app.main import app
+from app.routers.documents import ingestion_queue, save_metadata
+from app.services.document_store import DocumentStore
 
 client = TestClient(app)
 
@@ -72,15 +85,22 @@ def mock_settings_routers(tmp_path):
     # We use multiple patches
     with patch("app.routers.documents.settings") as s1, \
          patch("app.routers.ai.settings") as s2, \
-         patch("app.services.search_service.settings") as s3:
+         patch("app.services.search_service.settings") as s3, \
+         patch("app.services.ingestion_service.settings") as s4, \
+         patch("app.services.pdf_service.document_store", DocumentStore(extracted_dir)):
         
-        for s in [s1, s2, s3]:
+        for s in [s1, s2, s3, s4]:
             s.upload_dir = upload_dir
             s.extracted_dir = extracted_dir
             s.data_dir = data_dir
             s.metadata_file = metadata_file
             s.default_model = "llama-3.1-8b-instant"
             s.tfidf_max_features = 1000 # search service needs this
+            s.max_upload_size = 1024 * 1024
+            s.jobs_file = data_dir / "jobs.json"
+            s.ingestion_workers = 2
+            s.max_bulk_files = 500
+            s.max_bulk_upload_size = 8 * 1024 * 1024
             
         yield s1
 
@@ -101,13 +121,267 @@ def test_upload_document_success(mock_save_text, mock_load_meta, mock_save_meta,
     # Execute
     files = {"file": (MOCK_FILENAME, MOCK_FILE_CONTENT, "text/plain")}
     response = client.post("/api/v1/documents/upload", files=files)
+    ingestion_queue.join()
     
     # Assert
-    assert response.status_code == 201
+    assert response.status_code == 202
     data = response.json()
     assert data["filename"] == MOCK_FILENAME
     assert "doc_id" in data
-    assert data["status"] == "success"
+    assert data["status"] == "queued"
+    job = client.get(f"/api/v1/jobs/{data['job_id']}").json()
+    assert job["status"] == "done" and job["progress"] == 1.0
+    mock_save_text.assert_called_once_with(data["doc_id"], MOCK_FILE_CONTENT.decode(), None)
+
+@patch("app.routers.documents.get_pdf_metadata")
+@patch("app.routers.documents.iter_pdf_pages")
+def test_duplicate_upload_skips_extraction(mock_extract, mock_pdf_meta, mock_settings_routers, mock_search_service):
+    """Test that a byte-identical re-upload never reaches PyMuPDF"""
+    # Setup
+    mock_settings_routers.duplicate_uploads = "return_existing"
+    mock_extract.return_value = iter(["Agile course notes", "", ""])
+    mock_pdf_meta.return_value = {"file_size": 11}
+    files = {"file": ("notes.pdf", b"%PDF-1.4 ab", "application/pdf")}
+
+    # Execute
+    first = client.post("/api/v1/documents/upload", files=files)
+    ingestion_queue.join()
+    duplicate = client.post("/api/v1/documents/upload", files=files)
+    reused = client.post(
+        "/api/v1/documents/upload", params={"on_duplicate": "reuse_extraction"},
+        files={"file": ("notes-copy.pdf", b"%PDF-1.4 ab", "application/pdf")}
+    )
+    ingestion_queue.join()
+
+    # Assert
+    assert first.status_code == 202
+    doc_id = first.json()["doc_id"]
+    assert duplicate.status_code == 200
+    assert duplicate.json()["doc_id"] == doc_id
+    assert duplicate.json()["status"] == "duplicate"
+    assert reused.status_code == 202
+    assert reused.json()["doc_id"] != doc_id
+    assert reused.json()["duplicate_of"] == doc_id
+    mock_extract.assert_called_once()
+
+    metadata = json.loads(mock_settings_routers.metadata_file.read_text(encoding="utf-8"))
+    copy = metadata["documents"][1]
+    assert [d["doc_id"] for d in metadata["documents"]] == [doc_id, reused.json()["doc_id"]]
+    assert copy["page_count"] == 3 and copy["sha256"] == metadata["documents"][0]["sha256"]
+    assert copy["minhash"] == metadata["documents"][0]["minhash"]
+    assert metadata["hashes"] == {copy["sha256"]: doc_id}
+    assert mock_search_service.add_document.call_args[0][1] == "Agile course notes"
+    assert sorted(p.name for p in mock_settings_routers.upload_dir.iterdir()) == \
+        sorted(f"{d}.pdf" for d in (doc_id, reused.json()["doc_id"]))
+
+    # Deleting the first copy hands the hash over to the second
+    client.delete(f"/api/v1/documents/{doc_id}")
+    metadata = json.loads(mock_settings_routers.metadata_file.read_text(encoding="utf-8"))
+    assert metadata["hashes"] == {copy["sha256"]: reused.json()["doc_id"]}
+
+@pytest.mark.parametrize("filename,content,status_code", [
+    ("big.txt", b"a" * (1024 * 1024 + 1), 413),
+    ("fake.pdf", b"PK\x03\x04 zip archive", 400),
+    ("binary.txt", b"\x00\x01\x02", 400),
+    ("turkish.md", "Çalışma".encode("cp1254"), 400),
+])
+def test_upload_rejected_while_streaming(filename, content, status_code, mock_settings_routers, mock_search_service):
+    """Test that invalid uploads are refused and leave nothing in upload_dir"""
+    # Execute
+    with patch("app.routers.documents.UPLOAD_CHUNK_SIZE", 4096):
+        response = client.post("/api/v1/documents/upload", files={"file": (filename, content)})
+
+    # Assert
+    assert response.status_code == status_code
+    assert list(mock_settings_routers.upload_dir.iterdir()) == []
+    mock_search_service.add_document.assert_not_called()
+
+@patch("app.routers.documents.save_extracted_text")
+def test_upload_streams_into_place(mock_save_text, mock_settings_routers, mock_search_service):
+    """Test that a multi-chunk upload is renamed into place intact"""
+    # Setup
+    content = "Agile çalışma notları\n".encode("utf-8") * 1000
+
+    # Execute
+    with patch("app.routers.documents.UPLOAD_CHUNK_SIZE", 4096):
+        response = client.post("/api/v1/documents/upload", files={"file": ("notes.md", content)})
+    ingestion_queue.join()
+
+    # Assert
+    assert response.status_code == 202
+    doc_id = response.json()["doc_id"]
+    assert [p.name for p in mock_settings_routers.upload_dir.iterdir()] == [f"{doc_id}.md"]
+    assert json.loads(mock_settings_routers.metadata_file.read_text(encoding="utf-8"))["documents"][0]["doc_id"] == doc_id
+    assert (mock_settings_routers.upload_dir / f"{doc_id}.md").read_bytes() == content
+    assert mock_save_text.call_args[0][1] == content.decode("utf-8")
+
+@patch("app.routers.documents.save_extracted_text")
+def test_ingestion_job_progress(mock_save_text, mock_settings_routers, mock_search_service):
+    """Test that the upload answers before ingestion and the job reports its stages"""
+    # Setup - hold the worker in the extraction stage
+    mock_settings_routers.duplicate_uploads = "return_existing"
+    release = threading.Event()
+    extracting = threading.Event()
+    def slow_extract(path):
+        extracting.set()
+        release.wait(5)
+        return iter(["Sprint review"])
+    files = {"file": ("review.pdf", b"%PDF-1.4 review", "application/pdf")}
+
+    # Execute
+    with patch("app.routers.documents.iter_pdf_pages", side_effect=slow_extract), \
+         patch("app.routers.documents.get_pdf_metadata", return_value={"file_size": 15}):
+        response = client.post("/api/v1/documents/upload", files=files)
+        extracting.wait(5)
+        running = client.get(f"/api/v1/jobs/{response.json()['job_id']}").json()
+        listed = client.get("/api/v1/documents").json()
+        duplicate = client.post("/api/v1/documents/upload", files=files)
+        release.set()
+        ingestion_queue.join()
+    done = client.get(f"/api/v1/jobs/{response.json()['job_id']}").json()
+
+    # Assert
+    assert response.status_code == 202
+    assert running["status"] == "processing" and running["stage"] == "extracting"
+    assert listed["total"] == 0
+    assert duplicate.status_code == 202
+    assert duplicate.json()["job_id"] == response.json()["job_id"]
+    assert duplicate.json()["status"] == "duplicate"
+    assert done["status"] == "done" and done["stage"] == "done" and done["error"] is None
+    mock_search_service.add_document.assert_called_once()
+    assert client.get("/api/v1/jobs/unknown").status_code == 404
+
+def test_upload_refused_when_queue_full(mock_settings_routers, mock_search_service):
+    """Test backpressure: 503 with Retry-After and nothing stored"""
+    # Execute
+    with patch.object(ingestion_queue, "full", return_value=True):
+        response = client.post("/api/v1/documents/upload", files={"file": (MOCK_FILENAME, MOCK_FILE_CONTENT)})
+
+    # Assert
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert list(mock_settings_routers.upload_dir.iterdir()) == []
+
+def test_bulk_upload_queues_one_job(mock_settings_routers, mock_search_service):
+    """Test that a bulk upload answers 202 with one ingestion job for all its files"""
+    # Setup
+    mock_settings_routers.duplicate_uploads = "return_existing"
+    files = [
+        ("files", ("week1.txt", b"Sprint planning notes")),
+        ("files", ("week2.md", b"Retrospective notes")),
+        ("files", ("week1-copy.txt", b"Sprint planning notes")),
+        ("files", ("slides.pptx", b"PK\x03\x04")),
+        ("files", ("binary.txt", b"\x00\x01\x02")),
+    ]
+
+    # Execute
+    with patch("app.routers.documents.save_metadata", wraps=save_metadata) as metadata_writes:
+        response = client.post("/api/v1/documents/bulk", files=files)
+        ingestion_queue.join()
+    with patch.object(ingestion_queue, "full", return_value=True):
+        refused = client.post("/api/v1/documents/bulk", files=files[:1])
+
+    # Assert - per-file report in upload order
+    assert response.status_code == 202
+    data = response.json()
+    assert (data["total"], data["queued"], data["duplicates"], data["failed"]) == (5, 2, 1, 2)
+    results = data["results"]
+    assert [r["status"] for r in results] == ["queued", "queued", "duplicate", "failed", "failed"]
+    assert results[2]["doc_id"] == results[0]["doc_id"] == results[2]["duplicate_of"]
+    assert results[0]["job_id"] == results[1]["job_id"] == results[2]["job_id"]
+    assert "supported" in results[3]["error"] and "extension" in results[4]["error"]
+    job = client.get(f"/api/v1/jobs/{results[0]['job_id']}").json()
+    assert job["status"] == "done"
+    assert [(r["doc_id"], r["status"]) for r in job["results"]] == [(r["doc_id"], "done") for r in results[:2]]
+
+    # One metadata.json write and one index update (one new snapshot) for the batch
+    assert metadata_writes.call_count == 1
+    mock_search_service.add_document.assert_not_called()
+    mock_search_service.add_document_batch.assert_called_once()
+    indexed = {doc_id: text for doc_id, text, _ in mock_search_service.add_document_batch.call_args.args[0]}
+    assert indexed == {results[0]["doc_id"]: "Sprint planning notes", results[1]["doc_id"]: "Retrospective notes"}
+    metadata = json.loads(mock_settings_routers.metadata_file.read_text(encoding="utf-8"))
+    assert sorted(d["filename"] for d in metadata["documents"]) == ["week1.txt", "week2.md"]
+    assert len(metadata["hashes"]) == 2
+    assert sorted(p.name for p in mock_settings_routers.upload_dir.iterdir()) == \
+        sorted([f"{results[0]['doc_id']}.txt", f"{results[1]['doc_id']}.md"])
+    assert refused.status_code == 503
+
+def test_bulk_upload_zip_archive(mock_settings_routers, mock_search_service):
+    """Test that zip members are checked like uploads and counted against the bulk limits"""
+    # Setup - a real one page PDF, junk entries and a member over the size limit
+    import fitz
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), "Kanban board basics")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("course/", b"")
+        zf.writestr("course/week1.pdf", pdf.tobytes())
+        zf.writestr("course/notes.txt", b"Daily stand-up notes")
+        zf.writestr("__MACOSX/course/._notes.txt", b"\x00\x05")
+        zf.writestr("course/readme.docx", b"PK\x03\x04")
+        zf.writestr("course/big.txt", b"a" * (1024 * 1024 + 1))
+    pdf.close()
+    mock_settings_routers.max_bulk_files = 3
+    files = [
+        ("files", ("course.zip", archive.getvalue(), "application/zip")),
+        ("files", ("notes-copy.txt", b"Daily stand-up notes")),
+        ("files", ("late.txt", b"Over the file limit")),
+    ]
+
+    # Execute
+    response = client.post("/api/v1/documents/bulk", params={"on_duplicate": "reuse_extraction"}, files=files)
+    ingestion_queue.join()
+
+    # Assert
+    assert response.status_code == 202
+    results = {r["filename"]: r for r in response.json()["results"]}
+    assert list(results) == ["course.zip/course/week1.pdf", "course.zip/course/notes.txt",
+                             "course.zip/course/readme.docx", "course.zip/course/big.txt",
+                             "notes-copy.txt", "late.txt"]
+    assert results["course.zip/course/week1.pdf"]["status"] == "queued"
+    assert results["course.zip/course/big.txt"]["error"].startswith("File exceeds")
+    assert results["late.txt"]["error"] == "Bulk upload exceeds the 3 file limit"
+    notes_id = results["course.zip/course/notes.txt"]["doc_id"]
+    assert results["notes-copy.txt"]["status"] == "queued"
+    assert results["notes-copy.txt"]["duplicate_of"] == notes_id
+
+    indexed = {doc_id: (text, meta) for doc_id, text, meta in mock_search_service.add_document_batch.call_args.args[0]}
+    pdf_text, pdf_meta = indexed[results["course.zip/course/week1.pdf"]["doc_id"]]
+    assert pdf_text == "Kanban board basics"
+    assert pdf_meta["filename"] == "week1.pdf" and pdf_meta["page_count"] == 1
+    assert indexed[results["notes-copy.txt"]["doc_id"]][0] == "Daily stand-up notes"
+    assert len(list(mock_settings_routers.upload_dir.iterdir())) == 3
+
+def test_read_document_pages(mock_settings_routers, mock_search_service):
+    """Test that pages of an uploaded PDF are read back one range at a time"""
+    # Setup - a real three page PDF and a text document
+    import fitz
+    pdf = fitz.open()
+    for topic in ("Scrum roles", "Sprint events", "Kanban boards"):
+        pdf.new_page().insert_text((72, 72), topic)
+    pdf_upload = client.post("/api/v1/documents/upload", files={"file": ("agile.pdf", pdf.tobytes())})
+    pdf.close()
+    text_upload = client.post("/api/v1/documents/upload", files={"file": ("notes.txt", b"Plain notes")})
+    ingestion_queue.join()
+    doc_id = pdf_upload.json()["doc_id"]
+
+    # Execute
+    pages = client.get(f"/api/v1/documents/{doc_id}/pages", params={"first": 2, "last": 3})
+    single = client.get(f"/api/v1/documents/{doc_id}/pages", params={"first": 3})
+    beyond = client.get(f"/api/v1/documents/{doc_id}/pages", params={"first": 4})
+    text_doc = client.get(f"/api/v1/documents/{text_upload.json()['doc_id']}/pages")
+    unknown = client.get("/api/v1/documents/unknown/pages")
+
+    # Assert
+    assert pages.status_code == 200
+    assert pages.json() == {"doc_id": doc_id, "page_count": 3, "pages": [
+        {"page": 2, "text": "Sprint events"}, {"page": 3, "text": "Kanban boards"}
+    ]}
+    assert single.json()["pages"] == [{"page": 3, "text": "Kanban boards"}]
+    assert beyond.status_code == 404
+    assert text_doc.status_code == 400
+    assert unknown.status_code == 404
 
 def test_upload_invalid_file_type():
     """Test upload with invalid extension"""
@@ -139,6 +413,35 @@ def test_list_documents(mock_load_meta, mock_settings_routers):
     assert len(data["documents"]) == 1
     assert data["documents"][0]["doc_id"] == "123"
 
+@patch("app.routers.documents.load_metadata")
+def test_near_duplicates(mock_load_meta, mock_settings_routers, mock_search_service):
+    """Test the near-duplicate lookup of a document"""
+    # Setup
+    mock_settings_routers.near_duplicate_threshold = 0.8
+    mock_load_meta.return_value = {
+        "documents": [
+            {"doc_id": "1", "filename": "report.pdf"},
+            {"doc_id": "2", "filename": "report-v2.pdf"}
+        ]
+    }
+    mock_search_service.near_duplicates.near_duplicates.return_value = [("2", 0.921875)]
+
+    # Execute
+    response = client.get("/api/v1/documents/1/near-duplicates")
+    lowered = client.get("/api/v1/documents/1/near-duplicates", params={"threshold": 0.5})
+    missing = client.get("/api/v1/documents/404/near-duplicates")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {
+        "doc_id": "1",
+        "threshold": 0.8,
+        "near_duplicates": [{"doc_id": "2", "filename": "report-v2.pdf", "similarity": 0.9219}]
+    }
+    assert lowered.json()["threshold"] == 0.5
+    mock_search_service.near_duplicates.near_duplicates.assert_called_with("1", 0.5)
+    assert missing.status_code == 404
+
 @patch("app.routers.ai.llm_service.summarize")
 def test_summarize_endpoint(mock_summarize, mock_settings_routers):
     """Test AI summarization endpoint"""
@@ -171,4 +474,139 @@ def test_summarize_missing_doc(mock_settings_routers):
     response = client.post("/api/v1/ai/summarize", json=payload)
     
     # Should be 404 because file check happens before reading
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+@patch("app.routers.ai.llm_service.answer_question")
+@patch("app.routers.ai.search_service")
+def test_qa_uses_passages(mock_search, mock_answer, mock_settings_routers):
+    """Test that QA context is built from retrieved passages, not whole documents"""
+    # Setup
+    mock_search.search_passages.return_value = [
+        {"doc_id": "1", "start": 500, "end": 540, "page": 3, "text": "Sprints last two weeks.", "score": 0.9},
+        {"doc_id": "1", "start": 0, "end": 30, "page": 1, "text": "Agile is iterative.", "score": 0.5},
+    ]
+    mock_answer.return_value = "Two weeks."
+
+    # Execute
+    response = client.post("/api/v1/ai/qa", json={"question": "How long is a sprint?"})
+
+    # Assert
+    assert response.status_code == 200
+    data = response.json()
+    assert data["answer"] == "Two weeks."
+    assert [s["doc_id"] for s in data["sources"]] == ["1"]
+    assert data["sources"][0]["page"] == 3
+    context = mock_answer.call_args.kwargs["context"]
+    # Passages of the same document are kept in reading order
+    assert context.index("Agile is iterative.") < context.index("Sprints last two weeks.")
+
+@patch("app.routers.ai.llm_service.answer_question")
+@patch("app.routers.ai.search_service")
+def test_qa_merges_overlapping_passages(mock_search, mock_answer, mock_settings_routers):
+    """Test that overlapping passages of a document enter the context once"""
+    # Setup - windows over "Scrum has roles. Sprints last two weeks. Reviews close them."
+    mock_search.search_passages.return_value = [
+        {"doc_id": "1", "start": 17, "end": 60, "page": 2, "text": "Sprints last two weeks. Reviews close them.", "score": 0.9},
+        {"doc_id": "1", "start": 0, "end": 40, "page": 1, "text": "Scrum has roles. Sprints last two weeks.", "score": 0.4},
+        {"doc_id": "1", "start": 100, "end": 115, "page": 4, "text": "Kanban has WIP.", "score": 0.2},
+    ]
+    mock_answer.return_value = "Two weeks."
+
+    # Execute
+    response = client.post("/api/v1/ai/qa", json={"question": "How long is a sprint?"})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["sources"][0]["page"] == 1  # first page of the merged passage
+    context = mock_answer.call_args.kwargs["context"]
+    assert context == "Scrum has roles. Sprints last two weeks. Reviews close them.\n\n[...]\n\nKanban has WIP."
+
+@patch("app.routers.ai.llm_service.answer_question")
+@patch("app.routers.ai.search_service")
+def test_qa_scopes_retrieval_to_doc_ids(mock_search, mock_answer, mock_settings_routers):
+    """Test that doc_ids are pushed into passage retrieval instead of post-filtering"""
+    # Setup
+    mock_search.search_passages.return_value = [
+        {"doc_id": "7", "start": 0, "end": 23, "text": "Sprints last two weeks.", "score": 0.1},
+    ]
+    mock_answer.return_value = "Two weeks."
+
+    # Execute
+    payload = {"question": "How long is a sprint?", "doc_ids": ["7"]}
+    response = client.post("/api/v1/ai/qa", json=payload)
+
+    # Assert
+    assert response.status_code == 200
+    assert [s["doc_id"] for s in response.json()["sources"]] == ["7"]
+    assert mock_search.search_passages.call_args.kwargs["doc_ids"] == ["7"]
+
+@patch("app.routers.search.load_metadata")
+@patch("app.routers.search.search_service")
+def test_batch_search(mock_search, mock_load_meta):
+    """Test that the batch endpoint runs all queries in one search_many call"""
+    # Setup
+    mock_load_meta.return_value = {"documents": [{"doc_id": "1", "filename": "doc1.pdf"}]}
+    mock_search.search_many.return_value = [
+        [{"doc_id": "1", "score": 0.8, "snippet": "agile sprints"}],
+        []
+    ]
+
+    # Execute
+    payload = {"queries": [{"query": "agile", "top_k": 3}, {"query": "banana"}]}
+    response = client.post("/api/v1/search/batch", json=payload)
+
+    # Assert
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_queries"] == 2
+    assert data["results"][0]["results"][0]["filename"] == "doc1.pdf"
+    assert data["results"][1]["total_found"] == 0
+    mock_search.search_many.assert_called_once_with(
+        queries=["agile", "banana"], top_k=[3, 5], doc_ids=[None, None],
+        collapse=[None, None]
+    )
+    mock_load_meta.assert_called_once()
+
+@patch("app.routers.search.search_service")
+def test_search_invalid_filter(mock_search):
+    """Test that a malformed field filter is a client error"""
+    # Setup
+    mock_search.search.side_effect = ValueError("Invalid date 'yesterday'")
+
+    # Execute
+    response = client.post("/api/v1/search", json={"query": "agile uploaded:yesterday"})
+
+    # Assert
+    assert response.status_code == 400
+    assert "Invalid date" in response.json()["detail"]
+
+@patch("app.routers.search.search_service")
+def test_rebuild_index_runs_in_background(mock_search):
+    """Test that a rebuild is started in the background, one at a time"""
+    # Setup
+    mock_search.rebuild_index.side_effect = [True, False]
+
+    # Execute
+    started = client.post("/api/v1/search/rebuild-index")
+    running = client.post("/api/v1/search/rebuild-index")
+
+    # Assert
+    assert started.status_code == 202
+    assert running.status_code == 409
+    mock_search.rebuild_index.assert_called_with(wait=False)
+
+@patch("app.routers.search.search_service")
+def test_suggest_terms(mock_search):
+    """Test the search-as-you-type endpoint"""
+    # Setup
+    mock_search.suggest.return_value = [{"term": "agile", "doc_freq": 4}]
+
+    # Execute
+    response = client.get("/api/v1/search/suggest", params={"prefix": "ag", "limit": 5})
+    empty = client.get("/api/v1/search/suggest", params={"prefix": ""})
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {"prefix": "ag", "suggestions": [{"term": "agile", "doc_freq": 4}]}
+    mock_search.suggest.assert_called_once_with("ag", 5)
+    assert empty.status_code == 422
+
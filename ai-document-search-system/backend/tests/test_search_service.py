@@ -2,10 +2,14 @@
 [AI-generated] Unit tests for Search Service
 
 Tests cover:
-- TF-IDF Indexing logic
+- TF-IDF Indexing logic (incremental and batched adds)
 - Keyword search and scoring
-- Snippet extraction
+- Snippet extraction (with the page of the hit)
 - Handling empty/no results
+- Hybrid retrieval pipeline (RRF / weighted fusion, stage timings)
+- Rebuilds swapping in index snapshots under concurrent searches
+- Copy-on-write snapshots published by every write
+- Hashing vectorizer mode (unbounded vocabulary, incremental IDF)
 
 Note on AI Error:
 AI initially tried to test private methods like `_build_index` directly without 
@@ -13,9 +17,17 @@ checking if they were exposed or renamed. The test was adjusted to use the publi
 API `load_documents` and `search`.
 """
 
+import threading
+
 import pytest
 from unittest.mock import MagicMock, patch
-from app.services.search_service import SearchService
+from app.config import settings
+from app.services.document_store import DocumentStore
+from app.services.pdf_service import join_pages, save_extracted_text
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from app.services.search_service import DocumentIndex, PassageIndex, SearchService, turkish_normalizer
+from app.utils.ranking_utils import fuse_rrf
 
 MOCK_DOCS = [
     {"doc_id": "1", "filename": "doc1.pdf"},
@@ -54,7 +66,8 @@ def test_indexing_success(mock_settings, mock_load_text, mock_open, mock_json, s
     
     # Assert
     assert len(search_service.doc_ids) == 2
-    assert "1" in search_service.doc_texts
+    assert search_service.doc_texts == {}  # texts are read from the document store
+    assert search_service._get_text("1") == MOCK_TEXTS["1"]
     assert search_service.doc_vectors is not None
     # Check dimensions: 2 docs
     assert search_service.doc_vectors.shape[0] == 2
@@ -101,3 +114,639 @@ def test_search_empty_index(search_service):
     
     # Assert
     assert results == []
+
+@pytest.fixture
+def index_settings(tmp_path):
+    """Real settings with data paths in a temp dir and no background compaction"""
+    test_settings = settings.model_copy(update={
+        "index_dir": tmp_path / "index",
+        "metadata_file": tmp_path / "metadata.json",
+        "index_compaction_threshold": 100,
+        "passage_chunk_size": 4,
+        "passage_overlap": 1,
+    })
+    with patch("app.services.search_service.settings", test_settings), \
+         patch("app.services.inverted_index.settings", test_settings), \
+         patch("app.services.pdf_service.document_store", DocumentStore(tmp_path / "extracted")):
+        yield test_settings
+
+def index_document(service, doc_id, text):
+    """Store the extracted text (as the upload route does) and index it"""
+    save_extracted_text(doc_id, text)
+    service.add_document(doc_id, text)
+
+def test_add_document_incremental(index_settings, search_service):
+    """Test that add_document appends a row without refitting the corpus"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    vocabulary = search_service.vectorizer.vocabulary_
+
+    # Execute
+    index_document(search_service, "2", "Intelligence research in software teams.")
+    results = search_service.search("Intelligence")
+
+    # Assert - same vocabulary object (no refit), both docs indexed
+    assert search_service.vectorizer.vocabulary_ is vocabulary
+    assert search_service.doc_vectors.shape[0] == 2
+    assert {r['doc_id'] for r in results} == {"1", "2"}
+
+def test_add_document_batch_matches_one_by_one(index_settings, search_service, tmp_path):
+    """Test that a batch gives the same results as single adds, with one generation bump"""
+    # Setup
+    index_document(search_service, "x", MOCK_TEXTS["1"])
+    one_by_one = SearchService()
+    with patch("app.services.pdf_service.document_store", DocumentStore(tmp_path / "single")):
+        index_document(one_by_one, "x", MOCK_TEXTS["1"])
+        for doc_id, text in MOCK_TEXTS.items():
+            index_document(one_by_one, doc_id, text)
+    generation = search_service.generation
+
+    # Execute
+    search_service.add_document_batch([(doc_id, text, None) for doc_id, text in MOCK_TEXTS.items()])
+
+    # Assert
+    assert search_service.generation == generation + 1
+    for query in ("software", "intelligence models"):
+        assert [(r['doc_id'], r['score']) for r in search_service.search(query)] == \
+            [(r['doc_id'], r['score']) for r in one_by_one.search(query)]
+    assert search_service.near_duplicates.signature("2") is not None
+
+def test_remove_document_tombstone(index_settings, search_service):
+    """Test that removed documents never appear in results"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+
+    # Execute
+    removed = search_service.remove_document("1")
+    results = search_service.search("software")
+
+    # Assert
+    assert removed is True
+    assert [r['doc_id'] for r in results] == ["2"]
+    assert search_service.remove_document("1") is False
+
+def test_incremental_scores_match_full_fit(index_settings, search_service):
+    """Test that refreshed IDF weights give the same scores as a full refit"""
+    # Setup
+    texts = {
+        "1": "software engineering intelligence models",
+        "2": "software waterfall models process",
+        "3": "software intelligence process",
+    }
+    # First document fixes the vocabulary, later ones are appended incrementally
+    index_document(search_service, "x", " ".join(texts.values()))
+    for doc_id, text in texts.items():
+        index_document(search_service, doc_id, text)
+    search_service.remove_document("x")
+
+    # Execute
+    incremental = search_service.search("software intelligence process", top_k=3)
+    search_service.compact()
+    refitted = search_service.search("software intelligence process", top_k=3)
+
+    # Assert
+    assert [(r['doc_id'], r['score']) for r in incremental] == \
+        [(r['doc_id'], r['score']) for r in refitted]
+
+def test_compaction_replays_rows_added_meanwhile(index_settings):
+    """Test that rows added during a compaction are replayed, then compacted in turn"""
+    # Setup
+    index = DocumentIndex()
+    for doc_id, text in (("a", "dogs bark loudly"), ("b", "birds sing songs")):
+        save_extracted_text(doc_id, text)
+        index.add_document(doc_id, text)
+    fit_vectors, load_text = index._fit_vectors, index._load_text
+    lock_free = []
+
+    def fit_while_adding(texts):
+        if "c" not in index._row_of:
+            save_extracted_text("c", "cats purr softly")
+            index.add_document("c", "cats purr softly")
+            index_settings.index_compaction_threshold = 0.2
+        return fit_vectors(texts)
+
+    def load_text_probing_lock(key):
+        probe = threading.Thread(target=lambda: lock_free.append(
+            index._lock.acquire(timeout=1) and index._lock.release() is None
+        ))
+        probe.start()
+        probe.join()
+        return load_text(key)
+
+    # Execute
+    with patch.object(index, "_fit_vectors", side_effect=fit_while_adding), \
+         patch.object(index, "_load_text", side_effect=load_text_probing_lock):
+        index.compact()
+        index._compaction_thread.join(timeout=10)
+
+    # Assert - "c" was replayed, then a second compaction fitted its terms
+    assert index.doc_vectors.shape[0] == 3
+    assert index._changes_since_fit == 0
+    assert [key for key, _ in index.rank("cats", 3)] == ["c"]
+    assert lock_free and all(lock_free)
+
+@patch("app.services.search_service.load_extracted_text")
+def test_save_and_load_index(mock_load_text, index_settings, search_service):
+    """Test that a persisted index is restored without refitting"""
+    # Setup
+    index_settings.metadata_file.write_text(
+        '{"documents": [{"doc_id": "1"}, {"doc_id": "2"}]}', encoding="utf-8"
+    )
+    mock_load_text.side_effect = lambda doc_id: MOCK_TEXTS[doc_id]
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    expected = search_service.search("software")
+
+    # Execute
+    assert search_service.save_index() is True
+    restored = SearchService()
+    loaded = restored.load_index()
+
+    # Assert
+    assert loaded is True
+    assert restored.doc_ids == ["1", "2"]
+    assert restored.doc_texts == {}  # texts are loaded lazily
+    assert restored.search("software") == expected
+
+def test_load_index_missing_artifact(index_settings, search_service):
+    """Test that a missing artifact asks the caller to refit"""
+    assert search_service.load_index() is False
+
+def test_search_passages(index_settings, search_service):
+    """Test passage retrieval returns only the matching part of a document"""
+    # Setup - 4-word passages with 1 word overlap
+    text = "Waterfall has strict phases. Agile teams iterate quickly with sprints."
+    index_document(search_service, "1", text)
+    index_document(search_service, "2", MOCK_TEXTS["1"])
+
+    # Execute
+    passages = search_service.search_passages("sprints", top_k=3)
+
+    # Assert
+    assert len(passages) == 1
+    top = passages[0]
+    assert top['doc_id'] == "1"
+    assert "sprints" in top['text'] and "Waterfall" not in top['text']
+    assert text[top['start']:top['end']] == top['text']
+
+    # Removing the document also removes its passages
+    search_service.remove_document("1")
+    assert search_service.search_passages("sprints") == []
+
+def test_passage_rows_follow_adds_and_removes(index_settings, search_service):
+    """Test that re-indexing and removing a document never scans the passage keys"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    index_document(search_service, "3", "Kanban boards visualise the flow of work.")
+    text = "Agile teams iterate quickly with sprints and retrospectives."
+    save_extracted_text("1", text)
+    passages = search_service.passages
+
+    # Execute
+    with patch.object(PassageIndex, "parse_key", wraps=PassageIndex.parse_key) as parse_key:
+        passages.add_passages("1", text)
+        passages.remove_passages("2")
+
+    # Assert - only the new passage keys were parsed
+    new_keys = passages.split("1", text)
+    assert parse_key.call_count == len(new_keys)
+    assert passages.indexed_doc_ids() == {"1", "3"}
+    assert {passages.doc_ids[row] for row in passages.rows_of_documents(["1"])} == set(new_keys)
+    assert len(passages.rows_of_documents(["2"])) == 0
+
+    # The map survives a compaction
+    passages.compact()
+    assert {passages.doc_ids[row] for row in passages.rows_of_documents(["1"])} == set(new_keys)
+    assert passages.indexed_doc_ids() == {"1", "3"}
+
+
+def test_results_cite_pages(index_settings, search_service):
+    """Test that search hits and passages report the page they come from"""
+    # Setup - a three page document and one without pages
+    text, page_table = join_pages(["Agile manifesto values", "Scrum sprint planning", "Kanban flow"])
+    save_extracted_text("pdf", text, page_table)
+    search_service.add_document("pdf", text)
+    index_document(search_service, "txt", "Kanban notes without pages")
+
+    # Execute
+    hits = {r['doc_id']: r for r in search_service.search("kanban")}
+    passages = search_service.search_passages("sprint planning", top_k=1)
+
+    # Assert
+    assert hits["pdf"]['page'] == 3
+    assert hits["txt"]['page'] is None
+    assert passages[0]['doc_id'] == "pdf" and passages[0]['page'] == 2
+
+def test_search_cache_hits_and_invalidation(index_settings, search_service):
+    """Test that repeated queries hit the cache until the index changes"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+
+    # Execute - same query after normalization (case, Turkish chars, spaces)
+    first = search_service.search("software")
+    second = search_service.search("  SOFTWARE ")
+
+    # Assert
+    assert second == first
+    stats = search_service.cache_stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+    # Any index change bumps the generation and drops cached results
+    generation = search_service.index_generation
+    search_service.remove_document("1")
+    assert search_service.index_generation > generation
+    assert [r['doc_id'] for r in search_service.search("software")] == ["2"]
+    assert search_service.cache_stats()['misses'] == 2
+
+def test_results_cached_under_their_snapshot_generation(index_settings, search_service):
+    """Test that results of a snapshot replaced mid-query are not cached as current"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    scope, search_passages = search_service._scope, PassageIndex.search
+
+    def remove_during_query(remove, original):
+        def wrapper(*args, **kwargs):
+            if set(search_service.inverted.live_doc_ids()) == {"1", "2"}:
+                search_service.remove_document(remove)  # published by a concurrent write
+            return original(*args, **kwargs)
+        return wrapper
+
+    # Execute / Assert - the first query runs on the snapshot with both
+    # documents, the next one sees the write instead of a cached stale result
+    with patch.object(search_service, "_scope", side_effect=remove_during_query("1", scope)):
+        search_service.search("software")
+    assert [r['doc_id'] for r in search_service.search("software")] == ["2"]
+
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    with patch.object(PassageIndex, "search", autospec=True, side_effect=remove_during_query("1", search_passages)):
+        search_service.search_passages("software")
+    assert {p['doc_id'] for p in search_service.search_passages("software")} == {"2"}
+
+
+def test_search_many_matches_search(index_settings, search_service):
+    """Test that batch scoring gives the same results as single searches"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    index_document(search_service, "3", "Software teams plan waterfall releases.")
+    search_service.remove_document("3")
+    queries = ["software", "software intelligence", "banana"]
+
+    # Execute
+    batch = search_service.search_many(queries, top_k=[1, 5, 5])
+    search_service.cache.clear()
+    single = [search_service.search(q, top_k=k) for q, k in zip(queries, [1, 5, 5])]
+
+    # Assert
+    assert batch == single
+    assert len(batch[0]) == 1 and batch[0][0]['doc_id'] in {"1", "2"}
+    assert batch[2] == []
+
+def test_snippet_best_window_and_highlights(index_settings, search_service):
+    """Test that the snippet covers all query terms and highlights them"""
+    # Setup - "agile" alone early, "agile" next to "sprints" much later
+    text = ("Agile intro. " + "filler words here. " * 40 +
+            "Agile teams run (sprints) of two weeks. " + "closing text. " * 40)
+    index_document(search_service, "1", text)
+
+    # Execute
+    result = search_service.search("agile sprints")[0]
+
+    # Assert
+    snippet = result['snippet']
+    assert snippet.startswith("...") and snippet.endswith("...")
+    assert [snippet[start:end] for start, end in result['highlights']] == ["Agile", "sprints"]
+
+@pytest.mark.parametrize("engine", ["tfidf", "bm25"])
+def test_phrase_and_near_queries(index_settings, search_service, engine):
+    """Test that phrase and NEAR/k constraints filter documents before ranking"""
+    # Setup
+    index_document(search_service, "1", "Software engineering course covers agile methods.")
+    index_document(search_service, "2", "Engineering software requires agile course planning.")
+    index_document(search_service, "3", "Agile teams adopt software over time.")
+
+    with patch.object(index_settings, "search_engine", engine):
+        # Execute
+        phrase = search_service.search('"software engineering" agile')
+        near = search_service.search("agile NEAR/3 software")
+
+    # Assert
+    assert [r['doc_id'] for r in phrase] == ["1"]
+    assert {r['doc_id'] for r in near} == {"2", "3"}
+    assert search_service.search('"engineering course agile"') == []
+
+@pytest.mark.parametrize("engine", ["tfidf", "bm25"])
+def test_boolean_query_with_field_filter(index_settings, search_service, engine):
+    """Test that AND/NOT and metadata filters restrict the ranked documents"""
+    # Setup
+    documents = [
+        ("1", "Agile sprints and software teams.", "agile-guide.pdf", "2024-01-10T12:00:00"),
+        ("2", "Agile software with waterfall gates.", "hybrid.pdf", "2024-02-10T12:00:00"),
+        ("3", "Agile software for startups.", "agile-startups.txt", "2024-03-10T12:00:00"),
+    ]
+    for doc_id, text, filename, uploaded_at in documents:
+        save_extracted_text(doc_id, text)
+        search_service.add_document(doc_id, text, {"filename": filename, "uploaded_at": uploaded_at})
+
+    with patch.object(index_settings, "search_engine", engine):
+        # Execute
+        boolean = search_service.search("agile AND software NOT waterfall")
+        filtered = search_service.search("software filename:agile uploaded:>=2024-02")
+
+    # Assert
+    assert {r['doc_id'] for r in boolean} == {"1", "3"}
+    assert [r['doc_id'] for r in filtered] == ["3"]
+    with pytest.raises(ValueError):
+        search_service.search("agile uploaded:2024-13")
+
+def test_filter_only_queries(index_settings, search_service):
+    """Test that queries without ranking words list the documents matching the filter"""
+    # Setup
+    documents = [
+        ("1", "Agile sprints and cats.", "agile-guide.pdf", "2024-01-10T12:00:00"),
+        ("2", "Waterfall gates.", "hybrid.txt", "2023-02-10T12:00:00"),
+        ("3", "Agile software for startups.", "agile-startups.pdf", "2024-03-10T12:00:00"),
+    ]
+    for doc_id, text, filename, uploaded_at in documents:
+        save_extracted_text(doc_id, text)
+        search_service.add_document(doc_id, text, {"filename": filename, "uploaded_at": uploaded_at})
+
+    # Execute
+    pdfs = search_service.search("filename:*.pdf")
+    without_cats = search_service.search("NOT cats")
+    uploaded = search_service.search("uploaded:2024", top_k=1)
+
+    # Assert - matches in upload order, with a zero score
+    assert [r['doc_id'] for r in pdfs] == ["1", "3"]
+    assert [r['doc_id'] for r in without_cats] == ["2", "3"]
+    assert [r['doc_id'] for r in uploaded] == ["1"]
+    assert all(r['score'] == 0.0 and r['snippet'] for r in pdfs + without_cats)
+
+@pytest.mark.parametrize("engine", ["tfidf", "bm25"])
+def test_doc_ids_scope_before_ranking(index_settings, search_service, engine):
+    """Test that an allow-list finds documents outside the global top k"""
+    # Setup - many strong matches, the scoped document is a weak one
+    # (indexed first so that its words are in the TF-IDF vocabulary)
+    index_document(search_service, "weak", "Waterfall teams rarely run agile " + "process " * 30)
+    for i in range(8):
+        index_document(search_service, f"strong{i}", "Agile agile agile sprints.")
+
+    with patch.object(index_settings, "search_engine", engine):
+        # Execute
+        unscoped = search_service.search("agile", top_k=5)
+        scoped = search_service.search("agile", top_k=5, doc_ids=["weak", "missing"])
+        filtered = search_service.search('agile AND "waterfall teams"', doc_ids=["strong0"])
+
+    # Assert
+    assert "weak" not in {r['doc_id'] for r in unscoped}
+    assert [r['doc_id'] for r in scoped] == ["weak"]
+    assert filtered == []
+
+def test_passages_scoped_to_doc_ids(index_settings, search_service):
+    """Test that passage retrieval only scores the allowed documents"""
+    # Setup
+    index_document(search_service, "weak", "Teams plan releases. Waterfall has no sprints at all.")
+    for i in range(8):
+        index_document(search_service, f"strong{i}", "Sprints sprints sprints.")
+
+    # Execute
+    unscoped = search_service.search_passages("sprints", top_k=5)
+    scoped = search_service.search_passages("sprints", top_k=5, doc_ids=["weak"])
+
+    # Assert
+    assert "weak" not in {p['doc_id'] for p in unscoped}
+    assert scoped and {p['doc_id'] for p in scoped} == {"weak"}
+    assert "sprints" in scoped[0]['text']
+    assert search_service.search_passages("sprints", doc_ids=["missing"]) == []
+
+def test_fuse_rrf():
+    """Test that reciprocal rank fusion only uses ranks, not score scales"""
+    cosine = [("a", 0.9), ("b", 0.5), ("c", 0.1)]
+    bm25 = [("b", 12.0), ("c", 11.0), ("a", 0.2)]
+
+    fused = fuse_rrf([cosine, bm25], top_k=2, k=60)
+
+    assert [doc_id for doc_id, _ in fused] == ["b", "a"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+@pytest.mark.parametrize("strategy", ["rrf", "weighted"])
+def test_hybrid_pipeline_fuses_engines(index_settings, search_service, strategy):
+    """Test that several engines are fused and every stage is timed"""
+    # Setup
+    index_document(search_service, "1", "Agile agile sprints for software teams.")
+    index_document(search_service, "2", "Waterfall software planning.")
+    index_document(search_service, "3", "Agile retrospectives.")
+
+    with patch.object(index_settings, "retrieval_engines", ["tfidf", "bm25"]), \
+         patch.object(index_settings, "fusion_strategy", strategy):
+        # Execute
+        timings = {}
+        results = search_service.search("agile software", top_k=3, timings=timings)
+        cached = search_service.search("agile software", top_k=3)
+        tfidf = search_service._rank_tfidf("agile software", 3)
+        stats = search_service.pipeline_stats()
+
+    # Assert - both engines put document 1 first, fusion keeps it there
+    assert [r['doc_id'] for r in results][0] == tfidf[0][0] == "1"
+    assert {r['doc_id'] for r in results} == {"1", "2", "3"}
+    if strategy == "rrf":
+        assert results[0]['score'] == pytest.approx(2 / 61, abs=1e-4)
+    else:
+        assert results[0]['score'] == pytest.approx(1.0)
+    assert {"parse", "tfidf", "bm25", "fusion", "snippets", "total"} <= set(timings)
+    assert cached == results
+    assert stats["engines"] == ["tfidf", "bm25"]
+    assert stats["stages"]["total"]["calls"] == 2
+    assert stats["stages"]["snippets"]["calls"] == 1
+    assert stats["stages"]["cache"]["calls"] == 1
+
+def test_hybrid_pipeline_search_many_matches_search(index_settings, search_service):
+    """Test that the batched TF-IDF ranking fuses like a single search"""
+    # Setup
+    index_document(search_service, "1", "Agile agile sprints for software teams.")
+    index_document(search_service, "2", "Waterfall software planning.")
+    index_document(search_service, "3", "Agile retrospectives and waterfall gates.")
+    queries = ["agile", "software waterfall", "sprints OR gates"]
+
+    with patch.object(index_settings, "retrieval_engines", ["bm25", "tfidf"]), \
+         patch.object(index_settings, "fusion_strategy", "rrf"):
+        # Execute
+        batch = search_service.search_many(queries, top_k=2)
+        search_service.cache.clear()
+        single = [search_service.search(query, top_k=2) for query in queries]
+
+    # Assert
+    assert batch == single
+
+def test_rebuild_swaps_snapshot(index_settings, search_service):
+    """Test that a rebuild installs new indexes and replays writes made meanwhile"""
+    # Setup
+    index_settings.metadata_file.write_text(
+        '{"documents": [{"doc_id": "1"}, {"doc_id": "2"}]}', encoding="utf-8"
+    )
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    before = search_service.snapshot()
+    generation = search_service.index_generation
+    build_snapshot = search_service._build_snapshot
+
+    def build_with_concurrent_writes(*args):
+        fitted = build_snapshot(*args)
+        index_document(search_service, "3", "Waterfall software maintenance.")
+        search_service.remove_document("1")
+        return fitted
+
+    # Execute
+    with patch.object(search_service, "_build_snapshot", side_effect=build_with_concurrent_writes):
+        assert search_service.rebuild_index() is True
+
+    # Assert - new indexes with the journaled writes, the old snapshot is left alone
+    after = search_service.snapshot()
+    assert after.inverted is not before.inverted and after.passages is not before.passages
+    assert search_service.index_generation > generation
+    assert after.inverted.live_doc_ids() == ["2", "3"]
+    assert after.passages.indexed_doc_ids() == {"2", "3"}
+    assert {r['doc_id'] for r in search_service.search("software")} == {"2", "3"}
+    assert search_service._journal is None
+
+def test_writes_publish_new_snapshots(index_settings, search_service):
+    """Test that add/remove publish a forked snapshot and leave the old one unchanged"""
+    # Setup
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    before = search_service.snapshot()
+    ranking = before.documents.rank("software", 5)
+
+    # Execute
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    search_service.remove_document("1")
+    after = search_service.snapshot()
+
+    # Assert - the old snapshot still ranks the corpus it was published with
+    assert after.generation == before.generation + 2
+    assert before.documents.rank("software", 5) == ranking == [("1", pytest.approx(ranking[0][1]))]
+    assert [d for d, _ in after.documents.rank("software", 5)] == ["2"]
+    assert before.inverted.live_doc_ids() == ["1"] and after.inverted.live_doc_ids() == ["2"]
+    assert before.inverted.term_rows("software").tolist() == [0]
+    assert before.passages.indexed_doc_ids() == {"1"} and after.passages.indexed_doc_ids() == {"2"}
+    assert "1" in before.near_duplicates and "1" not in after.near_duplicates
+    assert [r['doc_id'] for r in search_service.search("software")] == ["2"]
+
+def test_documents_attributes_set_through_new_snapshot(search_service):
+    """Test that setting a document index attribute publishes instead of changing the snapshot"""
+    before = search_service.snapshot()
+
+    search_service.doc_texts = dict(MOCK_TEXTS)
+
+    assert before.documents.doc_texts == {}
+    assert search_service.doc_texts == MOCK_TEXTS
+    assert search_service.index_generation == before.generation + 1
+
+
+def test_searches_during_rebuilds(index_settings, search_service):
+    """Test that concurrent searches never fail or see a half-built index"""
+    # Setup
+    index_settings.metadata_file.write_text(
+        '{"documents": [{"doc_id": "1"}, {"doc_id": "2"}]}', encoding="utf-8"
+    )
+    index_document(search_service, "1", MOCK_TEXTS["1"])
+    index_document(search_service, "2", MOCK_TEXTS["2"])
+    stop = threading.Event()
+    errors, seen = [], set()
+
+    def read():
+        while not stop.is_set():
+            try:
+                for result in search_service.search("software waterfall"):
+                    seen.add(result['doc_id'])
+                search_service.search_passages("software")
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for reader in readers:
+        reader.start()
+
+    # Execute
+    try:
+        for _ in range(5):
+            assert search_service.rebuild_index() is True
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    # Assert
+    assert errors == []
+    assert seen <= {"1", "2"}
+
+@pytest.fixture
+def hashing_settings(index_settings):
+    """Hashing vectorizer mode with a small hash width"""
+    with patch.object(index_settings, "tfidf_vectorizer", "hashing"), \
+         patch.object(index_settings, "tfidf_hash_features", 2 ** 18):
+        yield index_settings
+
+def test_hashing_matches_unbounded_vocabulary(hashing_settings):
+    """Test that hashed TF-IDF scores equal an uncapped vocabulary (no collisions)"""
+    # Setup - more distinct terms than the vocabulary cap
+    texts = {str(i): f"common filler term{i} rare{i % 7}" for i in range(1500)}
+    hashing_settings.tfidf_hash_features = 2 ** 22  # no collision among these terms
+    service = SearchService()
+    service.build(texts)
+    reference = TfidfVectorizer(stop_words='english', lowercase=False, preprocessor=turkish_normalizer)
+    matrix = reference.fit_transform(list(texts.values()))
+
+    # Execute
+    results = service._rank_tfidf("term1234 rare3", top_k=3)
+    expected = cosine_similarity(reference.transform(["term1234 rare3"]), matrix).ravel()
+
+    # Assert
+    assert service.vectorizer.idf_.shape == (2 ** 22,)
+    assert results[0][0] == "1234"
+    assert [score for _, score in results] == pytest.approx(sorted(expected, reverse=True)[:3])
+
+def test_hashing_new_terms_searchable_incrementally(hashing_settings):
+    """Test that terms first seen after the fit are searchable without a refit"""
+    # Setup
+    service = SearchService()
+    index_document(service, "1", "Agile sprints for software teams.")
+    index_document(service, "2", "Waterfall planning.")
+    fit_generation = service.fit_generation
+
+    # Execute
+    index_document(service, "3", "Kubernetes operators for software teams.")
+    results = service.search("kubernetes")
+
+    # Assert
+    assert [r['doc_id'] for r in results] == ["3"]
+    assert service.fit_generation == fit_generation
+    service.remove_document("3")
+    assert service.search("kubernetes") == []
+
+def test_hashing_save_and_load(hashing_settings):
+    """Test that a hashed index round-trips and is not mixed with vocabulary artifacts"""
+    # Setup
+    hashing_settings.metadata_file.write_text(
+        '{"documents": [{"doc_id": "1"}, {"doc_id": "2"}]}', encoding="utf-8"
+    )
+    service = SearchService()
+    index_document(service, "1", MOCK_TEXTS["1"])
+    index_document(service, "2", MOCK_TEXTS["2"])
+    expected = service._rank_tfidf("software waterfall", top_k=2)
+
+    # Execute
+    assert service.save_index() is True
+    restored = SearchService()
+    loaded = restored.load_index()
+    with patch.object(hashing_settings, "tfidf_vectorizer", "vocabulary"):
+        vocabulary_mode = SearchService().load_index()
+
+    # Assert
+    assert loaded is True
+    assert restored._rank_tfidf("software waterfall", top_k=2) == pytest.approx(expected)
+    assert vocabulary_mode is False
+
@@ -0,0 +1,175 @@
+"""
+Unit tests for the Latent Semantic Index (LSA + LSH)
+
+Tests cover:
+- LSH candidates agree with exact nearest neighbour search
+- Paraphrase matches (no shared term) through SearchService
+- Fold-in of new documents and deleted documents
+- Refits without the index lock
+- Fusion with the lexical ranking
+- Hashed TF-IDF columns (basis over the used columns only)
+"""
+
+import threading
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from unittest.mock import patch
+from sklearn.preprocessing import normalize
+from app.config import settings
+from app.services.document_store import DocumentStore
+from app.services.pdf_service import save_extracted_text
+from app.services.search_service import SearchService
+from app.services.semantic_index import SemanticIndex
+from app.utils.ranking_utils import fuse_weighted
+
+MOCK_TEXTS = {
+    "1": "car engine repair wheels",
+    "2": "automobile engine repair wheels",
+    "3": "car automobile dealer",
+    "4": "sprint agile scrum backlog",
+    "5": "agile scrum team retrospective",
+    "6": "car wheels tires",
+}
+
+@pytest.fixture
+def semantic_settings():
+    """Semantic search on, 2-dimensional LSA space for the tiny corpus, no background refit"""
+    test_settings = settings.model_copy(update={
+        "semantic_search": True,
+        "semantic_components": 2,
+        "semantic_weight": 0.3,
+        "index_compaction_threshold": 100,
+    })
+    with patch("app.services.search_service.settings", test_settings), \
+         patch("app.services.semantic_index.settings", test_settings):
+        yield test_settings
+
+@pytest.fixture
+def service(semantic_settings, tmp_path):
+    """Search service over the mock texts (stored for snippets)"""
+    with patch("app.services.pdf_service.document_store", DocumentStore(tmp_path)):
+        for doc_id, text in MOCK_TEXTS.items():
+            save_extracted_text(doc_id, text)
+        search_service = SearchService()
+        search_service.build(MOCK_TEXTS)
+        yield search_service
+
+def test_lsh_matches_exact_search():
+    """Test that LSH candidates find (almost) the same neighbours as brute force"""
+    # Setup - 40 clusters of 100 noisy copies in a 300 term space
+    rng = np.random.default_rng(0)
+    centers = rng.random((40, 300)) * (rng.random((40, 300)) < 0.05)
+    rows = np.repeat(centers, 100, axis=0) + 0.02 * rng.random((4000, 300))
+    matrix = sp.csr_matrix(normalize(rows))
+    index = SemanticIndex(n_components=32, n_tables=8, n_bits=10)
+    index.fit(matrix, fit_generation=1)
+    live = np.ones(4000, dtype=bool)
+
+    # Execute
+    recall = []
+    for center in centers[:10]:
+        query = index.project(sp.csr_matrix(center))
+        approximate, _ = index.search(query, 10, live)
+        exact, _ = index.search(query, 10, live, exact=True)
+        recall.append(len(set(approximate) & set(exact)) / 10)
+
+    # Assert - candidates are a small part of the corpus, recall stays high
+    assert len(index.candidates(query)) < 4000 / 2
+    assert np.mean(recall) >= 0.9
+
+def test_semantic_finds_paraphrases(service):
+    """Test that documents without the query term are found through co-occurrence"""
+    # Execute
+    semantic = [doc_id for doc_id, _ in service.search_semantic("automobile", top_k=6)]
+    lexical = [doc_id for doc_id, _ in service._rank_tfidf("automobile", 6)]
+
+    # Assert - "car" documents match, unrelated agile documents do not
+    assert set(lexical) == {"2", "3"}
+    assert {"1", "6"} <= set(semantic)
+    assert not {"4", "5"} & set(semantic)
+
+def test_semantic_with_hashing_vectorizer(semantic_settings):
+    """Test that LSA over hashed columns only keeps the columns in use"""
+    # Setup
+    with patch.object(semantic_settings, "tfidf_vectorizer", "hashing"):
+        search_service = SearchService()
+        search_service.build(MOCK_TEXTS)
+
+        # Execute
+        semantic = [doc_id for doc_id, _ in search_service.search_semantic("automobile", top_k=6)]
+
+    # Assert
+    assert search_service.semantic.components.shape[1] < 50
+    assert {"1", "6"} <= set(semantic)
+    assert not {"4", "5"} & set(semantic)
+
+def test_search_fuses_lexical_and_semantic(service):
+    """Test that exact matches stay on top and paraphrases follow"""
+    # Execute
+    results = service.search("automobile", top_k=4)
+
+    # Assert
+    doc_ids = [r['doc_id'] for r in results]
+    assert set(doc_ids[:2]) == {"2", "3"}
+    assert set(doc_ids[2:]) == {"1", "6"}
+
+def test_semantic_follows_index_changes(service):
+    """Test that new documents are folded in and deleted ones disappear"""
+    # Setup - fit the semantic index
+    service.search_semantic("automobile")
+    fitted = service.semantic.fit_generation
+
+    # Execute
+    save_extracted_text("7", "car engine wheels dealer")
+    service.add_document("7", "car engine wheels dealer")
+    service.remove_document("1")
+    semantic = [doc_id for doc_id, _ in service.search_semantic("automobile", top_k=6)]
+
+    # Assert - folded in without a refit
+    assert service.semantic.fit_generation == fitted
+    assert "7" in semantic and "1" not in semantic
+    assert [d for d, _ in service.search_semantic("automobile", doc_ids=["6"])] == ["6"]
+
+def test_fuse_weighted():
+    """Test max-normalized weighted fusion"""
+    fused = fuse_weighted(
+        [[("a", 10.0), ("b", 5.0)], [("b", 0.8), ("c", 0.4)]],
+        [0.5, 0.5], top_k=3
+    )
+
+    assert fused == [("b", 0.75), ("a", 0.5), ("c", 0.25)]
+
+def test_semantic_refit_runs_without_index_lock(service):
+    """Test that an LSA refit leaves the index lock free and catches up with a refit made meanwhile"""
+    # Setup
+    fit = service.semantic.fit
+    lock_free = []
+
+    def fit_during_tfidf_refit(*args):
+        def probe():
+            acquired = service._lock.acquire(timeout=1)
+            if acquired:
+                service._lock.release()
+            lock_free.append(acquired)
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        if len(lock_free) == 1:
+            # New TF-IDF fit while the first LSA fit runs
+            writer = threading.Thread(target=service.build, args=(MOCK_TEXTS,))
+            writer.start()
+            writer.join()
+        fit(*args)
+
+    # Execute - the second query runs on the snapshot of the new TF-IDF fit
+    with patch.object(service.semantic, "fit", side_effect=fit_during_tfidf_refit):
+        service.search_semantic("automobile", top_k=6)
+        semantic = [doc_id for doc_id, _ in service.search_semantic("automobile", top_k=6)]
+
+    # Assert - refitted for the new TF-IDF fit, never under the index lock
+    assert lock_free == [True, True]
+    assert service.semantic.fit_generation == service.fit_generation
+    assert {"1", "6"} <= set(semantic)
@@ -0,0 +1,103 @@
+"""
+Unit tests for search-as-you-type suggestions
+
+Tests cover:
+- Prefix range lookup ranked by document frequency
+- Turkish character folding of the typed prefix
+- Suggestions follow index changes (add, remove, rebuild)
+- The sorted vocabulary is only rebuilt when terms are added or dropped
+"""
+
+from unittest.mock import patch
+
+import pytest
+from app.config import settings
+from app.services.document_store import DocumentStore
+from app.services.pdf_service import save_extracted_text
+from app.services.search_service import SearchService
+from app.services.suggest_index import SuggestIndex
+
+def test_suggest_ranked_by_document_frequency():
+    """Test that completions come from the prefix range, most frequent first"""
+    index = SuggestIndex(
+        ["agile", "agent", "waterfall", "agenda", "aggregate", "age"],
+        [5, 2, 9, 2, 1, 7]
+    )
+
+    assert index.suggest("ag") == [
+        {"term": "age", "doc_freq": 7},
+        {"term": "agile", "doc_freq": 5},
+        {"term": "agenda", "doc_freq": 2},  # ties in alphabetical order
+        {"term": "agent", "doc_freq": 2},
+        {"term": "aggregate", "doc_freq": 1},
+    ]
+    assert [s["term"] for s in index.suggest("agen", limit=1)] == ["agenda"]
+    assert index.suggest("x") == []
+    assert index.suggest("   ") == []
+    assert index.suggest("ag ") == []  # the last word is finished
+
+def test_suggest_folds_turkish_and_completes_last_word():
+    """Test that the typed text is folded like the index terms"""
+    index = SuggestIndex(["calisma", "calistay", "sprint"], [3, 1, 4])
+
+    assert [s["term"] for s in index.suggest("ÇALIŞ")] == ["calisma", "calistay"]
+    assert [s["term"] for s in index.suggest("agile çalışma sp")] == ["sprint"]
+
+@pytest.fixture
+def service(tmp_path):
+    """Search service with the extracted texts and metadata in a temp dir"""
+    test_settings = settings.model_copy(update={
+        "index_dir": tmp_path / "index",
+        "metadata_file": tmp_path / "metadata.json",
+        "index_compaction_threshold": 100,
+    })
+    with patch("app.services.search_service.settings", test_settings), \
+         patch("app.services.inverted_index.settings", test_settings), \
+         patch("app.services.pdf_service.document_store", DocumentStore(tmp_path / "extracted")):
+        yield SearchService(), test_settings
+
+def test_suggestions_follow_index_changes(service):
+    """Test that added, removed and rebuilt documents update the suggestions"""
+    search_service, test_settings = service
+    texts = {
+        "1": "Agile sprints and agile teams.",
+        "2": "Agile retrospectives.",
+        "3": "Agenda of the waterfall kickoff.",
+    }
+    for doc_id, text in texts.items():
+        save_extracted_text(doc_id, text)
+        search_service.add_document(doc_id, text)
+
+    # Document frequency, not term frequency
+    assert search_service.suggest("ag") == [
+        {"term": "agile", "doc_freq": 2}, {"term": "agenda", "doc_freq": 1}
+    ]
+
+    search_service.remove_document("3")
+    assert [s["term"] for s in search_service.suggest("ag")] == ["agile"]
+
+    test_settings.metadata_file.write_text('{"documents": [{"doc_id": "3"}]}', encoding="utf-8")
+    search_service.rebuild_index()
+    assert [s["term"] for s in search_service.suggest("ag")] == ["agenda"]
+
+def test_sorted_vocabulary_reused_until_terms_change(service):
+    """Test that index changes without new terms only refresh the document frequencies"""
+    search_service, _ = service
+    for doc_id, text in {"1": "Agile sprints.", "2": "Agile teams."}.items():
+        save_extracted_text(doc_id, text)
+        search_service.add_document(doc_id, text)
+    terms = search_service._suggest_index().terms
+
+    # Execute - known terms only, then a new term
+    save_extracted_text("3", "Agile sprints and teams.")
+    search_service.add_document("3", "Agile sprints and teams.")
+    refreshed = search_service.suggest("ag")
+    reused = search_service._suggest_index().terms
+    save_extracted_text("4", "Agenda.")
+    search_service.add_document("4", "Agenda.")
+
+    # Assert
+    assert reused is terms
+    assert refreshed == [{"term": "agile", "doc_freq": 3}]
+    assert search_service._suggest_index().terms is not terms
+    assert [s["term"] for s in search_service.suggest("ag")] == ["agile", "agenda"]